@@ -1,12 +1,8 @@
 import os
-import pandas as pd
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, Alignment, PatternFill
-import csv
-from io import StringIO, BytesIO
 from datetime import datetime, date, timedelta
 from flask import (
     Flask,
+    current_app,
     render_template,
     request,
     redirect,
@@ -14,28 +10,65 @@ from flask import (
     session,
     flash,
     Response,
-    make_response,
+    jsonify,
+    send_file,
+)
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, load_only
+from models import (
+    db,
+    Veiculo,
+    VehicleType,
+    Cliente,
+    Reservation,
+    Categoria,
+    VehicleAlert,
+    VehicleUtilization,
+    CategoryRevenue,
+    VehicleEvent,
+    VehicleEventType,
+    JobRun,
+    SchedulerLease,
+)
+from availability import availability_index, index_sync
+from occupancy import occupancy_matrix
+from pagination import keyset_page
+from client_search import search_condition
+from vehicle_search import vehicle_search_index
+from background import JOBS, LEASE_NAME
+from image_store import (
+    save_upload,
+    image_size,
+    release,
+    remove_files,
+    generate_missing_variants,
+)
+from exports import (
+    CLIENT_HEADER,
+    EXPORT_SHEETS,
+    RESERVATION_HEADER,
+    RESERVATION_STATUSES,
+    VEHICLE_HEADER,
+    client_rows,
+    csv_response,
+    excel_response,
+    export_sheet,
+    reservation_rows,
+    vehicle_rows,
+)
+from export_jobs import export_queue
+from user_cache import user_cache
+from reports import REPORT_WINDOW_DAYS, refresh_reports, reports_refreshed_at
+from sweeps import (
+    refresh_vehicle_alerts,
+    run_maintenance_sweep,
+    run_reservation_sweep,
+    sweep_metrics,
+    timed_sweep,
 )
-from models import db, Veiculo, VehicleType, Cliente, Reservation, Categoria
-from werkzeug.utils import secure_filename
-from app import app
-
-
-def check_maintenance_status():
-    """
-    Verifica o status de manutenção dos veículos e atualiza quando necessário.
-    """
-    vehicles_in_maintenance = Veiculo.query.filter_by(in_maintenance=True).all()
-    today = date.today()
 
-    for vehicle in vehicles_in_maintenance:
-        if vehicle.next_maintenance_date and vehicle.next_maintenance_date <= today:
-            vehicle.status = True
-            vehicle.in_maintenance = False
-            vehicle.next_maintenance_date = vehicle.last_maintenance_date + timedelta(
-                days=180
-            )
-            db.session.commit()
+# Número máximo de veículos listados em cada alerta do painel
+MAX_ALERTS = 20
 
 
 def register_usage(vehicle):
@@ -98,55 +131,42 @@ def admin_panel():
     Rota para o painel de administração.
     Exibe informações sobre veículos, alertas de manutenção, status de estoque e mais.
     """
-    # Chamar a função para verificar a manutenção do veículo
-    check_maintenance_status()
-
-    # Consultar todos os veículos no banco de dados
-    vehicles = Veiculo.query.all()
-    # Lógica para verificar veículos que precisam de manutenção
     today = date.today()
-    vehicles_needing_maintenance = [
-        vehicle
-        for vehicle in vehicles
-        if vehicle.next_maintenance_date
-        and vehicle.next_maintenance_date <= (today + timedelta(days=30))
-        and not vehicle.in_maintenance
-    ]
-    if vehicles_needing_maintenance:
-        # Montar a mensagem de alerta
-        alert_message = "Atenção: Os seguintes veículos precisam de manutenção:\n"
-        for vehicle in vehicles_needing_maintenance:
-            alert_message += f"{vehicle.brand} {vehicle.model} ({vehicle.type.value})\n"
-
-        # Enviar a mensagem de alerta para a página usando a função flash
-        flash(alert_message, "warning")
 
-    # Lógica para verificar veículos que precisam de legalização
-    vehicles_needing_legalization = [
-        vehicle
-        for vehicle in vehicles
-        if vehicle.next_legalization_date
-        and (vehicle.next_legalization_date - today).days <= 30
-        and not vehicle.in_maintenance
+    # Alertas de manutenção e legalização, lidos da tabela materializada
+    # (atualizada diariamente pelo scheduler)
+    alertas = [
+        (
+            VehicleAlert.MAINTENANCE,
+            "Atenção: Os seguintes veículos precisam de manutenção:\n",
+        ),
+        (
+            VehicleAlert.LEGALIZATION,
+            "Atenção: Os seguintes veículos precisam de legalização:\n",
+        ),
     ]
-    if vehicles_needing_legalization:
+    for kind, alert_message in alertas:
+        query = VehicleAlert.query.filter_by(kind=kind).order_by(VehicleAlert.due_date)
+        alerts = query.limit(MAX_ALERTS).all()
+        if not alerts:
+            continue
+
         # Montar a mensagem de alerta
-        alert_message = "Atenção: Os seguintes veículos precisam de legalização:\n"
-        for vehicle in vehicles_needing_legalization:
-            alert_message += f'{vehicle.brand} {vehicle.model} ({vehicle.type.value}) - Próxima Legalização: {vehicle.next_legalization_date.strftime("%d/%m/%Y")}\n'
+        for alert in alerts:
+            if kind == VehicleAlert.MAINTENANCE:
+                alert_message += f"{alert.brand} {alert.model} ({alert.type.value})\n"
+            else:
+                alert_message += f'{alert.brand} {alert.model} ({alert.type.value}) - Próxima Legalização: {alert.due_date.strftime("%d/%m/%Y")}\n'
+        if len(alerts) == MAX_ALERTS:
+            restantes = query.count() - MAX_ALERTS
+            if restantes:
+                alert_message += f"... e mais {restantes} veículo(s).\n"
 
         # Enviar a mensagem de alerta para a página usando a função flash
         flash(alert_message, "warning")
 
-    # Verificar se a data de próxima legalização é None e, se for, atribuir uma data futura
-    for vehicle in vehicles:
-        if not vehicle.next_legalization_date:
-            vehicle.next_legalization_date = date.today() + timedelta(days=365)
-
     # Verificar se há veículos suficientes no estoque
-    num_veiculos = len(vehicles)
-    num_clientes = len(Cliente.query.all())
-    estoque_suficiente = num_veiculos >= num_clientes + 5
+    estoque_suficiente = stock_is_sufficient()
 
     # sempre que a página inicial for carregada, ela verificará se há veículos suficientes no estoque e exibirá uma mensagem de aviso caso contrário.
     if not estoque_suficiente:
@@ -158,29 +178,168 @@ def admin_panel():
     # Passar a variável 'date' para o template 'admin.html'
     return render_template(
         "admin.html",
-        vehicles=vehicles,
         date=today,
         estoque_suficiente=estoque_suficiente,
+        sweep_metrics=sweep_metrics,
+        user_cache_stats=user_cache.stats(),
     )
 
 
+def stock_is_sufficient():
+    """
+    Verifica se há pelo menos mais 5 veículos do que clientes, com contagens SQL.
+    """
+    num_veiculos = db.session.query(func.count(Veiculo.id)).scalar()
+    num_clientes = db.session.query(func.count(Cliente.id)).scalar()
+    return num_veiculos >= num_clientes + 5
+
+
+def availability_status():
+    """
+    Verifica (GET) ou reconstrói (POST) o índice de disponibilidade em memória.
+    """
+    if request.method == "POST":
+        total = availability_index.rebuild()
+        flash(
+            f"Índice de disponibilidade reconstruído com {total} reservas ativas.",
+            "success",
+        )
+        return redirect(url_for("admin_panel"))
+
+    # Aplica primeiro as escritas dos outros processos
+    index_sync.refresh()
+    if not availability_index.loaded:
+        flash(
+            "O índice de disponibilidade não está carregado neste processo (é carregado na primeira pesquisa).",
+            "info",
+        )
+        return redirect(url_for("admin_panel"))
+
+    problems = availability_index.check_consistency()
+    if problems:
+        flash(
+            f"O índice de disponibilidade tem {len(problems)} diferença(s) em relação à base de dados. Reconstrua o índice.",
+            "warning",
+        )
+    else:
+        flash("O índice de disponibilidade está consistente.", "success")
+
+    return redirect(url_for("admin_panel"))
+
+
+def maintenance_sweep():
+    """
+    Executa manualmente o varrimento de manutenção (normalmente feito pelo scheduler).
+    """
+    full = request.form.get("full") == "1"
+    updated = timed_sweep("maintenance", run_maintenance_sweep, full=full)
+    flash(
+        f"Varrimento de manutenção concluído: {updated} veículo(s) atualizado(s).",
+        "success",
+    )
+    return redirect(url_for("admin_panel"))
+
+
+def reservation_sweep():
+    """
+    Executa manualmente o varrimento das reservas concluídas.
+    """
+    updated = timed_sweep("reservations", run_reservation_sweep)
+    flash(
+        f"Varrimento de reservas concluído: {updated} reserva(s) concluída(s).",
+        "success",
+    )
+    return redirect(url_for("admin_panel"))
+
+
+VEHICLES_PER_PAGE = 50
+
+# Colunas pelas quais a lista de veículos pode ser ordenada (todas indexadas)
+VEHICLE_SORT_COLUMNS = {
+    "id": Veiculo.id,
+    "brand": Veiculo.brand,
+    "model": Veiculo.model,
+    "year": Veiculo.year,
+    "price_per_day": Veiculo.price_per_day,
+}
+
+
 def list_vehicles():
     """
-    Lista todos os veículos disponíveis e verifica o estoque suficiente.
+    Lista os veículos por páginas, com ordenação e filtros no servidor.
+
+    A paginação é feita por cursor (keyset): cada página custa o mesmo número
+    de consultas e o mesmo tempo, seja qual for o tamanho da frota.
     """
-    vehicles = Veiculo.query.all()
-    today = date.today()
+    filtros = {
+        "brand": request.args.get("brand", "").strip(),
+        "model": request.args.get("model", "").strip(),
+        "type": request.args.get("type", ""),
+        "categoria": request.args.get("categoria", ""),
+        "status": request.args.get("status", ""),
+    }
+    sort = request.args.get("sort", "id")
+    if sort not in VEHICLE_SORT_COLUMNS:
+        sort = "id"
+    descending = request.args.get("order") == "desc"
+
+    query = Veiculo.query.options(
+        load_only(
+            Veiculo.id,
+            Veiculo.type,
+            Veiculo.brand,
+            Veiculo.model,
+            Veiculo.year,
+            Veiculo.price_per_day,
+            Veiculo.status,
+            Veiculo.in_maintenance,
+            Veiculo.next_maintenance_date,
+            Veiculo.next_legalization_date,
+        ),
+        joinedload(Veiculo.categoria).load_only(Categoria.nome),
+    )
+    if filtros["brand"]:
+        query = query.filter(Veiculo.brand.ilike(f"{filtros['brand']}%"))
+    if filtros["model"]:
+        query = query.filter(Veiculo.model.ilike(f"{filtros['model']}%"))
+    if filtros["type"] in VehicleType.__members__:
+        query = query.filter(Veiculo.type == VehicleType[filtros["type"]])
+    if filtros["categoria"].isdigit():
+        query = query.filter(Veiculo.categoria_id == int(filtros["categoria"]))
+    if filtros["status"] == "disponivel":
+        query = query.filter(Veiculo.status == True)  # noqa: E712
+    elif filtros["status"] == "indisponivel":
+        query = query.filter(Veiculo.status == False)  # noqa: E712
+    elif filtros["status"] == "manutencao":
+        query = query.filter(Veiculo.in_maintenance == True)  # noqa: E712
+
+    vehicles, next_cursor = keyset_page(
+        query,
+        VEHICLE_SORT_COLUMNS[sort],
+        Veiculo.id,
+        descending=descending,
+        cursor=request.args.get("cursor"),
+        per_page=VEHICLES_PER_PAGE,
+    )
 
-    # Verificar se há veículos suficientes no estoque
-    num_veiculos = len(vehicles)
-    num_clientes = len(Cliente.query.all())
-    estoque_suficiente = num_veiculos >= num_clientes + 5
+    # Parâmetros atuais, para os links da página seguinte manterem os filtros
+    parametros = {key: value for key, value in filtros.items() if value}
+    parametros["sort"] = sort
+    if descending:
+        parametros["order"] = "desc"
 
     return render_template(
         "list_vehicles.html",
         vehicles=vehicles,
-        date=today,
-        estoque_suficiente=estoque_suficiente,
+        date=date.today(),
+        filtros=filtros,
+        sort=sort,
+        descending=descending,
+        parametros=parametros,
+        next_cursor=next_cursor,
+        first_page=not request.args.get("cursor"),
+        categorias=Categoria.query.order_by(Categoria.nome).all(),
+        tipos=VehicleType,
     )
 
 
@@ -189,12 +348,103 @@ def view_vehicle(id):
     Exibe detalhes de um veículo específico com base no ID fornecido.
     """
     vehicle = Veiculo.query.get_or_404(id)
-    imagens_paths = vehicle.imagens.split(",") if vehicle.imagens else []
+    eventos = (
+        vehicle.events.order_by(VehicleEvent.date.desc(), VehicleEvent.id.desc())
+        .limit(RECENT_EVENTS)
+        .all()
+    )
 
     return render_template(
         "view_vehicle.html",
         vehicle=vehicle,
-        imagens_paths=imagens_paths,
+        imagens_paths=vehicle.image_paths,
+        eventos=eventos,
+    )
+
+
+# Eventos mostrados na página do veículo (o resto fica no histórico)
+RECENT_EVENTS = 10
+
+EVENTS_PER_PAGE = 50
+
+
+def vehicle_events():
+    """
+    Histórico de manutenções e legalizações por páginas, de um veículo ou
+    da frota inteira, com filtros por tipo de evento e intervalo de datas.
+    """
+    filtros = {
+        "vehicle_id": request.args.get("vehicle_id", ""),
+        "tipo": request.args.get("tipo", ""),
+        "de": request.args.get("de", ""),
+        "ate": request.args.get("ate", ""),
+    }
+    try:
+        data_inicio = _parse_date(filtros["de"])
+        data_fim = _parse_date(filtros["ate"])
+    except ValueError:
+        flash("Datas inválidas no filtro do histórico.", "danger")
+        return redirect(url_for("vehicle_events"))
+
+    query = VehicleEvent.query.options(
+        joinedload(VehicleEvent.veiculo).load_only(Veiculo.brand, Veiculo.model)
+    )
+    vehicle = None
+    if filtros["vehicle_id"].isdigit():
+        vehicle = Veiculo.query.get_or_404(int(filtros["vehicle_id"]))
+        query = query.filter(VehicleEvent.vehicle_id == vehicle.id)
+    if filtros["tipo"] in VehicleEventType.__members__:
+        query = query.filter(VehicleEvent.type == VehicleEventType[filtros["tipo"]])
+    if data_inicio:
+        query = query.filter(VehicleEvent.date >= data_inicio)
+    if data_fim:
+        query = query.filter(VehicleEvent.date <= data_fim)
+
+    eventos, next_cursor = keyset_page(
+        query,
+        VehicleEvent.date,
+        VehicleEvent.id,
+        descending=True,
+        cursor=request.args.get("cursor"),
+        per_page=EVENTS_PER_PAGE,
+    )
+
+    return render_template(
+        "vehicle_events.html",
+        eventos=eventos,
+        vehicle=vehicle,
+        filtros=filtros,
+        tipos=VehicleEventType,
+        parametros={key: value for key, value in filtros.items() if value},
+        next_cursor=next_cursor,
+        first_page=not request.args.get("cursor"),
+    )
+
+
+# Número de execuções das tarefas periódicas mostradas no histórico
+JOB_RUNS_LIMIT = 50
+
+
+def job_runs():
+    """
+    Execuções mais recentes das tarefas periódicas (de todos os processos),
+    com filtro por tarefa, e o processo que é o líder do scheduler.
+    """
+    nome = request.args.get("nome", "")
+    nomes = [name for name, _, _ in JOBS]
+
+    query = JobRun.query
+    if nome in nomes:
+        query = query.filter(JobRun.name == nome)
+    runs = query.order_by(JobRun.started_at.desc()).limit(JOB_RUNS_LIMIT).all()
+
+    return render_template(
+        "job_runs.html",
+        runs=runs,
+        nome=nome,
+        nomes=nomes,
+        lease=db.session.get(SchedulerLease, LEASE_NAME),
+        agora=datetime.now(),
     )
 
 
@@ -217,32 +467,6 @@ def add_vehicle():
         elif price_per_day <= 50:
             categoria_nome = "Econômico"
 
-        # Obter a categoria do banco de dados
-        categoria = Categoria.query.filter_by(nome=categoria_nome).first()
-
-        # Processar o upload das imagens
-        imagens = request.files.getlist("imagens")
-        imagens_paths = []
-        for imagem in imagens:
-            filename = secure_filename(imagem.filename)
-            path = filename  # Caminho relativo à pasta 'static'
-            full_path = os.path.join(app.config["UPLOAD_FOLDER"], path)
-            imagem.save(full_path)
-            imagens_paths.append(path)
-
-        # Criar um novo objeto Veiculo e adicioná-lo ao banco de dados
-        novo_veiculo = Veiculo(
-            type=VehicleType[type.upper()],
-            brand=brand,
-            model=model,
-            year=year,
-            price_per_day=price_per_day,
-            categoria=categoria,
-        )
-
-        # Salvar os caminhos das imagens
-        novo_veiculo.imagens = ",".join(imagens_paths)
-
         # Validar o ano
         if not isinstance(int(request.form["year"]), int):
             flash("O ano deve ser um número inteiro.", category="danger")
@@ -264,10 +488,49 @@ def add_vehicle():
             )
             return False
 
-        # Salvar o veículo
+        # Obter a categoria do banco de dados
+        categoria = Categoria.query.filter_by(nome=categoria_nome).first()
+
+        # Processar o upload das imagens (só depois de validar o formulário,
+        # para não deixar ficheiros guardados sem veículo)
+        imagens = request.files.getlist("imagens")
+        imagens_paths = []
+        repetidas = []
+        for imagem in imagens:
+            if imagem.filename == "":
+                # A imagem está vazia, ignorá-la
+                continue
+
+            # Guardada pelo conteúdo: imagens iguais partilham o ficheiro
+            path = save_upload(imagem)
+            if path not in imagens_paths:
+                imagens_paths.append(path)
+            else:
+                repetidas.append(path)
+
+        # Criar um novo objeto Veiculo e adicioná-lo ao banco de dados
+        novo_veiculo = Veiculo(
+            type=VehicleType[type.upper()],
+            brand=brand,
+            model=model,
+            year=year,
+            price_per_day=price_per_day,
+            categoria=categoria,
+        )
+
+        # Salvar as imagens, pela ordem do formulário (a primeira é a capa)
+        for path in imagens_paths:
+            novo_veiculo.add_image(path, *image_size(path))
+
+        # Salvar o veículo (a mesma imagem enviada duas vezes conta uma vez)
         novo_veiculo.initialize_vehicle()
         db.session.add(novo_veiculo)
+        release(repetidas)
         db.session.commit()  # Salvar o novo veículo no banco de dados
+        occupancy_matrix.invalidate()
+        vehicle_search_index.update(novo_veiculo)
+        refresh_vehicle_alerts(novo_veiculo.id)
+        generate_missing_variants(imagens_paths)
 
         # Redirecionar para o painel de administração com mensagem de sucesso
         flash("Novo veículo adicionado com sucesso!", "success")
@@ -346,19 +609,22 @@ def edit_vehicle(id):
             return False
 
         # Processar o upload das imagens
+        # Guardadas pelo conteúdo: imagens iguais partilham o ficheiro. São
+        # todas guardadas antes de alterar a sessão, que ao escrever fica com
+        # o bloqueio de escrita que save_upload também obtém
         imagens = request.files.getlist("imagens")
-        imagens_paths = vehicle.imagens.split(",")
+        paths = [save_upload(imagem) for imagem in imagens if imagem.filename != ""]
 
-        for imagem in imagens:
-            if imagem.filename == "":
-                # A imagem está vazia, ignorá-la
-                continue
+        novas_imagens = []
+        repetidas = []
+        for path in paths:
+            if vehicle.add_image(path, *image_size(path)) is not None:
+                novas_imagens.append(path)
+            else:
+                repetidas.append(path)
 
-            filename = secure_filename(imagem.filename)
-            path = filename  # Caminho relativo à pasta 'static'
-            full_path = os.path.join(app.config["UPLOAD_FOLDER"], path)
-            imagem.save(full_path)
-            imagens_paths.append(path)
+        # Uma imagem que o veículo já tinha não conta outra referência
+        release(repetidas)
 
         # Atualizar os dados do veículo com base no formulário
         vehicle.type = VehicleType[type.upper()]
@@ -369,11 +635,12 @@ def edit_vehicle(id):
         vehicle.categoria = categoria
         vehicle.max_uses_before_maintenance = max_uses_before_maintenance
 
-        # Atualizar os caminhos das imagens
-        vehicle.imagens = ",".join(imagens_paths)
-
         # Salvar as alterações no banco de dados
         db.session.commit()
+        occupancy_matrix.invalidate()
+        vehicle_search_index.update(vehicle)
+        refresh_vehicle_alerts(vehicle.id)
+        generate_missing_variants(novas_imagens)
 
         # Redirecionar para a visualização do veículo com mensagem de sucesso
         flash("Detalhes do veículo atualizados com sucesso!", "success")
@@ -391,8 +658,14 @@ def delete_vehicle(id):
 
     if request.method == "POST":
         # Remover o veículo do banco de dados
+        orfas = release(vehicle.image_paths)
         db.session.delete(vehicle)
         db.session.commit()
+        occupancy_matrix.invalidate()
+        vehicle_search_index.remove(id)
+        refresh_vehicle_alerts(id)
+        # As imagens só são apagadas se nenhum outro veículo as usar
+        remove_files(orfas)
 
         # Redirecionar para o painel de administração com mensagem de sucesso
         flash("Veículo removido com sucesso!", "success")
@@ -413,24 +686,26 @@ def delete_image(image_path, vehicle_id):
 
     if request.method == "POST" or request.form.get("_method") == "DELETE":
         # Verifica se a imagem está associada ao veículo
-        if image_path in vehicle.imagens.split(","):
-            try:
-                # Remove a imagem do servidor
-                os.remove(os.path.join(app.config["UPLOAD_FOLDER"], image_path))
-            except Exception as e:
+        if image_path in vehicle.image_paths:
+            if not os.path.exists(
+                os.path.join(current_app.config["UPLOAD_FOLDER"], image_path)
+            ):
                 flash(
                     "Imagem não existe na base de dados, então foi atualizado a lista e removida a imagem não existente!",
                     "warning",
                 )
 
             # Atualiza o registro do veículo no banco de dados para refletir a remoção da imagem
-            imagens = vehicle.imagens.split(",")
-            imagens.remove(image_path)
-            vehicle.imagens = ",".join(imagens).lstrip("").lstrip(",")
+            orfas = release([image_path])
+            vehicle.remove_image(image_path)
 
             # Salva as alterações no banco de dados
             db.session.commit()
 
+            # Remove a imagem do servidor (e as variantes) se mais nenhum
+            # veículo a usar
+            remove_files(orfas)
+
             flash("Imagem removida com sucesso!", "success")
 
         return redirect(url_for("edit_vehicle", id=vehicle_id))
@@ -445,6 +720,18 @@ def delete_image(image_path, vehicle_id):
         )
 
 
+def set_cover_image(image_path, vehicle_id):
+    """
+    Define a imagem de capa de um veículo, usada nas listagens.
+    """
+    vehicle = Veiculo.query.get_or_404(vehicle_id)
+    if image_path in vehicle.image_paths:
+        vehicle.set_cover(image_path)
+        db.session.commit()
+        flash("Imagem de capa atualizada com sucesso!", "success")
+    return redirect(url_for("edit_vehicle", id=vehicle_id))
+
+
 def logout():
     """
     Encerra a sessão do administrador.
@@ -470,12 +757,11 @@ def legalize_vehicle(id):
     )
 
     # Salva o histórico de legalizações
-    vehicle.legalization_history += (
-        f'Legalização realizada {vehicle.last_legalization_date.strftime("%Y-%m-%d")};'
-    )
+    VehicleEvent.record(vehicle, VehicleEventType.LEGALIZACAO)
 
     # Salva as alterações no banco de dados
     db.session.commit()
+    refresh_vehicle_alerts(vehicle.id)
 
     flash("Veículo legalizado com sucesso!", "info")
 
@@ -495,9 +781,12 @@ def maintenance_vehicle(id):
             vehicle.in_maintenance = True
             vehicle.last_maintenance_date = date.today()
             vehicle.next_maintenance_date = date.today() + timedelta(days=6 * 30)
-            vehicle.maintenance_history += f'Manutenção iniciada {vehicle.last_maintenance_date.strftime("%Y-%m-%d")};'
+            VehicleEvent.record(vehicle, VehicleEventType.MANUTENCAO_INICIADA)
 
             db.session.commit()
+            occupancy_matrix.invalidate()
+            vehicle_search_index.update(vehicle)
+            refresh_vehicle_alerts(vehicle.id)
 
             flash("Veículo enviado para manutenção com sucesso!", "success")
 
@@ -508,9 +797,12 @@ def maintenance_vehicle(id):
             vehicle.next_maintenance_date = vehicle.last_maintenance_date + timedelta(
                 days=180
             )
-            vehicle.maintenance_history += f'Manutenção concluída {vehicle.last_maintenance_date.strftime("%Y-%m-%d")};'
+            VehicleEvent.record(vehicle, VehicleEventType.MANUTENCAO_CONCLUIDA)
 
             db.session.commit()
+            occupancy_matrix.invalidate()
+            vehicle_search_index.update(vehicle)
+            refresh_vehicle_alerts(vehicle.id)
 
             flash("Veículo concluiu a manutenção com sucesso!", "success")
 
@@ -531,6 +823,7 @@ def register_usage_route(vehicle_id):
 
     # Registra a utilização e verifica a próxima manutenção
     register_usage(vehicle)
+    refresh_vehicle_alerts(vehicle_id)
 
     # Redireciona de volta para a página de edição do veículo
     flash("Utilização registrada com sucesso!", "success")
@@ -595,12 +888,60 @@ def deletar_categoria(id):
     return redirect(url_for("categorias"))
 
 
+CLIENTS_PER_PAGE = 50
+
+# Colunas pelas quais a lista de clientes pode ser ordenada (todas indexadas)
+CLIENT_SORT_COLUMNS = {
+    "id": Cliente.id,
+    "nome": Cliente.nome,
+    "apelido": Cliente.apelido,
+}
+
+
 def list_clients():
     """
-    Exibe a lista de clientes.
+    Exibe a lista de clientes por páginas, com pesquisa por nome, apelido,
+    email, telefone ou NIF no índice de texto integral.
     """
-    clients = Cliente.query.all()
-    return render_template("list_clients.html", clients=clients)
+    pesquisa = request.args.get("q", "").strip()
+    sort = request.args.get("sort", "id")
+    if sort not in CLIENT_SORT_COLUMNS:
+        sort = "id"
+
+    query = Cliente.query.options(
+        load_only(
+            Cliente.id,
+            Cliente.nome,
+            Cliente.apelido,
+            Cliente.email,
+            Cliente.telefone,
+        )
+    )
+    condicao = search_condition(pesquisa)
+    if condicao is not None:
+        query = query.filter(condicao)
+
+    clients, next_cursor = keyset_page(
+        query,
+        CLIENT_SORT_COLUMNS[sort],
+        Cliente.id,
+        cursor=request.args.get("cursor"),
+        per_page=CLIENTS_PER_PAGE,
+    )
+
+    parametros = {"sort": sort}
+    if pesquisa:
+        parametros["q"] = pesquisa
+
+    return render_template(
+        "list_clients.html",
+        clients=clients,
+        pesquisa=pesquisa,
+        sort=sort,
+        parametros=parametros,
+        next_cursor=next_cursor,
+        first_page=not request.args.get("cursor"),
+    )
 
 
 def delete_client(id):
@@ -610,6 +951,7 @@ def delete_client(id):
     cliente = Cliente.query.get_or_404(id)
     db.session.delete(cliente)
     db.session.commit()
+    user_cache.invalidate(id)
     flash("Cliente excluído com sucesso!", "success")
     return redirect(url_for("list_clients"))
 
@@ -645,6 +987,7 @@ def admin_edit_client(id):
         cliente.categoria = categoria
 
         db.session.commit()
+        user_cache.invalidate(cliente.id)
         flash("Cliente atualizado com sucesso!", "success")
         return redirect(url_for("list_clients"))
 
@@ -653,146 +996,256 @@ def admin_edit_client(id):
 
 def export_csv():
     """
-    Exporta dados dos veículos para um arquivo CSV.
-    """
-    # Consulta todos os veículos na tabela de Veículos
-    vehicles = Veiculo.query.all()
-
-    # Cria um objeto StringIO para armazenar o conteúdo CSV
-    csv_buffer = StringIO()
-    csv_writer = csv.writer(csv_buffer)
-
-    # Escreve os títulos das colunas no arquivo CSV
-    csv_writer.writerow(
-        [
-            "ID",
-            "Tipo",
-            "Marca",
-            "Modelo",
-            "Ano",
-            "Diária (€)",
-            "Categoria",
-            "Status",
-            "Em Manutenção",
-            "Próxima Manutenção",
-            "Próxima Legalização",
-        ]
+    Exporta dados dos veículos para um arquivo CSV, enviado enquanto é gerado.
+    """
+    return csv_response("vehicles.csv", VEHICLE_HEADER, vehicle_rows())
+
+
+def export_clients_csv():
+    """
+    Exporta os clientes para um arquivo CSV, opcionalmente só de uma categoria.
+    """
+    categoria = request.args.get("categoria") or None
+    return csv_response("clients.csv", CLIENT_HEADER, client_rows(categoria))
+
+
+def export_reservations_csv():
+    """
+    Exporta as reservas para um arquivo CSV, filtradas pela data de início
+    (de/ate) e pelo status.
+    """
+    try:
+        filtros = _reservation_filters()
+    except ValueError:
+        flash("Datas inválidas para a exportação de reservas.", "danger")
+        return redirect(url_for("admin_panel"))
+
+    return csv_response(
+        "reservations.csv", RESERVATION_HEADER, reservation_rows(*filtros)
     )
 
-    # Escreve os dados de cada veículo no arquivo CSV
-    for vehicle in vehicles:
-        csv_writer.writerow(
-            [
-                vehicle.id,
-                vehicle.type.value,
-                vehicle.brand,
-                vehicle.model,
-                vehicle.year,
-                vehicle.price_per_day,
-                vehicle.categoria.nome,
-                "Disponível" if vehicle.status else "Indisponível",
-                "Sim" if vehicle.in_maintenance else "Não",
-                vehicle.next_maintenance_date.strftime("%d/%m/%Y")
-                if vehicle.next_maintenance_date
-                else "",
-                vehicle.next_legalization_date.strftime("%d/%m/%Y")
-                if vehicle.next_legalization_date
-                else "",
-            ]
-        )
 
-    # Prepare a resposta com o conteúdo CSV
-    response = Response(csv_buffer.getvalue(), content_type="text/csv")
-    response.headers["Content-Disposition"] = "attachment; filename=vehicles.csv"
+def _reservation_filters():
+    """
+    Lê os filtros da exportação de reservas: (data de início de, até, status).
+    Lança ValueError se alguma data for inválida.
+    """
+    data_inicio = _parse_date(request.args.get("de"))
+    data_fim = _parse_date(request.args.get("ate"))
+    status = request.args.get("status")
+    if status not in RESERVATION_STATUSES:
+        status = None
+    return data_inicio, data_fim, status
 
-    # Fecha o buffer
-    csv_buffer.close()
 
-    return response
+def _parse_date(value):
+    """
+    Converte uma data aaaa-mm-dd do formulário (None se estiver vazia).
+    """
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%d").date()
 
 
 def export_excel():
     """
-    Exporta dados dos veículos para um arquivo Excel.
-    """
-    # Obtenha os dados dos veículos do banco de dados (substitua esta parte pelo seu código existente)
-    vehicles = Veiculo.query.all()
-
-    # Crie um DataFrame pandas com os dados dos veículos
-    data = {
-        "ID": [vehicle.id for vehicle in vehicles],
-        "Tipo": [vehicle.type.value for vehicle in vehicles],
-        "Marca": [vehicle.brand for vehicle in vehicles],
-        "Modelo": [vehicle.model for vehicle in vehicles],
-        "Ano": [vehicle.year for vehicle in vehicles],
-        "Diária (€)": [vehicle.price_per_day for vehicle in vehicles],
-        "Categoria": [vehicle.categoria.nome for vehicle in vehicles],
-        "Status": [
-            "Disponível" if vehicle.status else "Indisponível" for vehicle in vehicles
-        ],
-        "Em Manutenção": [
-            "Sim" if vehicle.in_maintenance else "Não" for vehicle in vehicles
-        ],
-        "Próxima Manutenção": [
-            vehicle.next_maintenance_date.strftime("%d/%m/%Y")
-            if vehicle.next_maintenance_date
-            else ""
-            for vehicle in vehicles
-        ],
-        "Próxima Legalização": [
-            vehicle.next_legalization_date.strftime("%d/%m/%Y")
-            if vehicle.next_legalization_date
-            else ""
-            for vehicle in vehicles
-        ],
-    }
-    df = pd.DataFrame(data)
-
-    # Crie um objeto BytesIO para armazenar o arquivo Excel
-    excel_output = BytesIO()
-
-    # Use o Pandas para escrever o DataFrame no arquivo Excel
-    df.to_excel(excel_output, index=False, engine="openpyxl", sheet_name="Veículos")
-
-    # Carregue o arquivo Excel criado
-    excel_output.seek(0)
-    wb = Workbook()
-    with BytesIO(excel_output.read()) as excel_read:
-        wb = load_workbook(excel_read)
-
-    # Acesse a planilha
-    ws = wb.active
-
-    # Estilize a planilha (você pode personalizar isso de acordo com suas necessidades)
-    header_font = Font(bold=True, color="FFFFFFFF")  # Fonte para cabeçalho
-    header_fill = PatternFill(
-        start_color="333333", end_color="333333", fill_type="solid"
-    )  # Cor de fundo para cabeçalho
-    cell_alignment = Alignment(
-        horizontal="center", vertical="center"
-    )  # Alinhamento das células
-
-    # Estilize o cabeçalho (primeira linha)
-    for cell in ws[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = cell_alignment
-
-    # Estilize o restante das células
-    for row in ws.iter_rows(min_row=2, max_row=len(vehicles) + 1):
-        for cell in row:
-            cell.alignment = cell_alignment
-
-    # Salve o arquivo Excel atualizado
-    excel_output = BytesIO()
-    wb.save(excel_output)
-
-    # Configurar a resposta HTTP para baixar o arquivo Excel
-    excel_output.seek(0)
-    response = make_response(excel_output.read())
-    response.headers[
-        "Content-Type"
-    ] = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    response.headers["Content-Disposition"] = "attachment; filename=veiculos.xlsx"
-
-    return response
+    Exporta dados para um arquivo Excel. Por omissão só a folha dos veículos;
+    com ?folhas=veiculos,reservas,clientes inclui também as outras folhas
+    (as reservas com os mesmos filtros da exportação CSV).
+    """
+    folhas = _export_sheets(request.args.get("folhas", "veiculos").split(","))
+
+    try:
+        data_inicio, data_fim, status = _reservation_filters()
+    except ValueError:
+        flash("Datas inválidas para a exportação de reservas.", "danger")
+        return redirect(url_for("admin_panel"))
+
+    sheets = []
+    for folha in folhas:
+        title, header, _, rows = export_sheet(
+            folha, data_inicio=data_inicio, data_fim=data_fim, status=status
+        )
+        sheets.append((title, header, rows))
+
+    filename = "veiculos.xlsx" if folhas == ["veiculos"] else "exportacao.xlsx"
+    return excel_response(filename, sheets)
+
+
+def _export_sheets(folhas):
+    """
+    Folhas pedidas que existem, pela ordem de EXPORT_SHEETS (só os veículos
+    se nenhuma for válida).
+    """
+    return [folha for folha in EXPORT_SHEETS if folha in folhas] or ["veiculos"]
+
+
+def submit_export():
+    """
+    Pede uma exportação em segundo plano. Devolve o identificador do trabalho
+    e os URLs para acompanhar o progresso e descarregar o ficheiro.
+    """
+    formato = request.form.get("formato", "excel")
+    folhas = _export_sheets(request.form.getlist("folhas"))
+    try:
+        data_inicio = _parse_date(request.form.get("de"))
+        data_fim = _parse_date(request.form.get("ate"))
+    except ValueError:
+        return jsonify({"erro": "Datas inválidas."}), 400
+    status = request.form.get("status")
+    if status not in RESERVATION_STATUSES:
+        status = None
+
+    filtros = {}
+    if "reservas" in folhas:
+        filtros.update(data_inicio=data_inicio, data_fim=data_fim, status=status)
+    if "clientes" in folhas:
+        filtros["categoria"] = request.form.get("categoria") or None
+
+    try:
+        job = export_queue.submit(formato, folhas, filtros)
+    except ValueError as error:
+        return jsonify({"erro": str(error)}), 400
+
+    return jsonify(_export_job_payload(job)), 202
+
+
+def export_status(job_id):
+    """
+    Progresso de um trabalho de exportação (consultado pelo painel).
+    """
+    job = export_queue.get(job_id)
+    if job is None:
+        return jsonify({"erro": "Exportação não encontrada."}), 404
+    return jsonify(_export_job_payload(job))
+
+
+def export_download(job_id):
+    """
+    Descarrega o ficheiro de um trabalho de exportação concluído.
+    """
+    job = export_queue.get(job_id)
+    if job is None or job.path is None or not os.path.exists(job.path):
+        flash("A exportação já não está disponível. Peça-a novamente.", "warning")
+        return redirect(url_for("admin_panel"))
+    return send_file(
+        job.path,
+        mimetype=job.content_type,
+        as_attachment=True,
+        download_name=job.filename,
+    )
+
+
+def _export_job_payload(job):
+    payload = job.to_dict()
+    payload["status_url"] = url_for("export_status", job_id=job.id)
+    payload["download_url"] = (
+        url_for("export_download", job_id=job.id) if job.path else None
+    )
+    return payload
+
+
+# Meses mostrados na tabela de receita do relatório
+REPORT_MONTHS = 12
+
+# Veículos mostrados nas listas de mais e menos utilizados
+REPORT_TOP_VEHICLES = 10
+
+UTILIZATION_PER_PAGE = 50
+
+
+def admin_reports():
+    """
+    Relatório de receita e utilização da frota, lido das tabelas calculadas
+    diariamente pelo scheduler (não recalcula nada).
+    """
+    today = date.today()
+    month = today.month - REPORT_MONTHS + 1
+    primeiro_mes = date(today.year + (month - 1) // 12, (month - 1) % 12 + 1, 1)
+
+    receitas = (
+        CategoryRevenue.query.filter(CategoryRevenue.month >= primeiro_mes)
+        .order_by(CategoryRevenue.month.desc(), CategoryRevenue.categoria)
+        .all()
+    )
+    totais = (
+        db.session.query(
+            CategoryRevenue.categoria,
+            func.sum(CategoryRevenue.reservations),
+            func.sum(CategoryRevenue.reserved_days),
+            func.sum(CategoryRevenue.revenue),
+        )
+        .group_by(CategoryRevenue.categoria)
+        .order_by(CategoryRevenue.categoria)
+        .all()
+    )
+    num_reservas = sum(reservas for _, reservas, _, _ in totais)
+    dias_reservados = sum(dias for _, _, dias, _ in totais)
+    ocupacao_media = db.session.query(func.avg(VehicleUtilization.occupancy)).scalar()
+
+    mais_utilizados = (
+        VehicleUtilization.query.order_by(
+            VehicleUtilization.occupancy.desc(), VehicleUtilization.vehicle_id.desc()
+        )
+        .limit(REPORT_TOP_VEHICLES)
+        .all()
+    )
+    menos_utilizados = (
+        VehicleUtilization.query.order_by(
+            VehicleUtilization.occupancy, VehicleUtilization.vehicle_id
+        )
+        .limit(REPORT_TOP_VEHICLES)
+        .all()
+    )
+
+    return render_template(
+        "admin_reports.html",
+        atualizado_em=reports_refreshed_at(),
+        janela=REPORT_WINDOW_DAYS,
+        receitas=receitas,
+        totais=totais,
+        duracao_media=dias_reservados / num_reservas if num_reservas else 0,
+        ocupacao_media=ocupacao_media or 0,
+        mais_utilizados=mais_utilizados,
+        menos_utilizados=menos_utilizados,
+    )
+
+
+def vehicle_utilization_report():
+    """
+    Ocupação de todos os veículos, da mais alta para a mais baixa, por páginas.
+    """
+    categoria = request.args.get("categoria") or None
+    query = VehicleUtilization.query
+    if categoria:
+        query = query.filter(VehicleUtilization.categoria == categoria)
+
+    vehicles, next_cursor = keyset_page(
+        query,
+        VehicleUtilization.occupancy,
+        VehicleUtilization.vehicle_id,
+        descending=True,
+        cursor=request.args.get("cursor"),
+        per_page=UTILIZATION_PER_PAGE,
+    )
+
+    parametros = {"categoria": categoria} if categoria else {}
+    return render_template(
+        "admin_vehicle_utilization.html",
+        vehicles=vehicles,
+        janela=REPORT_WINDOW_DAYS,
+        categoria=categoria,
+        categorias=Categoria.query.order_by(Categoria.nome).all(),
+        parametros=parametros,
+        next_cursor=next_cursor,
+        first_page=not request.args.get("cursor"),
+    )
+
+
+def refresh_reports_view():
+    """
+    Recalcula manualmente os relatórios (normalmente feito pelo scheduler).
+    """
+    rows = timed_sweep("reports", refresh_reports)
+    flash(f"Relatórios recalculados: {rows} linha(s).", "success")
+    return redirect(url_for("admin_reports"))
@@ -0,0 +1,191 @@
+import os
+from datetime import datetime
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select
+from models import (
+    db,
+    Veiculo,
+    VehicleType,
+    Cliente,
+    Reservation,
+    Categoria,
+    Watermark,
+)
+
+# Reservas lidas da base de dados e escritas no ficheiro de cada vez
+CHUNK_ROWS = 10000
+
+# Marca de água das exportações incrementais: data da última alteração
+# incluída na exportação anterior
+WATERMARK = "analytics_reservations"
+
+FORMATS = ["parquet", "arrow"]
+
+# Colunas com poucos valores diferentes são guardadas como dicionário
+# (o equivalente colunar de um enum)
+CATEGORY = pa.dictionary(pa.int16(), pa.string())
+
+SCHEMA = pa.schema(
+    [
+        ("reservation_id", pa.int64()),
+        ("status", CATEGORY),
+        ("start_date", pa.date32()),
+        ("start_time", pa.time64("us")),
+        ("end_date", pa.date32()),
+        ("end_time", pa.time64("us")),
+        ("duration", pa.int32()),
+        ("price", pa.float64()),
+        ("updated_at", pa.timestamp("us")),
+        ("vehicle_id", pa.int64()),
+        ("vehicle_type", CATEGORY),
+        ("brand", pa.string()),
+        ("model", pa.string()),
+        ("year", pa.int32()),
+        ("price_per_day", pa.float64()),
+        ("vehicle_category", CATEGORY),
+        ("customer_id", pa.int64()),
+        ("customer_segment", CATEGORY),
+    ]
+)
+
+
+def analytics_query(since=None, until=None):
+    """
+    Reservas com o veículo, a categoria do veículo e o segmento do cliente,
+    sem dados pessoais. Com since/until, só as reservas alteradas nesse
+    intervalo (since exclusivo, until inclusivo).
+    """
+    statement = (
+        select(
+            Reservation.id,
+            Reservation.status,
+            Reservation.start_date,
+            Reservation.start_time,
+            Reservation.end_date,
+            Reservation.end_time,
+            Reservation.duration,
+            Reservation.price,
+            Reservation.updated_at,
+            Veiculo.id,
+            Veiculo.type,
+            Veiculo.brand,
+            Veiculo.model,
+            Veiculo.year,
+            Veiculo.price_per_day,
+            Categoria.nome,
+            Cliente.id,
+            Cliente.categoria,
+        )
+        .join(Veiculo, Reservation.vehicle_id == Veiculo.id)
+        .join(Categoria, Veiculo.categoria_id == Categoria.id)
+        .join(Cliente, Reservation.customer_id == Cliente.id)
+        .order_by(Reservation.id)
+    )
+    if since is not None:
+        statement = statement.where(Reservation.updated_at > since)
+    if until is not None:
+        statement = statement.where(Reservation.updated_at <= until)
+    return statement
+
+
+def category_values():
+    """
+    Valores possíveis de cada coluna-dicionário. O dicionário é o mesmo em
+    todos os lotes (o formato Arrow IPC não permite que mude a meio do
+    ficheiro), por isso é lido antes das reservas.
+    """
+    return {
+        "status": list(db.session.scalars(select(Reservation.status).distinct())),
+        "vehicle_type": [tipo.value for tipo in VehicleType],
+        "vehicle_category": list(db.session.scalars(select(Categoria.nome))),
+        "customer_segment": list(
+            db.session.scalars(select(Cliente.categoria).distinct())
+        ),
+    }
+
+
+def record_batches(statement):
+    """
+    Converte o resultado da consulta em lotes Arrow de CHUNK_ROWS linhas,
+    coluna a coluna, sem ter a exportação inteira em memória.
+    """
+    dictionaries = {
+        name: (pa.array(values, pa.string()), {v: i for i, v in enumerate(values)})
+        for name, values in category_values().items()
+    }
+
+    result = db.session.execute(statement.execution_options(yield_per=CHUNK_ROWS))
+    for rows in result.partitions():
+        arrays = []
+        for values, field in zip(zip(*rows), SCHEMA):
+            if field.name not in dictionaries:
+                arrays.append(pa.array(values, type=field.type))
+                continue
+            dictionary, positions = dictionaries[field.name]
+            if field.name == "vehicle_type":
+                # O tipo do veículo vem da base de dados como Enum Python
+                values = [tipo.value for tipo in values]
+            indices = pa.array([positions.get(v) for v in values], pa.int16())
+            arrays.append(pa.DictionaryArray.from_arrays(indices, dictionary))
+        yield pa.RecordBatch.from_arrays(arrays, schema=SCHEMA)
+
+
+class _ArrowWriter:
+    """
+    Escreve lotes num ficheiro Arrow IPC (Feather v2), com a mesma interface
+    do ParquetWriter.
+    """
+
+    def __init__(self, path, schema):
+        self._sink = pa.OSFile(path, "wb")
+        self._writer = pa.ipc.new_file(
+            self._sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd")
+        )
+
+    def write_batch(self, batch):
+        self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+        self._sink.close()
+
+
+def _writer(path, formato):
+    if formato == "parquet":
+        return pq.ParquetWriter(path, SCHEMA, compression="zstd")
+    if formato == "arrow":
+        return _ArrowWriter(path, SCHEMA)
+    raise ValueError(f"Formato de exportação desconhecido: {formato}")
+
+
+def export_reservations(path, formato="parquet", full=False):
+    """
+    Exporta as reservas para um ficheiro colunar tipado (Parquet ou Arrow).
+
+    Por omissão a exportação é incremental: só inclui as reservas alteradas
+    desde a exportação anterior. Com full=True inclui todas. Em ambos os
+    casos a marca de água avança para o início desta exportação, e só depois
+    de o ficheiro estar completo. Devolve o número de reservas exportadas.
+    """
+    started = datetime.now()
+    since = None if full else Watermark.get(WATERMARK)
+    statement = analytics_query(since=since, until=started)
+
+    partial = f"{path}.part"
+    writer = _writer(partial, formato)
+    total = 0
+    try:
+        for batch in record_batches(statement):
+            writer.write_batch(batch)
+            total += batch.num_rows
+    except BaseException:
+        writer.close()
+        os.remove(partial)
+        raise
+    writer.close()
+    os.replace(partial, path)
+
+    Watermark.set(WATERMARK, started)
+    db.session.commit()
+    return total
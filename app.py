@@ -1,58 +1,97 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from flask_migrate import Migrate
-from apscheduler.schedulers.background import BackgroundScheduler
-import atexit
+import os
+from flask import Flask, request, redirect, url_for, session
 from models import db
-from config import Config
+from config import config_by_name, SQLITE_PROFILES
+from sqlite_profile import apply_sqlite_profile
 
-# Criação da aplicação Flask
-app = Flask(__name__)
 
-# A carregar as configurações Flask guardadas em config.py
-app.config.from_object(Config)
-
-# Inicialização do banco de dados
-db.init_app(app)
-migrate = Migrate(app, db)
-
-# Registrar as rotas do arquivo urls.py
-from urls import *
-
-# Importar a função para checar manutenção após o banco ter inicializado
-from admin_views import check_maintenance_status
-
-
-# Middleware: Verifica a sessão de administrador antes de acessar rotas específicas
-@app.before_request
 def check_admin_session():
     """
     Middleware para verificar se o usuário está autenticado como administrador
     antes de acessar rotas protegidas.
     """
     # Lista de rotas que requerem autenticação de administrador
-    admin_routes = ["/admin", "/add_vehicle", "/edit_vehicle/", "/delete_vehicle/"]
+    admin_routes = [
+        "/admin",
+        "/admin/availability",
+        "/admin/sweeps/maintenance",
+        "/admin/sweeps/reservations",
+        "/admin/reports",
+        "/admin/reports/vehicles",
+        "/admin/reports/refresh",
+        "/admin/events",
+        "/admin/jobs",
+        "/add_vehicle",
+        "/edit_vehicle/",
+        "/delete_vehicle/",
+        "/export_csv",
+        "/export_csv/clients",
+        "/export_csv/reservations",
+        "/export_excel",
+    ]
 
-    if request.path in admin_routes:
+    if request.path in admin_routes or request.path.startswith(
+        ("/admin/exports", "/set_cover_image/")
+    ):
         if "admin" not in session:
             return redirect(url_for("login"))
 
 
-# Criar um scheduler para executar tarefas em segundo plano
-scheduler = BackgroundScheduler()
-scheduler.start()
+def create_app(config_name=None, with_cli=True):
+    """
+    Cria a aplicação Flask.
+
+    Não abre ligações à base de dados nem cria threads: as tabelas são criadas
+    com flask create-db, os índices em memória são carregados no primeiro uso
+    e o scheduler só arranca no processo com BACKGROUND_SERVICES=1. Os workers
+    do servidor (wsgi.py) dispensam o Flask-Migrate e os comandos (with_cli).
+    """
+    # Criação da aplicação Flask
+    app = Flask(__name__)
+
+    # A carregar as configurações Flask guardadas em config.py, conforme o ambiente
+    config_name = config_name or os.environ.get("APP_ENV", "development")
+    app.config.from_object(config_by_name[config_name])
+
+    # Inicialização do banco de dados
+    db.init_app(app)
+
+    # Aplicar o perfil de desempenho do SQLite antes de abrir qualquer ligação
+    with app.app_context():
+        apply_sqlite_profile(db.engine, SQLITE_PROFILES[app.config["SQLITE_PROFILE"]])
+
+    # Variantes redimensionadas das imagens, usadas pelos templates
+    from images import image_pipeline
+
+    app.add_template_global(image_pipeline.sources, "image_sources")
+
+    # Registrar as rotas do arquivo urls.py e o Flask Login
+    from urls import register_urls
+    from views import login_manager
+
+    login_manager.init_app(app)
+    register_urls(app)
+
+    # Middleware: Verifica a sessão de administrador antes de acessar rotas específicas
+    app.before_request(check_admin_session)
+
+    # Registar as migrações e os comandos de linha de comando (flask ...)
+    if with_cli:
+        from flask_migrate import Migrate
+        from commands import register_commands
+
+        Migrate(app, db, render_as_batch=True)
+        register_commands(app)
+
+    # Tarefas periódicas, só no processo designado
+    if app.config["BACKGROUND_SERVICES"]:
+        from background import start_background_services
 
-# Agendar a função para ser executada diariamente à meia-noite (00:00)
-scheduler.add_job(
-    check_maintenance_status, "interval", days=1, start_date="2023-07-27 00:00:00"
-)
+        start_background_services(app)
 
-# Ao sair da aplicação, finalizar o scheduler
-atexit.register(lambda: scheduler.shutdown())
+    return app
 
-# Criação das tabelas do banco de dados
-with app.app_context():
-    db.create_all()
 
 # Executar a aplicação Flask com debug mode habilitado
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -0,0 +1,463 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from sqlalchemy import and_, exists, or_
+from sqlalchemy.orm import load_only
+from models import db, Veiculo, Reservation, Categoria
+from occupancy import occupancy_matrix
+from data_versions import FLEET, RESERVATIONS, read_versions
+
+# Colunas dos veículos mostradas no catálogo da página inicial
+CATALOG_COLUMNS = (
+    Veiculo.id,
+    Veiculo.type,
+    Veiculo.brand,
+    Veiculo.model,
+    Veiculo.year,
+    Veiculo.price_per_day,
+)
+
+
+def _as_date(value):
+    """
+    Normaliza datetime para date (as reservas novas podem trazer datetime).
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+class AvailabilityIndex:
+    """
+    Índice em memória das reservas ativas de cada veículo.
+
+    Para cada veículo guarda os intervalos ordenados pela data de início e o
+    máximo acumulado das datas de fim, o que permite responder a uma pergunta
+    de sobreposição com uma pesquisa binária, sem consultar a base de dados.
+    O índice é local ao processo; as escritas dos outros processos chegam
+    através de index_sync.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._starts = {}
+        self._intervals = {}
+        self._max_ends = {}
+        self._reservations = {}
+        self.loaded = False
+
+    def rebuild(self):
+        """
+        Reconstrói o índice a partir das reservas ativas da base de dados.
+        """
+        rows = db.session.query(
+            Reservation.id,
+            Reservation.vehicle_id,
+            Reservation.start_date,
+            Reservation.end_date,
+        ).filter(Reservation.status == "Ativa")
+
+        with self._lock:
+            self._starts = {}
+            self._intervals = {}
+            self._max_ends = {}
+            self._reservations = {}
+            by_vehicle = {}
+            for reservation_id, vehicle_id, start, end in rows:
+                self._reservations[reservation_id] = (vehicle_id, start, end)
+                by_vehicle.setdefault(vehicle_id, []).append(
+                    (start, end, reservation_id)
+                )
+            for vehicle_id, intervals in by_vehicle.items():
+                intervals.sort()
+                self._intervals[vehicle_id] = intervals
+                self._reindex(vehicle_id, 0)
+            self.loaded = True
+
+        return len(self._reservations)
+
+    def invalidate(self):
+        """
+        Marca o índice para ser reconstruído na próxima pesquisa.
+        """
+        with self._lock:
+            self.loaded = False
+
+    def _reindex(self, vehicle_id, position):
+        """
+        Atualiza as datas de início e o máximo acumulado a partir de position.
+        """
+        intervals = self._intervals[vehicle_id]
+        if not intervals:
+            del self._intervals[vehicle_id]
+            self._starts.pop(vehicle_id, None)
+            self._max_ends.pop(vehicle_id, None)
+            return
+
+        starts = self._starts.setdefault(vehicle_id, [])
+        max_ends = self._max_ends.setdefault(vehicle_id, [])
+        del starts[position:]
+        del max_ends[position:]
+        current = max_ends[-1] if max_ends else None
+        for start, end, _ in intervals[position:]:
+            current = end if current is None or end > current else current
+            starts.append(start)
+            max_ends.append(current)
+
+    def add(self, reservation):
+        """
+        Regista uma reserva ativa no índice.
+        """
+        if reservation.status != "Ativa":
+            return
+
+        vehicle_id = int(reservation.vehicle_id)
+        start = _as_date(reservation.start_date)
+        end = _as_date(reservation.end_date)
+
+        with self._lock:
+            if reservation.id in self._reservations:
+                self.remove(reservation.id)
+            self._reservations[reservation.id] = (vehicle_id, start, end)
+            intervals = self._intervals.setdefault(vehicle_id, [])
+            position = bisect_right(intervals, (start, end, reservation.id))
+            intervals.insert(position, (start, end, reservation.id))
+            self._reindex(vehicle_id, position)
+
+    def remove(self, reservation_id):
+        """
+        Retira uma reserva do índice (cancelada ou concluída).
+        """
+        with self._lock:
+            entry = self._reservations.pop(reservation_id, None)
+            if entry is None:
+                return
+            vehicle_id, start, end = entry
+            intervals = self._intervals[vehicle_id]
+            position = intervals.index((start, end, reservation_id))
+            del intervals[position]
+            self._reindex(vehicle_id, position)
+
+    def prune(self, before):
+        """
+        Retira as reservas que terminaram antes de uma data.
+        """
+        with self._lock:
+            expired = [
+                reservation_id
+                for reservation_id, (_, _, end) in self._reservations.items()
+                if end < before
+            ]
+            for reservation_id in expired:
+                self.remove(reservation_id)
+
+        return len(expired)
+
+    def has_conflict(self, vehicle_id, data_inicio, data_entrega):
+        """
+        Verifica se alguma reserva ativa do veículo se sobrepõe ao período.
+        """
+        data_inicio = _as_date(data_inicio)
+        data_entrega = _as_date(data_entrega)
+
+        with self._lock:
+            return self._overlaps(vehicle_id, data_inicio, data_entrega)
+
+    def busy_vehicles(self, data_inicio, data_entrega):
+        """
+        Conjunto dos veículos com alguma reserva ativa sobreposta ao período.
+        """
+        data_inicio = _as_date(data_inicio)
+        data_entrega = _as_date(data_entrega)
+
+        with self._lock:
+            return {
+                vehicle_id
+                for vehicle_id in self._starts
+                if self._overlaps(vehicle_id, data_inicio, data_entrega)
+            }
+
+    def _overlaps(self, vehicle_id, data_inicio, data_entrega):
+        starts = self._starts.get(vehicle_id)
+        if not starts:
+            return False
+        # Intervalos que começam antes da data de entrega; basta que o maior
+        # fim entre eles passe da data de início para haver sobreposição (o
+        # dia de entrega fica livre para uma nova recolha)
+        position = bisect_left(starts, data_entrega)
+        if position == 0:
+            return False
+        return self._max_ends[vehicle_id][position - 1] > data_inicio
+
+    def check_consistency(self):
+        """
+        Compara o índice com as reservas ativas da base de dados.
+        Devolve as diferenças encontradas (lista vazia se estiver consistente).
+        """
+        rows = db.session.query(
+            Reservation.id,
+            Reservation.vehicle_id,
+            Reservation.start_date,
+            Reservation.end_date,
+        ).filter(Reservation.status == "Ativa")
+        database = {
+            reservation_id: (vehicle_id, start, end)
+            for reservation_id, vehicle_id, start, end in rows
+        }
+
+        with self._lock:
+            indexed = dict(self._reservations)
+
+        problems = []
+        for reservation_id in sorted(database.keys() - indexed.keys()):
+            problems.append(f"Reserva {reservation_id} em falta no índice")
+        for reservation_id in sorted(indexed.keys() - database.keys()):
+            problems.append(f"Reserva {reservation_id} já não está ativa")
+        for reservation_id in sorted(database.keys() & indexed.keys()):
+            if database[reservation_id] != indexed[reservation_id]:
+                problems.append(f"Reserva {reservation_id} com datas diferentes")
+
+        return problems
+
+
+availability_index = AvailabilityIndex()
+
+
+def register_reservation(reservation):
+    """
+    Atualiza as estruturas em memória depois de uma reserva ser gravada.
+    """
+    availability_index.add(reservation)
+    occupancy_matrix.add(reservation)
+
+
+def release_reservation(reservation):
+    """
+    Atualiza as estruturas em memória depois de uma reserva ser cancelada.
+    """
+    availability_index.remove(reservation.id)
+    occupancy_matrix.remove(reservation)
+
+
+class IndexSync:
+    """
+    Mantém os índices em memória deste processo (disponibilidade, matriz de
+    ocupação e pesquisa de veículos) a par das escritas dos outros processos.
+
+    Lê os contadores de data_versions no máximo uma vez por CHECK_INTERVAL
+    segundos, para que as consultas ao índice (como as sugestões a cada
+    tecla) não dependam de uma leitura da base de dados. Se as reservas
+    mudaram, aplica aos índices as reservas alteradas desde a última leitura
+    (pela coluna updated_at); se mudaram os veículos ou foram apagadas
+    reservas, marca os índices para serem reconstruídos. As escritas deste
+    processo são aplicadas logo; as dos outros podem demorar até
+    CHECK_INTERVAL segundos (a reserva volta a verificar os conflitos na
+    base de dados).
+    """
+
+    CHECK_INTERVAL = 1.0
+
+    # Margem na leitura das reservas alteradas: uma transação pode gravar
+    # updated_at e só terminar depois de outra mais recente (à espera do
+    # bloqueio de escrita); aplicar de novo uma reserva não tem efeito
+    LOOKBACK = timedelta(seconds=60)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = None
+        self._since = None
+        self._checked = None
+
+    def reset(self):
+        """
+        Esquece os contadores lidos: a próxima verificação invalida todos os
+        índices (por exemplo, depois de mudar de base de dados).
+        """
+        with self._lock:
+            self._versions = None
+            self._checked = None
+
+    def refresh(self):
+        """
+        Verifica os contadores e atualiza os índices se outro processo (ou
+        este) escreveu desde a última verificação. Devolve o número de
+        reservas aplicadas, ou None se os índices foram invalidados.
+        """
+        now = time.monotonic()
+        checked = self._checked
+        if checked is not None and now - checked < self.CHECK_INTERVAL:
+            return 0
+        self._checked = now
+
+        versions = read_versions()
+        with self._lock:
+            previous = self._versions
+            if versions == previous:
+                return 0
+            self._versions = versions
+
+            if previous is None or versions.get(FLEET) != previous.get(FLEET):
+                # Os índices carregados depois daqui já incluem tudo o que
+                # foi gravado até agora
+                self._since = datetime.now()
+                # Importado aqui para evitar a importação circular com
+                # vehicle_search.py
+                from vehicle_search import vehicle_search_index
+
+                availability_index.invalidate()
+                occupancy_matrix.invalidate()
+                vehicle_search_index.invalidate()
+                return None
+
+            if versions.get(RESERVATIONS) == previous.get(RESERVATIONS):
+                return 0
+            rows = db.session.query(
+                Reservation.id,
+                Reservation.vehicle_id,
+                Reservation.status,
+                Reservation.start_date,
+                Reservation.end_date,
+                Reservation.updated_at,
+            ).filter(Reservation.updated_at > self._since - self.LOOKBACK)
+
+            applied = 0
+            for reservation in rows:
+                if reservation.status == "Ativa":
+                    register_reservation(reservation)
+                else:
+                    release_reservation(reservation)
+                self._since = max(self._since, reservation.updated_at)
+                applied += 1
+            return applied
+
+
+index_sync = IndexSync()
+
+
+def conflicting_reservations(data_inicio, data_entrega):
+    """
+    Condição de reservas ativas que se sobrepõem ao período selecionado.
+    Os períodos são [início, entrega): o dia de entrega de uma reserva fica
+    livre para uma nova recolha, e um período pode acabar no dia em que
+    outra reserva começa.
+    """
+    return and_(
+        Reservation.status == "Ativa",
+        Reservation.start_date < data_entrega,
+        Reservation.end_date > data_inicio,
+    )
+
+
+def available_from_condition(data_inicio):
+    """
+    Condição de veículos cuja data available_from não é posterior ao início.
+    """
+    return or_(
+        Veiculo.available_from == None,  # noqa: E711
+        Veiculo.available_from <= data_inicio,
+    )
+
+
+def available_vehicles_query(data_inicio, data_entrega, categoria="all"):
+    """
+    Consulta dos veículos livres entre data_inicio e data_entrega.
+    Usa um único NOT EXISTS sobre as reservas em vez de uma consulta por veículo.
+    """
+    query = Veiculo.query.filter(
+        Veiculo.status == True,  # noqa: E712
+        Veiculo.in_maintenance == False,  # noqa: E712
+        available_from_condition(data_inicio),
+        ~exists().where(
+            Reservation.vehicle_id == Veiculo.id,
+            conflicting_reservations(data_inicio, data_entrega),
+        ),
+    )
+
+    if categoria and categoria != "all":
+        query = query.join(Categoria).filter(Categoria.nome == categoria)
+
+    return query.order_by(Veiculo.id)
+
+
+def candidate_vehicles_query(data_inicio, categoria="all"):
+    """
+    Consulta dos veículos ativos, fora de manutenção e já disponíveis na data
+    de início, sem olhar para reservas.
+    """
+    query = Veiculo.query.filter(
+        Veiculo.status == True,  # noqa: E712
+        Veiculo.in_maintenance == False,  # noqa: E712
+        available_from_condition(data_inicio),
+    )
+
+    if categoria and categoria != "all":
+        query = query.join(Categoria).filter(Categoria.nome == categoria)
+
+    return query.order_by(Veiculo.id)
+
+
+def flexible_available_vehicles(data_inicio, data_entrega, flex_days, categoria="all"):
+    """
+    Devolve os veículos livres em pelo menos um dos períodos obtidos deslocando
+    as datas até flex_days dias, e os períodos livres de cada um.
+    """
+    index_sync.refresh()
+    periodos = occupancy_matrix.search(data_inicio, data_entrega, flex_days, categoria)
+    if not periodos:
+        return [], {}
+
+    veiculos = (
+        Veiculo.query.options(load_only(*CATALOG_COLUMNS))
+        .filter(Veiculo.id.in_(periodos))
+        .order_by(Veiculo.id)
+    )
+    return veiculos.all(), periodos
+
+
+def available_vehicles(data_inicio, data_entrega, categoria="all"):
+    """
+    Devolve a lista de veículos livres entre data_inicio e data_entrega, só
+    com as colunas mostradas no catálogo (CATALOG_COLUMNS).
+    O índice em memória é carregado na primeira pesquisa de cada processo;
+    depois disso só são lidas as reservas alteradas por outros processos.
+    Os veículos ocupados no período, obtidos do índice, são excluídos na
+    própria consulta.
+    """
+    index_sync.refresh()
+    if not availability_index.loaded:
+        availability_index.rebuild()
+
+    query = candidate_vehicles_query(data_inicio, categoria).options(
+        load_only(*CATALOG_COLUMNS)
+    )
+    busy = availability_index.busy_vehicles(data_inicio, data_entrega)
+    if busy:
+        query = query.filter(Veiculo.id.not_in(busy))
+    return query.all()
+
+
+def is_vehicle_available(veiculo, data_inicio, data_entrega):
+    """
+    Verifica se um veículo está disponível durante um período selecionado.
+    """
+    if veiculo.in_maintenance:
+        return False
+
+    if veiculo.available_from and veiculo.available_from > _as_date(data_inicio):
+        return False
+
+    index_sync.refresh()
+    if availability_index.loaded:
+        return not availability_index.has_conflict(
+            veiculo.id, data_inicio, data_entrega
+        )
+
+    conflito = db.session.query(
+        exists().where(
+            Reservation.vehicle_id == veiculo.id,
+            conflicting_reservations(data_inicio, data_entrega),
+        )
+    ).scalar()
+
+    return not conflito
@@ -0,0 +1,187 @@
+import atexit
+import os
+import socket
+import time as timer
+from datetime import datetime, timedelta
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from models import db, JobRun, SchedulerLease
+from sweeps import (
+    alerts_are_stale,
+    refresh_vehicle_alerts,
+    run_maintenance_sweep,
+    run_reservation_sweep,
+    timed_sweep,
+)
+from reports import refresh_reports
+
+# Nome da concessão disputada pelos processos com o scheduler
+LEASE_NAME = "scheduler"
+
+# Tarefas periódicas: (nome, função, hora da primeira execução), repetidas
+# diariamente. O varrimento de manutenção e o das reservas concluídas correm à
+# meia-noite; os alertas do painel e os relatórios são recalculados depois.
+JOBS = [
+    ("maintenance", run_maintenance_sweep, "2023-07-27 00:00:00"),
+    ("reservations", run_reservation_sweep, "2023-07-27 00:00:00"),
+    ("alerts", refresh_vehicle_alerts, "2023-07-27 00:05:00"),
+    ("reports", refresh_reports, "2023-07-27 00:10:00"),
+]
+
+
+def process_id():
+    """
+    Identificação deste processo na concessão e no histórico das tarefas.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_lease(holder, ttl):
+    """
+    Obtém ou renova a concessão do scheduler. Devolve True se o processo
+    ficou com ela (é o líder) e False se outro processo a tem e ainda não
+    expirou.
+    """
+    now = datetime.now()
+    expires_at = now + timedelta(seconds=ttl)
+    result = db.session.execute(
+        update(SchedulerLease)
+        .where(
+            SchedulerLease.name == LEASE_NAME,
+            or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now),
+        )
+        .values(holder=holder, expires_at=expires_at)
+    )
+    if result.rowcount:
+        db.session.commit()
+        return True
+
+    # Sem linha atualizada: a concessão não existe ou pertence a outro processo
+    db.session.add(
+        SchedulerLease(name=LEASE_NAME, holder=holder, expires_at=expires_at)
+    )
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    return True
+
+
+def release_lease(holder):
+    """
+    Liberta a concessão deste processo, para outro processo ficar com ela
+    sem esperar que expire.
+    """
+    db.session.execute(
+        update(SchedulerLease)
+        .where(SchedulerLease.name == LEASE_NAME, SchedulerLease.holder == holder)
+        .values(expires_at=datetime.now())
+    )
+    db.session.commit()
+
+
+def run_job(app, name, func):
+    """
+    Corre uma tarefa num contexto da aplicação, só se este processo for o
+    líder, e regista a execução em job_runs. Devolve as linhas alteradas
+    (None se a tarefa não correu ou falhou).
+    """
+    holder = process_id()
+    with app.app_context():
+        if not acquire_lease(holder, app.config["SCHEDULER_LEASE_TTL"]):
+            return None
+
+        run = JobRun(name=name, holder=holder, started_at=datetime.now())
+        start = timer.perf_counter()
+        try:
+            run.rows = timed_sweep(name, func)
+            run.status = JobRun.SUCCESS
+        except Exception as error:
+            db.session.rollback()
+            app.logger.exception("Tarefa %s falhou", name)
+            run.status = JobRun.FAILED
+            run.error = f"{type(error).__name__}: {error}"
+        run.duration_ms = round((timer.perf_counter() - start) * 1000, 2)
+        db.session.add(run)
+        db.session.commit()
+        return run.rows
+
+
+def renew_lease(app):
+    """
+    Tarefa do scheduler: renova a concessão do líder (ou fica com ela, se o
+    líder deixou de a renovar).
+    """
+    with app.app_context():
+        acquire_lease(process_id(), app.config["SCHEDULER_LEASE_TTL"])
+
+
+def build_scheduler(app, blocking=False):
+    """
+    Cria o scheduler com as tarefas periódicas da aplicação e a renovação
+    da concessão. Todos os processos com o scheduler disputam a concessão,
+    mas só o líder corre as tarefas.
+    """
+    if blocking:
+        from apscheduler.schedulers.blocking import BlockingScheduler
+
+        scheduler = BlockingScheduler()
+    else:
+        from apscheduler.schedulers.background import BackgroundScheduler
+
+        scheduler = BackgroundScheduler()
+
+    for name, func, start_date in JOBS:
+        scheduler.add_job(
+            run_job,
+            "interval",
+            days=1,
+            start_date=start_date,
+            args=[app, name, func],
+            id=name,
+        )
+    scheduler.add_job(
+        renew_lease,
+        "interval",
+        seconds=app.config["SCHEDULER_LEASE_RENEW"],
+        args=[app],
+        id="lease",
+        next_run_time=datetime.now(),
+    )
+    return scheduler
+
+
+def refresh_stale_alerts(app):
+    """
+    Calcula os alertas do painel se ainda não foram calculados hoje.
+    """
+    with app.app_context():
+        stale = alerts_are_stale()
+    if stale:
+        run_job(app, "alerts", refresh_vehicle_alerts)
+
+
+def stop_scheduler(app, scheduler):
+    """
+    Finaliza o scheduler e liberta a concessão deste processo.
+    """
+    if scheduler.running:
+        scheduler.shutdown()
+    with app.app_context():
+        release_lease(process_id())
+
+
+def start_background_services(app):
+    """
+    Arranca o scheduler numa thread deste processo (com
+    BACKGROUND_SERVICES=1). Pode ser ativado em vários workers: a concessão
+    garante que cada tarefa corre num só processo.
+    """
+    refresh_stale_alerts(app)
+    scheduler = build_scheduler(app)
+    scheduler.start()
+
+    # Ao sair da aplicação, finalizar o scheduler
+    atexit.register(stop_scheduler, app, scheduler)
+    return scheduler
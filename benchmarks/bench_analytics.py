@@ -0,0 +1,169 @@
+"""
+Benchmark da exportação de reservas para análise de dados.
+
+Compara a extração com o pandas (read_sql da consulta inteira e to_csv) com
+a exportação colunar por lotes de analytics_export.py, em Parquet e Arrow,
+e com uma exportação incremental depois de alterar 1% das reservas. Cada
+exportação corre num processo à parte para medir quanto faz subir o pico de
+memória residente (RSS); mede-se também o tamanho do ficheiro e o tempo que
+o analista leva a carregá-lo num DataFrame.
+
+Uso: python benchmarks/bench_analytics.py [--sizes 1000,10000,50000]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import seed_clients, seed_reservations, seed_vehicles, setup_app
+
+VARIANTS = ["csv (pandas)", "parquet", "arrow", "incremental (1%)"]
+
+
+def pandas_export(path):
+    """
+    Extração com o pandas: a consulta inteira num DataFrame, escrito em CSV.
+    """
+    import pandas as pd
+    from models import db
+    from analytics_export import analytics_query
+
+    with db.engine.connect() as connection:
+        df = pd.read_sql(analytics_query(), connection)
+    df.to_csv(path, index=False)
+    return len(df)
+
+
+def read_back(path):
+    """
+    Carrega o ficheiro exportado num DataFrame, como faria o analista.
+    """
+    import pandas as pd
+    import pyarrow.feather as feather
+
+    if path.endswith(".csv"):
+        return len(pd.read_csv(path))
+    if path.endswith(".arrow"):
+        return len(feather.read_table(path).to_pandas())
+    return len(pd.read_parquet(path))
+
+
+def run_variant(variant, directory):
+    """
+    Executa uma exportação neste processo e imprime o resultado em JSON.
+    """
+    app = setup_app()
+    with app.app_context():
+        from models import db, Reservation
+        from analytics_export import export_reservations
+
+        Reservation.query.first()
+        if variant == "incremental (1%)":
+            export_reservations(os.path.join(directory, "base.parquet"), full=True)
+            # Só o updated_at muda: as reservas passam a ter alterações
+            total = Reservation.query.count()
+            db.session.execute(
+                db.update(Reservation)
+                .where(Reservation.id % 100 == 0)
+                .values(price=Reservation.price)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+
+        extension = {"csv (pandas)": "csv", "arrow": "arrow"}.get(variant, "parquet")
+        path = os.path.join(directory, f"export.{extension}")
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        if variant == "csv (pandas)":
+            rows = pandas_export(path)
+        else:
+            rows = export_reservations(
+                path, extension, full=variant != "incremental (1%)"
+            )
+        elapsed = (time.perf_counter() - start) * 1000
+        after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        if variant == "incremental (1%)":
+            assert rows < total
+
+    start = time.perf_counter()
+    read_back(path)
+    read_ms = (time.perf_counter() - start) * 1000
+
+    print(
+        json.dumps(
+            {
+                "rows": rows,
+                "ms": elapsed,
+                "rss_mb": (after - before) / 1024,
+                "kb": os.path.getsize(path) / 1024,
+                "read_ms": read_ms,
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--reservations-per-vehicle", type=int, default=4)
+    parser.add_argument("--variant", help=argparse.SUPPRESS)
+    parser.add_argument("--directory", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        run_variant(args.variant, args.directory)
+        return
+
+    app = setup_app()
+    from models import db, Veiculo, Cliente
+
+    directory = tempfile.mkdtemp(prefix="bench_analytics_")
+    print(
+        f"{'veículos':>8} {'exportação':>18} {'linhas':>8} {'ms':>8} "
+        f"{'+RSS MB':>8} {'KB':>8} {'leitura ms':>10}"
+    )
+    for size in [int(s) for s in args.sizes.split(",")]:
+        with app.app_context():
+            atual = Veiculo.query.count()
+            if size > atual:
+                seed_vehicles(size - atual)
+                novos = [
+                    v
+                    for (v,) in db.session.query(Veiculo.id).filter(Veiculo.id > atual)
+                ]
+                seed_reservations(args.reservations_per_vehicle, vehicle_ids=novos)
+            clientes = Cliente.query.count()
+            if size // 10 > clientes:
+                seed_clients(size // 10 - clientes, offset=clientes)
+
+        for variant in VARIANTS:
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    os.path.abspath(__file__),
+                    "--variant",
+                    variant,
+                    "--directory",
+                    directory,
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+                env=os.environ,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{size:>8} {variant:>18} {result['rows']:>8} {result['ms']:>8.0f} "
+                f"{result['rss_mb']:>8.1f} {result['kb']:>8.0f} "
+                f"{result['read_ms']:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark da pesquisa de disponibilidade da página inicial.
+
+Compara o ciclo antigo (uma consulta de reservas por veículo) com a consulta
+NOT EXISTS e com o índice em memória de availability.py, reportando o número
+de consultas e a latência para vários tamanhos de frota.
+
+Uso: python benchmarks/bench_availability.py [--sizes 100,1000,5000]
+"""
+
+import argparse
+from datetime import date, timedelta
+
+from common import QueryCounter, seed_reservations, seed_vehicles, setup_app, timed
+
+
+def legacy_available_vehicles(data_inicio, data_entrega):
+    """
+    Reprodução do ciclo original de views.index, para comparação.
+    """
+    from models import Veiculo, Reservation
+
+    veiculos = Veiculo.query.filter_by(status=1).all()
+    disponiveis = []
+    for veiculo in veiculos:
+        if veiculo.in_maintenance:
+            continue
+        conflitos = Reservation.query.filter(
+            Reservation.vehicle_id == veiculo.id,
+            Reservation.status == "Ativa",
+            Reservation.start_date < data_entrega,
+            Reservation.end_date > data_inicio,
+        ).all()
+        if not conflitos:
+            disponiveis.append(veiculo)
+    return disponiveis
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="100,1000,5000")
+    parser.add_argument("--reservations-per-vehicle", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = setup_app()
+    from models import db, Veiculo
+    from availability import available_vehicles, available_vehicles_query
+
+    data_inicio = date.today() + timedelta(days=7)
+    data_entrega = data_inicio + timedelta(days=3)
+
+    print(f"{'frota':>8} {'método':>10} {'consultas':>10} {'ms':>10} {'livres':>8}")
+    with app.app_context():
+        for size in [int(s) for s in args.sizes.split(",")]:
+            atual = Veiculo.query.count()
+            if size > atual:
+                seed_vehicles(size - atual)
+                novos = [
+                    v
+                    for (v,) in db.session.query(Veiculo.id).filter(Veiculo.id > atual)
+                ]
+                seed_reservations(args.reservations_per_vehicle, vehicle_ids=novos)
+
+            metodos = {
+                "legado": lambda: legacy_available_vehicles(data_inicio, data_entrega),
+                "set-based": lambda: available_vehicles_query(
+                    data_inicio, data_entrega
+                ).all(),
+                "índice": lambda: available_vehicles(data_inicio, data_entrega),
+            }
+            resultados = {}
+            for nome, func in metodos.items():
+                db.session.expire_all()
+                with QueryCounter(db.engine) as counter:
+                    resultados[nome] = {v.id for v in func()}
+                ms = timed(lambda: (db.session.expire_all(), func()), args.repeat)
+                print(
+                    f"{size:>8} {nome:>10} {counter.count:>10} {ms:>10.2f} "
+                    f"{len(resultados[nome]):>8}"
+                )
+
+            assert resultados["legado"] == resultados["set-based"]
+            assert resultados["legado"] == resultados["índice"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Teste de carga do motor de reservas: N reservas concorrentes para um só veículo.
+
+Várias threads tentam reservar o mesmo veículo em períodos que se sobrepõem.
+No fim verifica-se que não existe nenhuma sobreposição entre reservas ativas
+e reporta-se o débito (reservas/segundo), conflitos, novas tentativas e o
+tempo de espera pelo bloqueio de escrita.
+
+Uso: python benchmarks/bench_booking.py [--threads 8] [--attempts 200]
+"""
+
+import argparse
+import random
+import threading
+import time
+from datetime import date, time as dtime, timedelta
+
+from common import seed_clients, seed_vehicles, setup_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--attempts", type=int, default=200)
+    parser.add_argument("--window-days", type=int, default=60)
+    args = parser.parse_args()
+
+    app = setup_app()
+    from sqlalchemy import text
+    from models import db, Veiculo, Cliente
+    from booking import BookingConflict, book_vehicle, booking_metrics
+
+    with app.app_context():
+        if not Veiculo.query.count():
+            seed_vehicles(1)
+        if Cliente.query.count() < args.threads:
+            seed_clients(args.threads, offset=Cliente.query.count())
+        vehicle_id = Veiculo.query.first().id
+        client_ids = [c for (c,) in db.session.query(Cliente.id)]
+
+    start_base = date.today() + timedelta(days=30)
+    per_thread = args.attempts // args.threads
+    errors = []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        with app.app_context():
+            for _ in range(per_thread):
+                duracao = rng.randint(1, 5)
+                inicio = start_base + timedelta(days=rng.randint(0, args.window_days))
+                try:
+                    book_vehicle(
+                        customer_id=rng.choice(client_ids),
+                        vehicle_id=vehicle_id,
+                        start_date=inicio,
+                        start_time=dtime(10, 0),
+                        duration=duracao,
+                        price=duracao * 50.0,
+                    )
+                except BookingConflict:
+                    pass
+                except Exception as error:
+                    errors.append(error)
+            db.session.remove()
+
+    threads = [
+        threading.Thread(target=worker, args=(seed,)) for seed in range(args.threads)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        overlaps = db.session.execute(
+            text(
+                "SELECT COUNT(*) FROM reservation a JOIN reservation b "
+                "ON a.fk_reservation_vehicle = b.fk_reservation_vehicle "
+                "AND a.id < b.id "
+                "AND a.status = 'Ativa' AND b.status = 'Ativa' "
+                "AND a.start_date < b.end_date AND a.end_date > b.start_date "
+                "WHERE a.fk_reservation_vehicle = :vehicle_id"
+            ),
+            {"vehicle_id": vehicle_id},
+        ).scalar()
+
+    tentativas = per_thread * args.threads
+    print(f"threads: {args.threads}  tentativas: {tentativas}  tempo: {elapsed:.2f}s")
+    print(f"reservas criadas: {booking_metrics['bookings']}")
+    print(f"conflitos: {booking_metrics['conflicts']}")
+    print(f"novas tentativas (busy): {booking_metrics['retries']}")
+    print(f"falhas: {booking_metrics['failures']}  erros: {len(errors)}")
+    print(f"tentativas/s: {tentativas / elapsed:.1f}")
+    print(f"reservas/s: {booking_metrics['bookings'] / elapsed:.1f}")
+    atendidas = booking_metrics["bookings"] + booking_metrics["conflicts"]
+    if atendidas:
+        media = booking_metrics["lock_wait_ms_total"] / atendidas
+        print(f"espera pelo bloqueio: média {media:.2f} ms", end="")
+        print(f", máximo {booking_metrics['lock_wait_ms_max']:.2f} ms")
+    print(f"sobreposições: {overlaps}")
+
+    assert overlaps == 0, f"{overlaps} reservas sobrepostas"
+    assert not errors, errors[0]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark da pesquisa de clientes da lista de administração.
+
+Compara uma pesquisa LIKE '%texto%' sobre nome, apelido, email, telefone e
+NIF (que lê a tabela inteira) com a pesquisa por prefixo no índice FTS5 de
+client_search.py, para a primeira página de resultados.
+
+Uso: python benchmarks/bench_client_search.py [--clients 100000]
+"""
+
+import argparse
+
+from common import seed_clients, setup_app, timed
+
+TERMOS = ["Cliente4242", "Apelido99", "cliente777@exemplo", "912345", "100054321"]
+
+
+def like_search(termo, limit):
+    """
+    Pesquisa por LIKE em todas as colunas, como um Ctrl-F feito na base de dados.
+    """
+    from sqlalchemy import String, cast, or_
+    from models import Cliente
+
+    padrao = f"%{termo}%"
+    return (
+        Cliente.query.filter(
+            or_(
+                Cliente.nome.like(padrao),
+                Cliente.apelido.like(padrao),
+                Cliente.email.like(padrao),
+                Cliente.telefone.like(padrao),
+                cast(Cliente.nif, String).like(padrao),
+            )
+        )
+        .order_by(Cliente.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def fts_search(termo, limit):
+    """
+    Pesquisa por prefixo no índice de texto integral.
+    """
+    from models import Cliente
+    from client_search import search_condition
+
+    return (
+        Cliente.query.filter(search_condition(termo))
+        .order_by(Cliente.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    app = setup_app()
+    from models import db, Cliente
+
+    print(f"{'termo':>20} {'método':>6} {'ms':>10} {'resultados':>10}")
+    with app.app_context():
+        atual = Cliente.query.count()
+        if args.clients > atual:
+            seed_clients(args.clients - atual, offset=atual)
+        db.session.execute(db.text("ANALYZE"))
+
+        for termo in TERMOS:
+            for nome, func in [("like", like_search), ("fts", fts_search)]:
+                resultados = func(termo, args.limit)
+                ms = timed(lambda: func(termo, args.limit), args.repeat)
+                print(f"{termo:>20} {nome:>6} {ms:>10.2f} {len(resultados):>10}")
+
+
+if __name__ == "__main__":
+    main()
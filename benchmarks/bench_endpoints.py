@@ -0,0 +1,282 @@
+"""
+Benchmark de ponta a ponta dos caminhos principais da aplicação.
+
+Preenche uma base de dados temporária com o gerador de flask seed (frota,
+clientes e histórico de reservas das três categorias) e percorre, com o
+cliente de testes do Flask, a página inicial, a reserva e o pagamento, as
+reservas do cliente, o painel de administração e as exportações. Para cada
+cenário mostra os percentis da latência, as consultas SQL por pedido e o pico
+de memória Python (tracemalloc) de um pedido. Com --json os resultados ficam
+num ficheiro que pode ser comparado com os de outro commit (--compare).
+
+Uso: python benchmarks/bench_endpoints.py [--vehicles 2000] [--clients 5000]
+     [--requests 50] [--json depois.json] [--compare antes.json]
+"""
+
+import argparse
+import itertools
+import json
+import resource
+import subprocess
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from common import ROOT, QueryCounter, percentile, setup_app
+
+
+def git_commit():
+    """
+    Commit atual do repositório (None fora de um repositório git).
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare(args):
+    """
+    Gera os dados (se a base de dados estiver vazia) e escolhe o cliente com
+    mais reservas e um veículo livre da sua categoria para as reservas.
+    """
+    from sqlalchemy import func
+    from models import db, Categoria, Cliente, Reservation, Veiculo
+    from reports import refresh_reports
+    from seed import seed_database
+    from sweeps import refresh_vehicle_alerts
+
+    if Veiculo.query.count() == 0:
+        start = time.perf_counter()
+        counts = seed_database(
+            args.vehicles, args.clients, args.history_days, args.future_days
+        )
+        refresh_vehicle_alerts()
+        refresh_reports()
+        print(
+            f"dados gerados em {time.perf_counter() - start:.1f} s: "
+            f"{counts['veiculos']} veículos, {counts['clientes']} clientes, "
+            f"{counts['reservas']} reservas"
+        )
+
+    customer_id, email, categoria = (
+        db.session.query(Cliente.id, Cliente.email, Cliente.categoria)
+        .join(Reservation, Reservation.customer_id == Cliente.id)
+        .group_by(Cliente.id)
+        .order_by(func.count(Reservation.id).desc())
+        .first()
+    )
+    vehicle_id = (
+        db.session.query(Veiculo.id)
+        .join(Categoria)
+        .filter(
+            Categoria.nome == categoria,
+            Veiculo.status.is_(True),
+            Veiculo.in_maintenance.is_(False),
+        )
+        .order_by(Veiculo.id)
+        .limit(1)
+        .scalar()
+    )
+    reservas = Reservation.query.filter_by(customer_id=customer_id).count()
+    print(f"cliente {email} ({categoria}, {reservas} reservas), veículo {vehicle_id}")
+    return email, vehicle_id
+
+
+def scenarios(app, email, vehicle_id, future_days):
+    """
+    Cenários: (nome, função que faz o i-ésimo pedido, estados aceites).
+    """
+    anonimo = app.test_client()
+    cliente = app.test_client()
+    cliente.post("/client_login", data={"email": email, "password": "password123"})
+    admin = app.test_client()
+    with admin.session_transaction() as session:
+        session["admin"] = True
+
+    inicio = date.today() + timedelta(days=7)
+    datas = {"data_inicio": inicio, "data_entrega": inicio + timedelta(days=3)}
+    # Cada pagamento reserva um período novo, depois das reservas geradas
+    livre = date.today() + timedelta(days=future_days + 30)
+
+    def reserva(i):
+        return {
+            "veiculo_id": vehicle_id,
+            "data_recolha": (livre + timedelta(days=3 * i)).isoformat(),
+            "hora_recolha": "10:00",
+            "duracao": "2",
+            "payment_method": "mbway",
+        }
+
+    return [
+        ("index", lambda i: anonimo.get("/"), {200}),
+        ("index (datas)", lambda i: anonimo.get("/", query_string=datas), {200}),
+        ("index (cliente)", lambda i: cliente.get("/", query_string=datas), {200}),
+        ("reserve GET", lambda i: cliente.get(f"/reserve/{vehicle_id}"), {200}),
+        (
+            "reserve POST",
+            lambda i: cliente.post(f"/reserve/{vehicle_id}", data=reserva(i)),
+            {200},
+        ),
+        (
+            "complete_payment",
+            lambda i: cliente.post("/complete_payment", data=reserva(i)),
+            {302},
+        ),
+        ("client_reservations", lambda i: cliente.get("/client_reservations"), {200}),
+        ("admin_panel", lambda i: admin.get("/admin"), {200}),
+        ("export_csv", lambda i: admin.get("/export_csv"), {200}),
+        (
+            "export_csv reservas",
+            lambda i: admin.get("/export_csv/reservations"),
+            {200},
+        ),
+        ("export_excel", lambda i: admin.get("/export_excel"), {200}),
+    ]
+
+
+def measure(engine, request, accepted, counter, requests, warmup):
+    """
+    Faz os pedidos de um cenário (o corpo da resposta é lido por inteiro) e
+    devolve as latências, as consultas por pedido e o pico de memória de um
+    pedido à parte, com tracemalloc.
+    """
+
+    def call():
+        response = request(next(counter))
+        response.get_data()
+        if response.status_code not in accepted:
+            raise AssertionError(f"resposta {response.status_code} inesperada")
+
+    for _ in range(warmup):
+        call()
+
+    samples = []
+    queries = []
+    for _ in range(requests):
+        with QueryCounter(engine) as queries_counter:
+            start = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - start) * 1000)
+        queries.append(queries_counter.count)
+
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "requests": requests,
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p90_ms": round(percentile(samples, 90), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "max_ms": round(max(samples), 3),
+        "queries": round(sum(queries) / len(queries), 2),
+        "max_queries": max(queries),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def change(before, after):
+    """
+    Variação percentual entre dois valores, formatada.
+    """
+    if not before:
+        return "-"
+    return f"{(after - before) / before * 100:+.0f}%"
+
+
+def compare(results, path):
+    """
+    Mostra a variação de cada cenário face aos resultados guardados em path.
+    """
+    with open(path) as file:
+        previous = json.load(file)
+    print()
+    print(f"comparação com {path} (commit {previous.get('commit')}):")
+    print(f"{'cenário':>20} {'p50':>7} {'p99':>7} {'consultas':>12} {'memória':>8}")
+    for nome, atual in results.items():
+        antes = previous["results"].get(nome)
+        if antes is None:
+            print(f"{nome:>20} (novo)")
+            continue
+        consultas = f"{antes['queries']:g}→{atual['queries']:g}"
+        print(
+            f"{nome:>20} {change(antes['p50_ms'], atual['p50_ms']):>7} "
+            f"{change(antes['p99_ms'], atual['p99_ms']):>7} {consultas:>12} "
+            f"{change(antes['peak_kib'], atual['peak_kib']):>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vehicles", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--history-days", type=int, default=365)
+    parser.add_argument("--future-days", type=int, default=90)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--export-requests", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--json", help="Ficheiro onde guardar os resultados.")
+    parser.add_argument("--compare", help="Resultados anteriores a comparar.")
+    args = parser.parse_args()
+
+    app = setup_app()
+    app.config["TESTING"] = True
+    from models import db
+
+    with app.app_context():
+        email, vehicle_id = prepare(args)
+        engine = db.engine
+
+    print()
+    print(
+        f"{'cenário':>20} {'pedidos':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+        f"{'máx ms':>8} {'consultas':>9} {'pico KiB':>9}"
+    )
+    results = {}
+    for nome, request, accepted in scenarios(app, email, vehicle_id, args.future_days):
+        requests = args.export_requests if nome.startswith("export") else args.requests
+        result = measure(
+            engine, request, accepted, itertools.count(), requests, args.warmup
+        )
+        results[nome] = result
+        print(
+            f"{nome:>20} {requests:>7} {result['p50_ms']:>8.2f} "
+            f"{result['p90_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+            f"{result['max_ms']:>8.2f} {result['queries']:>9g} "
+            f"{result['peak_kib']:>9.0f}"
+        )
+
+    # ru_maxrss está em KiB no Linux
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print()
+    print(f"pico de memória residente do processo: {rss / 1024:.0f} MiB")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(
+                {
+                    "commit": git_commit(),
+                    "date": datetime.now().isoformat(timespec="seconds"),
+                    "params": vars(args),
+                    "max_rss_kib": rss,
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+        print(f"resultados guardados em {args.json}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmark da exportação Excel do painel de administração.
+
+Compara a exportação antiga (listas por coluna, DataFrame do pandas, xlsx
+escrito, lido de novo com load_workbook, estilizado célula a célula e
+gravado outra vez) com o motor write-only de exports.py. Cada exportação
+corre num processo à parte para medir quanto a exportação faz subir o pico
+de memória residente (RSS) já atingido no arranque, além do tempo total.
+
+Uso: python benchmarks/bench_excel.py [--sizes 1000,10000,50000]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from common import seed_clients, seed_reservations, seed_vehicles, setup_app
+
+
+def legacy_export_excel():
+    """
+    Reprodução da exportação original de admin_views.export_excel.
+    """
+    from io import BytesIO
+    import pandas as pd
+    from openpyxl import load_workbook
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from models import Veiculo
+
+    vehicles = Veiculo.query.all()
+    data = {
+        "ID": [vehicle.id for vehicle in vehicles],
+        "Tipo": [vehicle.type.value for vehicle in vehicles],
+        "Marca": [vehicle.brand for vehicle in vehicles],
+        "Modelo": [vehicle.model for vehicle in vehicles],
+        "Ano": [vehicle.year for vehicle in vehicles],
+        "Diária (€)": [vehicle.price_per_day for vehicle in vehicles],
+        "Categoria": [vehicle.categoria.nome for vehicle in vehicles],
+        "Status": [
+            "Disponível" if vehicle.status else "Indisponível" for vehicle in vehicles
+        ],
+        "Em Manutenção": [
+            "Sim" if vehicle.in_maintenance else "Não" for vehicle in vehicles
+        ],
+        "Próxima Manutenção": [
+            (
+                vehicle.next_maintenance_date.strftime("%d/%m/%Y")
+                if vehicle.next_maintenance_date
+                else ""
+            )
+            for vehicle in vehicles
+        ],
+        "Próxima Legalização": [
+            (
+                vehicle.next_legalization_date.strftime("%d/%m/%Y")
+                if vehicle.next_legalization_date
+                else ""
+            )
+            for vehicle in vehicles
+        ],
+    }
+    df = pd.DataFrame(data)
+    excel_output = BytesIO()
+    df.to_excel(excel_output, index=False, engine="openpyxl", sheet_name="Veículos")
+    excel_output.seek(0)
+    with BytesIO(excel_output.read()) as excel_read:
+        wb = load_workbook(excel_read)
+    ws = wb.active
+    header_font = Font(bold=True, color="FFFFFFFF")
+    header_fill = PatternFill(
+        start_color="333333", end_color="333333", fill_type="solid"
+    )
+    cell_alignment = Alignment(horizontal="center", vertical="center")
+    for cell in ws[1]:
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = cell_alignment
+    for row in ws.iter_rows(min_row=2, max_row=len(vehicles) + 1):
+        for cell in row:
+            cell.alignment = cell_alignment
+    excel_output = BytesIO()
+    wb.save(excel_output)
+    return excel_output.getvalue()
+
+
+def run_variant(variant):
+    """
+    Executa uma exportação neste processo e imprime o resultado em JSON.
+    """
+    app = setup_app()
+    app.config["TESTING"] = True
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["admin"] = True
+
+    urls = {
+        "nova": "/export_excel",
+        "nova (3 folhas)": "/export_excel?folhas=veiculos,reservas,clientes",
+    }
+    with app.app_context():
+        from models import Veiculo
+
+        Veiculo.query.first()
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        if variant == "antiga":
+            size = len(legacy_export_excel())
+        else:
+            size = sum(len(chunk) for chunk in client.get(urls[variant]).response)
+        elapsed = (time.perf_counter() - start) * 1000
+        after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(
+        json.dumps(
+            {"ms": elapsed, "rss_mb": (after - before) / 1024, "kb": size / 1024}
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--reservations-per-vehicle", type=int, default=3)
+    parser.add_argument("--variant", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        run_variant(args.variant)
+        return
+
+    app = setup_app()
+    from models import db, Veiculo, Cliente
+
+    print(f"{'veículos':>8} {'exportação':>16} {'ms':>10} {'+RSS MB':>8} {'KB':>8}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        with app.app_context():
+            atual = Veiculo.query.count()
+            if size > atual:
+                seed_vehicles(size - atual)
+                novos = [
+                    v
+                    for (v,) in db.session.query(Veiculo.id).filter(Veiculo.id > atual)
+                ]
+                seed_reservations(args.reservations_per_vehicle, vehicle_ids=novos)
+            clientes = Cliente.query.count()
+            if size > clientes:
+                seed_clients(size - clientes, offset=clientes)
+
+        for variant in ["antiga", "nova", "nova (3 folhas)"]:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--variant", variant],
+                capture_output=True,
+                text=True,
+                check=True,
+                env=os.environ,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{size:>8} {variant:>16} {result['ms']:>10.0f} "
+                f"{result['rss_mb']:>8.1f} {result['kb']:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
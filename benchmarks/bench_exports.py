@@ -0,0 +1,149 @@
+"""
+Benchmark das exportações CSV do painel de administração.
+
+Compara a exportação antiga de veículos (tabela inteira num StringIO, com a
+categoria carregada linha a linha) com a exportação em streaming de
+exports.py, reportando o tempo até ao primeiro byte, o tempo total e o pico
+de memória Python (tracemalloc) para vários tamanhos de frota. Também mede as
+exportações de clientes e reservas.
+
+Uso: python benchmarks/bench_exports.py [--sizes 1000,10000,50000]
+"""
+
+import argparse
+import csv
+import time
+import tracemalloc
+from io import StringIO
+
+from common import seed_clients, seed_reservations, seed_vehicles, setup_app
+
+
+def legacy_export_csv():
+    """
+    Reprodução da exportação original de admin_views.export_csv.
+    """
+    from models import Veiculo
+
+    csv_buffer = StringIO()
+    csv_writer = csv.writer(csv_buffer)
+    csv_writer.writerow(
+        [
+            "ID",
+            "Tipo",
+            "Marca",
+            "Modelo",
+            "Ano",
+            "Diária (€)",
+            "Categoria",
+            "Status",
+            "Em Manutenção",
+            "Próxima Manutenção",
+            "Próxima Legalização",
+        ]
+    )
+    for vehicle in Veiculo.query.all():
+        csv_writer.writerow(
+            [
+                vehicle.id,
+                vehicle.type.value,
+                vehicle.brand,
+                vehicle.model,
+                vehicle.year,
+                vehicle.price_per_day,
+                vehicle.categoria.nome,
+                "Disponível" if vehicle.status else "Indisponível",
+                "Sim" if vehicle.in_maintenance else "Não",
+                (
+                    vehicle.next_maintenance_date.strftime("%d/%m/%Y")
+                    if vehicle.next_maintenance_date
+                    else ""
+                ),
+                (
+                    vehicle.next_legalization_date.strftime("%d/%m/%Y")
+                    if vehicle.next_legalization_date
+                    else ""
+                ),
+            ]
+        )
+    yield csv_buffer.getvalue()
+
+
+def measure(func):
+    """
+    Consome a exportação duas vezes: uma para medir o tempo até ao primeiro
+    bloco com dados e o tempo total, outra com tracemalloc para o pico de
+    memória. Devolve (primeiro bloco ms, total ms, pico MB, bytes).
+    """
+    start = time.perf_counter()
+    first = None
+    size = 0
+    for index, chunk in enumerate(func()):
+        # O primeiro bloco das exportações em streaming é só o cabeçalho
+        if first is None and (index > 0 or chunk.count("\n") > 1):
+            first = (time.perf_counter() - start) * 1000
+        size += len(chunk.encode())
+    total = (time.perf_counter() - start) * 1000
+
+    tracemalloc.start()
+    for _ in func():
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first or total, total, peak / 2**20, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--reservations-per-vehicle", type=int, default=3)
+    args = parser.parse_args()
+
+    app = setup_app()
+    from models import db, Veiculo, Cliente
+    from exports import (
+        CLIENT_HEADER,
+        RESERVATION_HEADER,
+        VEHICLE_HEADER,
+        client_rows,
+        reservation_rows,
+        stream_csv,
+        vehicle_rows,
+    )
+
+    print(
+        f"{'linhas':>8} {'exportação':>18} {'1.º byte ms':>12} {'total ms':>10} "
+        f"{'pico MB':>8} {'KB':>8}"
+    )
+    for size in [int(s) for s in args.sizes.split(",")]:
+        with app.app_context():
+            atual = Veiculo.query.count()
+            if size > atual:
+                seed_vehicles(size - atual)
+                novos = [
+                    v
+                    for (v,) in db.session.query(Veiculo.id).filter(Veiculo.id > atual)
+                ]
+                seed_reservations(args.reservations_per_vehicle, vehicle_ids=novos)
+            clientes = Cliente.query.count()
+            if size > clientes:
+                seed_clients(size - clientes, offset=clientes)
+
+            exportacoes = {
+                "veículos (antiga)": legacy_export_csv,
+                "veículos": lambda: stream_csv(VEHICLE_HEADER, vehicle_rows()),
+                "clientes": lambda: stream_csv(CLIENT_HEADER, client_rows()),
+                "reservas": lambda: stream_csv(RESERVATION_HEADER, reservation_rows()),
+            }
+            for nome, func in exportacoes.items():
+                db.session.expire_all()
+                first, total, peak, nbytes = measure(func)
+                print(
+                    f"{size:>8} {nome:>18} {first:>12.1f} {total:>10.1f} "
+                    f"{peak:>8.1f} {nbytes / 1024:>8.0f}"
+                )
+            db.session.remove()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark das variantes redimensionadas das imagens dos veículos.
+
+Mede o tempo de geração das variantes (em série e num conjunto de processos),
+o tamanho de cada variante comparado com a fotografia original e a latência
+do pedido de adição de um veículo, que já não espera pelo processamento.
+
+Uso: python benchmarks/bench_images.py [--images 12] [--workers 2,4]
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import mean
+
+from common import seed_categorias, setup_app
+
+
+def synthetic_photo(path, width=3000, height=2000, seed=0):
+    """
+    Cria uma "fotografia" JPEG com gradiente e ruído, que comprime como uma
+    fotografia real (ao contrário de uma imagem de cor única).
+    """
+    from PIL import Image
+
+    gradient = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    noise = Image.effect_noise((width, height), 40 + seed).convert("RGB")
+    Image.blend(gradient, noise, 0.35).save(path, "JPEG", quality=92)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", type=int, default=12)
+    parser.add_argument("--workers", default="2,4")
+    args = parser.parse_args()
+
+    from images import generate_variants
+
+    folder = tempfile.mkdtemp(prefix="bench_images_")
+    sources = []
+    for index in range(args.images):
+        path = os.path.join(folder, f"foto{index}.jpg")
+        synthetic_photo(path, seed=index)
+        sources.append(path)
+
+    def destination(index):
+        return os.path.join(folder, "variants", f"foto{index}.jpg")
+
+    start = time.perf_counter()
+    for index, source in enumerate(sources):
+        generate_variants(source, destination(index))
+    print(f"{'em série':>20}: {(time.perf_counter() - start) * 1000:8.0f} ms")
+
+    for workers in [int(w) for w in args.workers.split(",")]:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            start = time.perf_counter()
+            list(
+                executor.map(
+                    generate_variants,
+                    sources,
+                    [destination(i) for i in range(len(sources))],
+                )
+            )
+            elapsed = (time.perf_counter() - start) * 1000
+        print(f"{f'{workers} processos':>20}: {elapsed:8.0f} ms")
+
+    print()
+    original = mean(os.path.getsize(source) for source in sources) / 1024
+    print(f"{'original':>20}: {original:8.1f} KB")
+    for name in ["thumb", "card", "full"]:
+        for extension in ["webp", "jpg"]:
+            size = mean(
+                os.path.getsize(os.path.join(destination(i), f"{name}.{extension}"))
+                for i in range(len(sources))
+            )
+            print(f"{f'{name}.{extension}':>20}: {size / 1024:8.1f} KB")
+
+    # Latência do pedido de adição de um veículo com uma fotografia
+    app = setup_app()
+    app.config["TESTING"] = True
+    app.config["UPLOAD_FOLDER"] = folder
+    with app.app_context():
+        seed_categorias()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["admin"] = True
+    with open(sources[0], "rb") as file:
+        photo = file.read()
+
+    print()
+    for attempt in range(3):
+        form = {
+            "vehicle-type": "carro",
+            "brand": "Fiat",
+            "model": "Panda",
+            "year": "2020",
+            "price_per_day": "100",
+            "last_legalization_date": "2020-01-01",
+            "next_legalization_date": "2030-01-01",
+            "imagens": [(io.BytesIO(photo), f"upload{attempt}.jpg")],
+        }
+        start = time.perf_counter()
+        client.post("/add_vehicle", data=form, content_type="multipart/form-data")
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{'pedido add_vehicle':>20}: {elapsed:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark da lista de veículos do painel de administração.
+
+Compara a listagem antiga (todos os veículos e uma consulta de categoria por
+linha) com a página paginada por cursor de admin_views.list_vehicles,
+reportando o número de consultas e a latência por pedido para vários
+tamanhos de frota.
+
+Uso: python benchmarks/bench_list_vehicles.py [--sizes 1000,10000,50000]
+"""
+
+import argparse
+
+from common import QueryCounter, seed_vehicles, setup_app, timed
+
+
+def legacy_list_vehicles():
+    """
+    Reprodução da consulta original: todos os veículos e a categoria de cada um
+    carregada à parte ao desenhar a tabela.
+    """
+    from models import Veiculo
+
+    return [(v.id, v.categoria.nome) for v in Veiculo.query.all()]
+
+
+def follow_pages(client, url, pages):
+    """
+    Pede a página url e segue o link da página seguinte pages - 1 vezes.
+    """
+    import re
+
+    for _ in range(pages):
+        response = client.get(url)
+        match = re.search(rb'href="([^"]*cursor=[^"]*)"', response.data)
+        if not match:
+            break
+        url = match.group(1).decode().replace("&amp;", "&")
+    return url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--deep-page", type=int, default=20)
+    args = parser.parse_args()
+
+    app = setup_app()
+    app.config["TESTING"] = True
+    from models import db, Veiculo
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["admin"] = True
+
+    pedidos = {
+        "primeira": "/admin/list-vehicles",
+        "marca": "/admin/list-vehicles?sort=brand",
+        "preço desc": "/admin/list-vehicles?sort=price_per_day&order=desc",
+        "filtros": "/admin/list-vehicles?brand=Toy&status=disponivel&sort=year",
+    }
+
+    print(f"{'frota':>8} {'pedido':>14} {'consultas':>10} {'ms':>10}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        with app.app_context():
+            atual = Veiculo.query.count()
+            if size > atual:
+                seed_vehicles(size - atual)
+            db.session.execute(db.text("ANALYZE"))
+
+            db.session.expire_all()
+            with QueryCounter(db.engine) as counter:
+                legacy_list_vehicles()
+            ms = timed(
+                lambda: (db.session.expire_all(), legacy_list_vehicles()),
+                args.repeat,
+            )
+            print(f"{size:>8} {'legado':>14} {counter.count:>10} {ms:>10.2f}")
+            engine = db.engine
+
+        # Página profunda: segue os cursores até à página deep_page
+        pedidos["página " + str(args.deep_page)] = follow_pages(
+            client, "/admin/list-vehicles", args.deep_page - 1
+        )
+        for nome, url in pedidos.items():
+            with QueryCounter(engine) as counter:
+                client.get(url)
+            ms = timed(lambda: client.get(url), args.repeat)
+            print(f"{size:>8} {nome:>14} {counter.count:>10} {ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark dos relatórios de receita e utilização.
+
+Compara o cálculo em Python puro (as reservas de cada veículo consultadas à
+parte e somadas linha a linha) com o cálculo vetorial de reports.py, e mede
+a latência da página de relatórios, que só lê as tabelas já calculadas.
+
+Uso: python benchmarks/bench_reports.py [--sizes 1000,10000,50000]
+"""
+
+import argparse
+from datetime import date, timedelta
+
+from common import seed_reservations, seed_vehicles, setup_app, timed
+
+
+def python_reports():
+    """
+    Cálculo linha a linha: uma consulta de reservas por veículo para a
+    ocupação e um ciclo sobre todas as reservas para a receita por mês.
+    """
+    from models import Veiculo, Reservation
+    from reports import REPORT_WINDOW_DAYS
+
+    today = date.today()
+    window_start = today - timedelta(days=REPORT_WINDOW_DAYS - 1)
+
+    utilization = {}
+    for vehicle in Veiculo.query.all():
+        days = 0
+        for reservation in Reservation.query.filter(
+            Reservation.vehicle_id == vehicle.id, Reservation.status != "Cancelada"
+        ):
+            first = max(reservation.start_date, window_start)
+            end = min(reservation.end_date, today + timedelta(days=1))
+            days += max((end - first).days, 0)
+        utilization[vehicle.id] = days / REPORT_WINDOW_DAYS
+
+    revenue = {}
+    for reservation in Reservation.query.filter(Reservation.status != "Cancelada"):
+        key = (
+            reservation.start_date.replace(day=1),
+            reservation.veiculos.categoria.nome,
+        )
+        revenue[key] = revenue.get(key, 0) + reservation.price
+    return utilization, revenue
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--reservations-per-vehicle", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    app = setup_app()
+    app.config["TESTING"] = True
+    from models import db, Veiculo
+    from reports import refresh_reports
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["admin"] = True
+
+    print(
+        f"{'veículos':>8} {'python ms':>10} {'vetorial ms':>12} "
+        f"{'página ms':>10} {'lista ms':>9}"
+    )
+    for size in [int(s) for s in args.sizes.split(",")]:
+        with app.app_context():
+            atual = Veiculo.query.count()
+            if size > atual:
+                seed_vehicles(size - atual)
+                novos = [
+                    v
+                    for (v,) in db.session.query(Veiculo.id).filter(Veiculo.id > atual)
+                ]
+                seed_reservations(args.reservations_per_vehicle, vehicle_ids=novos)
+
+            python_ms = timed(python_reports, repeat=1)
+            vetorial_ms = timed(refresh_reports, repeat=args.repeat)
+
+        pagina_ms = timed(lambda: client.get("/admin/reports"), repeat=args.repeat)
+        lista_ms = timed(
+            lambda: client.get("/admin/reports/vehicles"), repeat=args.repeat
+        )
+        print(
+            f"{size:>8} {python_ms:>10.0f} {vetorial_ms:>12.0f} "
+            f"{pagina_ms:>10.1f} {lista_ms:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Carga mista de leituras e escritas com os perfis "default" e "tuned" do SQLite.
+
+Cada perfil corre num subprocesso com uma base de dados nova: threads de
+leitura executam a pesquisa de disponibilidade enquanto threads de escrita
+criam reservas através do motor de reservas. São reportadas as operações por
+segundo, a latência p95 das leituras e os erros de base de dados bloqueada.
+
+Uso: python benchmarks/bench_sqlite_profile.py [--readers 8] [--writers 2] [--seconds 5]
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, time as dtime, timedelta
+
+from common import seed_clients, seed_reservations, seed_vehicles, setup_app
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def run_profile(args):
+    """
+    Executa a carga mista no perfil configurado em SQLITE_PROFILE.
+    """
+    app = setup_app()
+    from models import db, Veiculo, Cliente
+    from availability import available_vehicles_query
+    from booking import BookingConflict, book_vehicle
+    from sqlite_profile import current_pragmas
+
+    with app.app_context():
+        seed_vehicles(args.vehicles)
+        seed_clients(100)
+        seed_reservations(2)
+        vehicle_ids = [v for (v,) in db.session.query(Veiculo.id)]
+        client_ids = [c for (c,) in db.session.query(Cliente.id)]
+        pragmas = current_pragmas(db.engine, ["journal_mode", "synchronous"])
+
+    stop = time.perf_counter() + args.seconds
+    read_latencies, write_latencies, errors = [], [], []
+
+    def reader(seed):
+        rng = random.Random(seed)
+        with app.app_context():
+            while time.perf_counter() < stop:
+                inicio = date.today() + timedelta(days=rng.randint(0, 90))
+                start = time.perf_counter()
+                try:
+                    available_vehicles_query(inicio, inicio + timedelta(days=3)).all()
+                    read_latencies.append((time.perf_counter() - start) * 1000)
+                except Exception as error:
+                    errors.append(repr(error))
+                db.session.remove()
+
+    def writer(seed):
+        rng = random.Random(seed)
+        with app.app_context():
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                try:
+                    book_vehicle(
+                        customer_id=rng.choice(client_ids),
+                        vehicle_id=rng.choice(vehicle_ids),
+                        start_date=date.today() + timedelta(days=rng.randint(0, 365)),
+                        start_time=dtime(10, 0),
+                        duration=2,
+                        price=100.0,
+                    )
+                    write_latencies.append((time.perf_counter() - start) * 1000)
+                except BookingConflict:
+                    write_latencies.append((time.perf_counter() - start) * 1000)
+                except Exception as error:
+                    errors.append(repr(error))
+                db.session.remove()
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads += [
+        threading.Thread(target=writer, args=(100 + i,)) for i in range(args.writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(
+        json.dumps(
+            {
+                "profile": app.config["SQLITE_PROFILE"],
+                "pragmas": pragmas,
+                "reads_per_s": len(read_latencies) / args.seconds,
+                "writes_per_s": len(write_latencies) / args.seconds,
+                "read_p95_ms": percentile(read_latencies, 95),
+                "write_p95_ms": percentile(write_latencies, 95),
+                "errors": len(errors),
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--vehicles", type=int, default=1000)
+    parser.add_argument("--profiles", default="default,tuned")
+    parser.add_argument("--run-profile", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_profile:
+        run_profile(args)
+        return
+
+    print(
+        f"{'perfil':>8} {'journal':>8} {'leituras/s':>11} {'escritas/s':>11} "
+        f"{'p95 leitura':>12} {'p95 escrita':>12} {'erros':>6}"
+    )
+    for profile in args.profiles.split(","):
+        tmp_dir = tempfile.mkdtemp(prefix="bench_profile_")
+        env = dict(
+            os.environ,
+            SQLITE_PROFILE=profile,
+            DATABASE_URL=f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}",
+        )
+        output = subprocess.run(
+            [sys.executable, __file__, "--run-profile", *sys.argv[1:]],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{profile:>8} {result['pragmas']['journal_mode']:>8} "
+            f"{result['reads_per_s']:>11.1f} {result['writes_per_s']:>11.1f} "
+            f"{result['read_p95_ms']:>10.2f}ms {result['write_p95_ms']:>10.2f}ms "
+            f"{result['errors']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
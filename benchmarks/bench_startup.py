@@ -0,0 +1,133 @@
+"""
+Benchmark do arranque da aplicação e dos workers do servidor.
+
+Corre cada cenário num processo novo: o tempo de arranque (do início do
+interpretador até a aplicação estar pronta), o perfil de importação de
+python -X importtime, as dependências pesadas carregadas e as threads já
+criadas (um worker tem de poder ser criado com fork sem threads nem
+ligações abertas). O arranque de um worker é comparado com --target-ms.
+
+Uso: python benchmarks/bench_startup.py [--repeat 5] [--target-ms 1000]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from statistics import median
+
+from common import ROOT
+
+# Dependências que só devem ser carregadas quando são usadas
+HEAVY_MODULES = ["numpy", "pandas", "openpyxl", "pyarrow", "alembic", "apscheduler"]
+
+SCENARIOS = {
+    "worker": "import wsgi\napp = wsgi.app",
+    "cli": "from app import create_app\napp = create_app()",
+}
+
+PROBE = """
+import json, sys, threading, time
+{code}
+print(json.dumps({{
+    "ready_ms": (time.perf_counter() - START) * 1000,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+    "threads": threading.active_count(),
+}}))
+"""
+
+
+def run(code, importtime=False):
+    """
+    Corre o código num processo novo e devolve (resultado, linhas do importtime).
+    """
+    script = "import time\nSTART = time.perf_counter()\n" + PROBE.format(
+        code=code, heavy=HEAVY_MODULES
+    )
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    start = time.perf_counter()
+    completed = subprocess.run(
+        command + ["-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["wall_ms"] = (time.perf_counter() - start) * 1000
+    return result, completed.stderr.splitlines()
+
+
+def parse_importtime(lines, max_depth=2):
+    """
+    Tempo total das importações (em ms) e os módulos até max_depth níveis de
+    profundidade, com o tempo acumulado de cada um, do mais lento para o
+    mais rápido.
+    """
+    total = 0
+    modules = []
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        ms = int(cumulative) / 1000
+        if depth == 0:
+            total += ms
+        if depth <= max_depth:
+            modules.append((ms, name.strip()))
+    return total, sorted(modules, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=1000)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    # As tabelas não são criadas no arranque, por isso basta uma base de
+    # dados vazia
+    if "DATABASE_URL" not in os.environ:
+        tmp_dir = tempfile.mkdtemp(prefix="bench_startup_")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+    baseline = median(run("pass")[0]["wall_ms"] for _ in range(args.repeat))
+    print(f"interpretador sem a aplicação: {baseline:.0f} ms")
+    print()
+
+    resultados = {}
+    for nome, code in SCENARIOS.items():
+        runs = [run(code)[0] for _ in range(args.repeat)]
+        result, lines = run(code, importtime=True)
+        total, top = parse_importtime(lines)
+        resultados[nome] = median(r["wall_ms"] for r in runs)
+
+        print(f"== {nome} ==")
+        print(f"{'arranque (processo)':>26}: {resultados[nome]:8.0f} ms")
+        print(
+            f"{'aplicação pronta':>26}: "
+            f"{median(r['ready_ms'] for r in runs):8.0f} ms"
+        )
+        print(f"{'importações (importtime)':>26}: {total:8.0f} ms")
+        print(f"{'threads':>26}: {result['threads']:8}")
+        print(f"{'dependências pesadas':>26}: {', '.join(result['heavy']) or '-'}")
+        for ms, name in top[: args.top]:
+            print(f"{name:>26}: {ms:8.1f} ms")
+        print()
+
+    worker = resultados["worker"]
+    estado = "OK" if worker <= args.target_ms else "ACIMA DO OBJETIVO"
+    print(
+        f"arranque de um worker: {worker:.0f} ms "
+        f"(objetivo {args.target_ms:.0f} ms) {estado}"
+    )
+
+
+if __name__ == "__main__":
+    main()
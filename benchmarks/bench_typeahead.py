@@ -0,0 +1,97 @@
+"""
+Benchmark da pesquisa de marca/modelo enquanto se escreve.
+
+Simula um cliente a escrever letra a letra e mede a latência (p50 e p99) de
+vehicle_search_index.search, com e sem o filtro de disponibilidade, e do
+pedido completo ao endpoint JSON. Todos os cenários incluem a verificação
+dos contadores de data_versions (index_sync.refresh, no máximo uma leitura
+por CHECK_INTERVAL); o último lê-os a cada tecla, para comparação.
+
+Uso: python benchmarks/bench_typeahead.py [--vehicles 50000]
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+
+from common import percentile, seed_reservations, seed_vehicles, setup_app
+
+PALAVRAS = ["Toyota Corolla", "série 3", "Yamaha MT", "clio", "Africa Twin", "x"]
+
+
+def keystrokes():
+    """
+    Todos os prefixos das palavras pesquisadas, como se fossem escritas.
+    """
+    return [palavra[:n] for palavra in PALAVRAS for n in range(1, len(palavra) + 1)]
+
+
+def measure(func, rounds):
+    """
+    Executa func para cada tecla, rounds vezes, e devolve as latências em ms.
+    """
+    samples = []
+    for _ in range(rounds):
+        for texto in keystrokes():
+            start = time.perf_counter()
+            func(texto)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vehicles", type=int, default=50000)
+    parser.add_argument("--reservations-per-vehicle", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    app = setup_app()
+    app.config["TESTING"] = True
+    from availability import index_sync
+    from models import Veiculo
+    from vehicle_search import vehicle_search_index
+
+    with app.app_context():
+        atual = Veiculo.query.count()
+        if args.vehicles > atual:
+            seed_vehicles(args.vehicles - atual)
+            seed_reservations(args.reservations_per_vehicle)
+        start = time.perf_counter()
+        vehicle_search_index.rebuild()
+        rebuild_ms = (time.perf_counter() - start) * 1000
+    print(f"reconstrução do índice: {rebuild_ms:.1f} ms ({args.vehicles} veículos)")
+
+    data_inicio = date.today() + timedelta(days=7)
+    data_entrega = data_inicio + timedelta(days=3)
+    client = app.test_client()
+    datas = f"data_inicio={data_inicio}&data_entrega={data_entrega}"
+
+    def sem_intervalo(texto):
+        index_sync._checked = None
+        return vehicle_search_index.search(texto)
+
+    cenarios = {
+        "índice": lambda texto: vehicle_search_index.search(texto),
+        "índice + datas": lambda texto: vehicle_search_index.search(
+            texto, 10, data_inicio, data_entrega, "Gold"
+        ),
+        "endpoint + datas": lambda texto: client.get(
+            "/api/vehicles/typeahead",
+            query_string=f"q={texto}&categoria=Gold&{datas}",
+        ),
+        "índice, leitura/tecla": sem_intervalo,
+    }
+
+    print(f"{'cenário':>22} {'pedidos':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    with app.app_context():
+        for nome, func in cenarios.items():
+            samples = measure(func, args.rounds)
+            print(
+                f"{nome:>22} {len(samples):>8} {percentile(samples, 50):>8.3f} "
+                f"{percentile(samples, 99):>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark da cache de clientes autenticados do Flask-Login.
+
+Compara, para páginas de um cliente autenticado, o carregador antigo (uma
+consulta do Cliente inteiro em cada pedido) com a cache de user_cache.py:
+consultas por pedido, latência e os contadores de acertos e falhas.
+
+Uso: python benchmarks/bench_user_cache.py [--requests 200]
+"""
+
+import argparse
+
+from common import QueryCounter, seed_clients, seed_vehicles, setup_app, timed
+
+PAGINAS = ["/", "/client_reservations", "/edit_client", "/order_confirmation"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = setup_app()
+    app.config["TESTING"] = True
+    from models import db, Cliente
+    from user_cache import user_cache
+    from views import load_user, login_manager
+
+    with app.app_context():
+        if Cliente.query.count() == 0:
+            seed_vehicles(200)
+            seed_clients(100)
+        engine = db.engine
+
+    client = app.test_client()
+    client.post(
+        "/client_login",
+        data={"email": "cliente0@exemplo.pt", "password": "password123"},
+    )
+
+    def orm_loader(user_id):
+        return Cliente.query.get(int(user_id))
+
+    print(f"{'página':>22} {'carregador':>10} {'consultas':>10} {'ms':>8}")
+    for pagina in PAGINAS:
+        for nome, loader in [("ORM", orm_loader), ("cache", load_user)]:
+            login_manager.user_loader(loader)
+            user_cache.clear()
+            client.get(pagina)
+            with QueryCounter(engine) as counter:
+                client.get(pagina)
+            ms = timed(lambda: client.get(pagina), args.repeat)
+            print(f"{pagina:>22} {nome:>10} {counter.count:>10} {ms:>8.2f}")
+
+    login_manager.user_loader(load_user)
+    user_cache.clear()
+    with QueryCounter(engine) as counter:
+        for _ in range(args.requests):
+            client.get("/order_confirmation")
+    print()
+    print(f"{args.requests} pedidos com cache: {counter.count} consulta(s)")
+    print(f"contadores: {user_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
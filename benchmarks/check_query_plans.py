@@ -0,0 +1,59 @@
+"""
+Verificação dos planos de consulta numa base de dados grande.
+
+Corre a mesma verificação que tests/test_query_plans.py (todas as consultas
+emitidas pelas views e tarefas periódicas, com EXPLAIN QUERY PLAN), mas com
+uma frota e uma base de clientes do tamanho de produção e as estatísticas do
+ANALYZE. Termina com erro se alguma consulta fizer uma leitura completa de
+uma tabela que não esteja na lista de exceções.
+
+Uso: python benchmarks/check_query_plans.py [--vehicles 20000] [--clients 20000]
+"""
+
+import argparse
+import sys
+
+from common import (
+    seed_clients,
+    seed_reservations,
+    seed_vehicle_events,
+    seed_vehicle_images,
+    seed_vehicles,
+    setup_app,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vehicles", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=20000)
+    parser.add_argument("--reservations-per-vehicle", type=int, default=3)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    app = setup_app()
+    app.config["TESTING"] = True
+    from models import db
+    from tests.query_plans import plan_failures
+
+    with app.app_context():
+        seed_vehicles(args.vehicles)
+        seed_vehicle_images(3)
+        seed_vehicle_events(4)
+        seed_clients(args.clients)
+        seed_reservations(args.reservations_per_vehicle)
+        db.session.execute(db.text("ANALYZE"))
+
+    checked, scans = plan_failures(app, verbose=args.verbose)
+    failures = 0
+    for status, label, detail, statement in scans:
+        failures += status == "FALHA"
+        print(f"[{status}] {label}: {detail}")
+        print("    " + statement[:300])
+
+    print(f"{checked} consultas verificadas, {failures} falha(s).")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Utilitários partilhados pelos benchmarks: base de dados temporária,
+contagem de consultas e geração de dados sintéticos.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from statistics import median
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+CATEGORIAS = ["Gold", "Silver", "Econômico"]
+MARCAS = {
+    "Toyota": ["Corolla", "Yaris", "C-HR"],
+    "BMW": ["Série 1", "Série 3", "X5"],
+    "Renault": ["Clio", "Megane", "Captur"],
+    "Honda": ["CBR 600", "PCX 125", "Africa Twin"],
+    "Yamaha": ["MT-07", "Tracer 9", "NMAX"],
+}
+
+
+def setup_app():
+    """
+    Cria a aplicação Flask apontada para uma base de dados temporária, já
+    com as tabelas criadas.
+    """
+    if "DATABASE_URL" not in os.environ:
+        tmp_dir = tempfile.mkdtemp(prefix="bench_")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+class QueryCounter:
+    """
+    Conta as instruções SQL executadas no engine enquanto o contexto está ativo.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _before_cursor_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+
+
+def timed(func, repeat=5):
+    """
+    Executa func várias vezes e devolve a mediana da latência em milissegundos.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return median(samples)
+
+
+def percentile(samples, p):
+    """
+    Percentil p (0-100) de uma lista de amostras, por interpolação linear.
+    """
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def seed_categorias():
+    """
+    Garante que as categorias Gold, Silver e Econômico existem.
+    """
+    from models import db, Categoria
+
+    existentes = {c.nome: c.id for c in Categoria.query.all()}
+    for nome in CATEGORIAS:
+        if nome not in existentes:
+            categoria = Categoria(nome=nome)
+            db.session.add(categoria)
+            db.session.flush()
+            existentes[nome] = categoria.id
+    db.session.commit()
+    return existentes
+
+
+def seed_vehicles(count, rng=None):
+    """
+    Insere count veículos sintéticos com um único INSERT em lote.
+    """
+    from models import db, Veiculo, VehicleType
+
+    rng = rng or random.Random(42)
+    categorias = seed_categorias()
+    today = date.today()
+    rows = []
+    for _ in range(count):
+        marca = rng.choice(list(MARCAS))
+        tipo = VehicleType.MOTA if marca in ("Honda", "Yamaha") else VehicleType.CARRO
+        preco = round(rng.uniform(20, 400), 2)
+        if preco > 250:
+            categoria = "Gold"
+        elif preco <= 50:
+            categoria = "Econômico"
+        else:
+            categoria = "Silver"
+        last_maintenance = today - timedelta(days=rng.randint(0, 170))
+        last_legalization = today - timedelta(days=rng.randint(0, 360))
+        rows.append(
+            {
+                "type": tipo,
+                "brand": marca,
+                "model": rng.choice(MARCAS[marca]),
+                "year": rng.randint(2015, today.year),
+                "price_per_day": preco,
+                "status": True,
+                "in_maintenance": rng.random() < 0.03,
+                "last_maintenance_date": last_maintenance,
+                "next_maintenance_date": last_maintenance + timedelta(days=180),
+                "last_legalization_date": last_legalization,
+                "next_legalization_date": last_legalization + timedelta(days=365),
+                "available_from": today,
+                "num_uses": 0,
+                "max_uses_before_maintenance": 50,
+                "categoria_id": categorias[categoria],
+            }
+        )
+    if rows:
+        db.session.execute(db.insert(Veiculo), rows)
+        db.session.commit()
+
+
+def seed_vehicle_images(per_vehicle, vehicle_ids=None):
+    """
+    Insere per_vehicle imagens (só as linhas, sem ficheiros) por veículo;
+    a primeira de cada veículo é a capa.
+    """
+    from models import db, Veiculo, VehicleImage
+
+    if vehicle_ids is None:
+        vehicle_ids = [v for (v,) in db.session.query(Veiculo.id)]
+    rows = [
+        {
+            "vehicle_id": vehicle_id,
+            "path": f"{vehicle_id % 256:02x}/veiculo{vehicle_id}_{position}.jpg",
+            "position": position,
+            "is_cover": position == 0,
+            "width": 1600,
+            "height": 1067,
+        }
+        for vehicle_id in vehicle_ids
+        for position in range(per_vehicle)
+    ]
+    if rows:
+        db.session.execute(db.insert(VehicleImage), rows)
+        db.session.commit()
+
+
+def seed_vehicle_events(per_vehicle, rng=None, vehicle_ids=None):
+    """
+    Insere per_vehicle eventos de manutenção ou legalização por veículo,
+    espalhados pelos últimos dois anos.
+    """
+    from models import db, Veiculo, VehicleEvent, VehicleEventType
+
+    rng = rng or random.Random(5)
+    if vehicle_ids is None:
+        vehicle_ids = [v for (v,) in db.session.query(Veiculo.id)]
+    today = date.today()
+    now = datetime.now()
+    tipos = [tipo.name for tipo in VehicleEventType]
+    rows = [
+        {
+            "vehicle_id": vehicle_id,
+            "type": rng.choice(tipos),
+            "date": today - timedelta(days=rng.randint(0, 730)),
+            "num_uses": rng.randint(0, 50),
+            "notes": None,
+            "created_at": now,
+        }
+        for vehicle_id in vehicle_ids
+        for _ in range(per_vehicle)
+    ]
+    if rows:
+        db.session.execute(db.insert(VehicleEvent), rows)
+        db.session.commit()
+
+
+def seed_clients(count, rng=None, offset=0):
+    """
+    Insere count clientes sintéticos com um único INSERT em lote.
+    """
+    from models import db, Cliente
+
+    rng = rng or random.Random(7)
+    rows = []
+    for i in range(offset, offset + count):
+        preco = rng.choice([40, 120, 300])
+        if preco > 250:
+            categoria = "Gold"
+        elif preco <= 50:
+            categoria = "Económico"
+        else:
+            categoria = "Silver"
+        rows.append(
+            {
+                "nome": f"Cliente{i}",
+                "apelido": f"Apelido{i % 997}",
+                "email": f"cliente{i}@exemplo.pt",
+                "telefone": f"9{i:08d}",
+                "data_nascimento": date(1970, 1, 1) + timedelta(days=i % 12000),
+                "morada": f"Rua {i}, Lisboa",
+                "nif": 100000000 + i,
+                "price_per_day": preco,
+                "password": "password123",
+                "categoria": categoria,
+            }
+        )
+    if rows:
+        db.session.execute(db.insert(Cliente), rows)
+        db.session.commit()
+
+
+def seed_reservations(per_vehicle, rng=None, vehicle_ids=None):
+    """
+    Insere per_vehicle reservas por veículo, espalhadas por um ano à volta de hoje.
+    """
+    from models import db, Veiculo, Cliente, Reservation
+
+    rng = rng or random.Random(3)
+    if vehicle_ids is None:
+        vehicle_ids = [v for (v,) in db.session.query(Veiculo.id)]
+    client_ids = [c for (c,) in db.session.query(Cliente.id)]
+    if not client_ids:
+        seed_clients(max(10, len(vehicle_ids) // 10))
+        client_ids = [c for (c,) in db.session.query(Cliente.id)]
+
+    today = date.today()
+    rows = []
+    for vehicle_id in vehicle_ids:
+        for _ in range(per_vehicle):
+            start = today + timedelta(days=rng.randint(-180, 180))
+            duracao = rng.randint(1, 10)
+            end = start + timedelta(days=duracao)
+            if end < today:
+                status = "Concluída"
+            else:
+                status = "Cancelada" if rng.random() < 0.1 else "Ativa"
+            rows.append(
+                {
+                    "customer_id": rng.choice(client_ids),
+                    "vehicle_id": vehicle_id,
+                    "status": status,
+                    "start_date": start,
+                    "start_time": dtime(10, 0),
+                    "end_date": end,
+                    "end_time": dtime(10, 0),
+                    "duration": duracao,
+                    "price": duracao * 50.0,
+                }
+            )
+    if rows:
+        db.session.execute(db.insert(Reservation), rows)
+        db.session.commit()
+
+    # O INSERT em lote não passa por add_reservations, por isso o índice em
+    # memória tem de ser reconstruído
+    from availability import availability_index
+
+    availability_index.rebuild()
@@ -0,0 +1,121 @@
+import random
+import time
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import exists, insert, select
+from sqlalchemy.exc import OperationalError
+from models import db, Reservation
+from availability import conflicting_reservations, register_reservation
+
+# Métricas do motor de reservas neste processo
+booking_metrics = {
+    "bookings": 0,
+    "conflicts": 0,
+    "retries": 0,
+    "failures": 0,
+    "lock_wait_ms_total": 0.0,
+    "lock_wait_ms_max": 0.0,
+}
+_metrics_lock = threading.Lock()
+
+
+class BookingConflict(Exception):
+    """
+    O veículo já tem uma reserva ativa que se sobrepõe ao período pedido.
+    """
+
+
+def _record(key, lock_wait=None):
+    with _metrics_lock:
+        booking_metrics[key] += 1
+        if lock_wait is not None:
+            lock_wait_ms = lock_wait * 1000
+            booking_metrics["lock_wait_ms_total"] += lock_wait_ms
+            booking_metrics["lock_wait_ms_max"] = max(
+                booking_metrics["lock_wait_ms_max"], lock_wait_ms
+            )
+
+
+def _is_busy(error):
+    """
+    Verifica se o erro do SQLite é de base de dados bloqueada/ocupada.
+    """
+    message = str(error.orig).lower()
+    return "locked" in message or "busy" in message
+
+
+def book_vehicle(
+    customer_id,
+    vehicle_id,
+    start_date,
+    start_time,
+    duration,
+    price,
+    max_retries=5,
+    backoff=0.05,
+):
+    """
+    Cria uma reserva verificando a sobreposição dentro da mesma transação.
+
+    A transação é aberta com BEGIN IMMEDIATE, que obtém logo o bloqueio de
+    escrita do SQLite: duas reservas concorrentes para o mesmo veículo são
+    serializadas e a segunda já vê a primeira ao verificar conflitos.
+    Se a base de dados estiver ocupada, tenta novamente até max_retries vezes
+    com espera exponencial. Lança BookingConflict se o período estiver ocupado.
+    """
+    if isinstance(start_date, datetime):
+        start_date = start_date.date()
+    end_date = start_date + timedelta(days=duration)
+    vehicle_id = int(vehicle_id)
+
+    for attempt in range(max_retries + 1):
+        try:
+            with db.engine.connect() as connection:
+                wait_start = time.perf_counter()
+                connection.exec_driver_sql("BEGIN IMMEDIATE")
+                lock_wait = time.perf_counter() - wait_start
+
+                conflito = connection.execute(
+                    select(
+                        exists().where(
+                            Reservation.vehicle_id == vehicle_id,
+                            conflicting_reservations(start_date, end_date),
+                        )
+                    )
+                ).scalar()
+                if conflito:
+                    connection.rollback()
+                    _record("conflicts", lock_wait)
+                    raise BookingConflict(
+                        "O veículo já não está disponível para o período selecionado."
+                    )
+
+                result = connection.execute(
+                    insert(Reservation).values(
+                        {
+                            Reservation.customer_id: customer_id,
+                            Reservation.vehicle_id: vehicle_id,
+                            Reservation.status: "Ativa",
+                            Reservation.start_date: start_date,
+                            Reservation.start_time: start_time,
+                            Reservation.end_date: end_date,
+                            Reservation.end_time: start_time,
+                            Reservation.duration: duration,
+                            Reservation.price: price,
+                        }
+                    )
+                )
+                connection.commit()
+                reservation_id = result.inserted_primary_key[0]
+            _record("bookings", lock_wait)
+            break
+        except OperationalError as error:
+            if not _is_busy(error) or attempt == max_retries:
+                _record("failures")
+                raise
+            _record("retries")
+            time.sleep(backoff * (2**attempt) * (1 + random.random()))
+
+    reservation = db.session.get(Reservation, reservation_id)
+    register_reservation(reservation)
+    return reservation
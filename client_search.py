@@ -0,0 +1,106 @@
+import re
+from sqlalchemy import column, event, literal_column, select, table
+from models import db, Cliente
+
+FTS_TABLE = "clientes_fts"
+
+# Tabela FTS5 com conteúdo externo: guarda só o índice invertido e lê as
+# colunas da própria tabela clientes, pelo id
+CREATE_FTS_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    nome, apelido, email, telefone, nif,
+    content='clientes', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+# Os triggers mantêm o índice sincronizado com qualquer escrita na tabela,
+# incluindo INSERT em lote e alterações feitas fora do ORM
+CREATE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS clientes_fts_insert AFTER INSERT ON clientes BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, nome, apelido, email, telefone, nif)
+        VALUES (new.id, new.nome, new.apelido, new.email, new.telefone, new.nif);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS clientes_fts_delete AFTER DELETE ON clientes BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nome, apelido, email, telefone, nif)
+        VALUES ('delete', old.id, old.nome, old.apelido, old.email, old.telefone, old.nif);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS clientes_fts_update AFTER UPDATE ON clientes BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nome, apelido, email, telefone, nif)
+        VALUES ('delete', old.id, old.nome, old.apelido, old.email, old.telefone, old.nif);
+        INSERT INTO {FTS_TABLE}(rowid, nome, apelido, email, telefone, nif)
+        VALUES (new.id, new.nome, new.apelido, new.email, new.telefone, new.nif);
+    END
+    """,
+]
+
+DROP_STATEMENTS = [
+    "DROP TRIGGER IF EXISTS clientes_fts_update",
+    "DROP TRIGGER IF EXISTS clientes_fts_delete",
+    "DROP TRIGGER IF EXISTS clientes_fts_insert",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+fts_table = table(FTS_TABLE, column("rowid"))
+
+
+def create_client_search_index(connection):
+    """
+    Cria a tabela FTS5 e os triggers (se ainda não existirem) e indexa os
+    clientes que já estão na base de dados.
+    """
+    connection.exec_driver_sql(CREATE_FTS_TABLE)
+    for statement in CREATE_TRIGGERS:
+        connection.exec_driver_sql(statement)
+    connection.exec_driver_sql(
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+    )
+
+
+def drop_client_search_index(connection):
+    """
+    Remove a tabela FTS5 e os triggers.
+    """
+    for statement in DROP_STATEMENTS:
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Cliente.__table__, "after_create")
+def _create_index_with_table(target, connection, **kwargs):
+    """
+    Cria o índice de pesquisa quando db.create_all() cria a tabela clientes.
+    """
+    if connection.dialect.name == "sqlite":
+        create_client_search_index(connection)
+
+
+def match_expression(termo):
+    """
+    Converte o texto escrito pelo administrador numa expressão MATCH do FTS5
+    em que cada palavra é procurada como prefixo ("silv" encontra "Silva").
+    Devolve None se não houver palavras para procurar.
+    """
+    palavras = re.findall(r"[^\s\"]+", termo or "")
+    if not palavras:
+        return None
+    return " ".join(f'"{palavra}"*' for palavra in palavras)
+
+
+def search_condition(termo):
+    """
+    Condição de clientes cujo nome, apelido, email, telefone ou NIF
+    correspondem ao texto pesquisado.
+    """
+    expressao = match_expression(termo)
+    if expressao is None:
+        return None
+    return Cliente.id.in_(
+        select(fts_table.c.rowid).where(
+            literal_column(FTS_TABLE).op("MATCH")(expressao)
+        )
+    )
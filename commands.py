@@ -0,0 +1,250 @@
+import os
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import inspect
+from data_versions import FLEET, bump_version
+from sweeps import (
+    refresh_vehicle_alerts,
+    run_maintenance_sweep,
+    run_reservation_sweep,
+    timed_sweep,
+)
+from reports import refresh_reports
+from images import image_pipeline
+from image_store import fill_dimensions, fingerprint_legacy_images, rebuild_refcounts
+from models import db, VehicleImage
+
+
+@click.group(cls=AppGroup)
+def availability():
+    """
+    Comandos dos índices em memória dos processos do servidor.
+    """
+
+
+@availability.command("rebuild")
+def availability_rebuild():
+    """
+    Pede a todos os processos do servidor que reconstruam os índices em
+    memória (disponibilidade, matriz de ocupação e pesquisa de veículos).
+    """
+    bump_version(FLEET)
+    db.session.commit()
+    click.echo(
+        "Os processos do servidor reconstroem os índices na próxima verificação."
+    )
+
+
+@click.group(cls=AppGroup)
+def sweep():
+    """
+    Execução manual das tarefas periódicas.
+    """
+
+
+@sweep.command("maintenance")
+@click.option("--full", is_flag=True, help="Ignora a marca de água e verifica a frota.")
+def sweep_maintenance(full):
+    """
+    Conclui a manutenção dos veículos cuja data de próxima manutenção passou.
+    """
+    updated = timed_sweep("maintenance", run_maintenance_sweep, full=full)
+    click.echo(f"{updated} veículo(s) saíram de manutenção.")
+
+
+@sweep.command("reservations")
+def sweep_reservations():
+    """
+    Passa a "Concluída" as reservas ativas cuja data de fim já passou.
+    """
+    updated = timed_sweep("reservations", run_reservation_sweep)
+    click.echo(f"{updated} reserva(s) concluída(s).")
+
+
+@sweep.command("reports")
+def sweep_reports():
+    """
+    Recalcula as tabelas dos relatórios de receita e utilização.
+    """
+    rows = timed_sweep("reports", refresh_reports)
+    click.echo(f"Relatórios recalculados: {rows} linha(s).")
+
+
+@click.group(cls=AppGroup)
+def analytics():
+    """
+    Exportações para análise de dados.
+    """
+
+
+@analytics.command("export")
+@click.argument("path", type=click.Path(dir_okay=False, writable=True))
+@click.option(
+    "--format",
+    "formato",
+    type=click.Choice(["parquet", "arrow"]),
+    help="Formato do ficheiro (por omissão, deduzido da extensão).",
+)
+@click.option("--full", is_flag=True, help="Ignora a marca de água e exporta tudo.")
+def analytics_export(path, formato, full):
+    """
+    Exporta as reservas (com veículo, categoria e segmento do cliente) para
+    um ficheiro Parquet ou Arrow. Sem --full, só as alteradas desde a última
+    exportação.
+    """
+    # Importado aqui para o pyarrow só ser carregado quando o comando corre
+    from analytics_export import export_reservations
+
+    if formato is None:
+        extension = os.path.splitext(path)[1].lower()
+        formato = "arrow" if extension in (".arrow", ".feather") else "parquet"
+
+    total = export_reservations(path, formato, full=full)
+    click.echo(f"{total} reserva(s) exportada(s) para {path}.")
+
+
+@click.group(cls=AppGroup)
+def images():
+    """
+    Comandos das imagens dos veículos.
+    """
+
+
+@images.command("backfill")
+@click.option("--force", is_flag=True, help="Gera de novo as variantes existentes.")
+def images_backfill(force):
+    """
+    Gera as variantes redimensionadas das imagens já existentes e preenche
+    as dimensões das imagens que ainda não as têm.
+    """
+    filenames = [path for (path,) in db.session.query(VehicleImage.path).distinct()]
+
+    geradas = falhas = 0
+    for filename, error in image_pipeline.backfill(filenames, force=force):
+        if error:
+            falhas += 1
+            click.echo(f"{filename}: {error}")
+        else:
+            geradas += 1
+
+    click.echo(f"Variantes geradas para {geradas} imagem(ns); {falhas} falha(s).")
+    click.echo(f"Dimensões preenchidas para {fill_dimensions()} imagem(ns).")
+
+
+@images.command("fingerprint")
+def images_fingerprint():
+    """
+    Passa as imagens antigas para nomes dados pelo conteúdo, junta as
+    repetidas, recalcula a contagem de referências e gera as variantes.
+    """
+    convertidas, em_falta = fingerprint_legacy_images()
+    click.echo(f"{convertidas} imagem(ns) convertida(s); {em_falta} em falta.")
+
+    filenames = [path for (path,) in db.session.query(VehicleImage.path).distinct()]
+    falhas = sum(error is not None for _, error in image_pipeline.backfill(filenames))
+    click.echo(f"Variantes em falta geradas; {falhas} falha(s).")
+
+
+@images.command("refcounts")
+def images_refcounts():
+    """
+    Recalcula a contagem de referências das imagens a partir dos veículos.
+    """
+    click.echo(f"{rebuild_refcounts()} imagem(ns) em uso.")
+
+
+@click.command("create-db")
+@with_appcontext
+def create_db():
+    """
+    Cria as tabelas de uma base de dados nova e marca-a com a última
+    migração. Numa base de dados existente usa-se flask db upgrade.
+    """
+    from flask_migrate import stamp
+
+    if inspect(db.engine).get_table_names():
+        raise click.ClickException(
+            "A base de dados já tem tabelas: use flask db upgrade."
+        )
+
+    db.create_all()
+    stamp()
+    click.echo("Tabelas criadas e base de dados marcada com a última migração.")
+
+
+@click.command("seed")
+@click.option("--vehicles", default=500, show_default=True, help="Veículos a criar.")
+@click.option("--clients", default=2000, show_default=True, help="Clientes a criar.")
+@click.option(
+    "--history-days",
+    default=365,
+    show_default=True,
+    help="Dias de histórico de reservas até hoje.",
+)
+@click.option(
+    "--future-days",
+    default=90,
+    show_default=True,
+    help="Dias de reservas já feitas a partir de hoje.",
+)
+@click.option("--seed", default=42, show_default=True, help="Semente aleatória.")
+@with_appcontext
+def seed(vehicles, clients, history_days, future_days, seed):
+    """
+    Preenche a base de dados com uma frota, clientes e histórico de reservas
+    sintéticos (para desenvolvimento e benchmarks), acrescentados aos dados
+    existentes, e recalcula os alertas e os relatórios.
+    """
+    from seed import seed_database
+
+    counts = seed_database(vehicles, clients, history_days, future_days, seed)
+    refresh_vehicle_alerts()
+    refresh_reports()
+    click.echo(
+        f"{counts['veiculos']} veículo(s), {counts['clientes']} cliente(s) e "
+        f"{counts['reservas']} reserva(s) criados."
+    )
+
+
+@click.group(cls=AppGroup)
+def scheduler():
+    """
+    Serviços em segundo plano (tarefas periódicas).
+    """
+
+
+@scheduler.command("run")
+def scheduler_run():
+    """
+    Corre o scheduler das tarefas periódicas em primeiro plano, num processo
+    próprio (em alternativa a BACKGROUND_SERVICES=1 nos servidores).
+    """
+    from background import build_scheduler, refresh_stale_alerts, stop_scheduler
+
+    app = current_app._get_current_object()
+    refresh_stale_alerts(app)
+    blocking_scheduler = build_scheduler(app, blocking=True)
+    click.echo("Scheduler a correr (Ctrl+C para terminar).")
+    try:
+        blocking_scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        stop_scheduler(app, blocking_scheduler)
+
+
+def register_commands(app):
+    """
+    Regista os comandos de linha de comando (flask ...) na aplicação.
+    """
+    for command in [
+        availability,
+        sweep,
+        analytics,
+        images,
+        create_db,
+        seed,
+        scheduler,
+    ]:
+        app.cli.add_command(command)
@@ -9,12 +9,31 @@ db_path = os.path.join(db_folder, "database.db")
 if not os.path.exists(db_folder):
     os.makedirs(db_folder)
 
+# Ficheiros gerados pelas exportações em segundo plano
+exports_folder = os.path.join(db_folder, "exports")
+
 # Cria o diretório "static/images" se não existir
 static_images_folder = os.path.join(os.path.dirname(__file__), "static/images")
 if not os.path.exists(static_images_folder):
     os.makedirs(static_images_folder)
 
 
+# Perfis de desempenho do SQLite: PRAGMAs aplicados a cada nova ligação.
+# "default" mantém as definições do SQLite (journal em modo rollback);
+# "tuned" usa WAL, para que as leituras não fiquem bloqueadas pelas escritas.
+SQLITE_PROFILES = {
+    "default": {},
+    "tuned": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -64000,  # em KiB (64 MiB)
+        "mmap_size": 268435456,  # 256 MiB
+        "temp_store": "MEMORY",
+    },
+}
+
+
 class Config:
     """
     Configurações da aplicação Flask.
@@ -22,10 +41,40 @@ class Config:
 
     SECRET_KEY = "sua_chave_secreta_aqui"
     TIMEZONE = pytz.timezone("Europe/Lisbon")
-    SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", f"sqlite:///{db_path}")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLITE_PROFILE = os.environ.get("SQLITE_PROFILE", "tuned")
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+    }
     UPLOAD_FOLDER = static_images_folder
 
+    # Exportações em segundo plano: threads em simultâneo e tempo (em
+    # segundos) durante o qual um ficheiro gerado é reutilizado
+    EXPORT_WORKERS = 2
+    EXPORT_CACHE_DIR = os.environ.get("EXPORT_CACHE_DIR", exports_folder)
+    EXPORT_CACHE_TTL = 600
+
+    # Processos usados para gerar as variantes redimensionadas das imagens
+    IMAGE_WORKERS = 2
+
+    # Cache dos clientes autenticados: validade (em segundos) de cada
+    # entrada e número máximo de clientes guardados
+    USER_CACHE_TTL = 300
+    USER_CACHE_SIZE = 10000
+
+    # Serviços em segundo plano (scheduler das tarefas periódicas): só
+    # arrancam nos processos com BACKGROUND_SERVICES=1
+    BACKGROUND_SERVICES = os.environ.get("BACKGROUND_SERVICES", "0") == "1"
+
+    # Eleição do líder do scheduler: só o processo com a concessão corre as
+    # tarefas; a concessão dura SCHEDULER_LEASE_TTL segundos e é renovada a
+    # cada SCHEDULER_LEASE_RENEW segundos
+    SCHEDULER_LEASE_TTL = 60
+    SCHEDULER_LEASE_RENEW = 20
+
     # Configurações do Bootstrap
     BOOTSTRAP_BOOTSWATCH_THEME = "yeti"
     BOOTSTRAP_USE_MINIFIED = True
@@ -47,3 +96,29 @@ class Config:
         "fas fa-car",
         "fas fa-motorcycle",
     ]
+
+
+class DevelopmentConfig(Config):
+    """
+    Configurações para desenvolvimento local (servidor do Flask).
+    """
+
+
+class ProductionConfig(Config):
+    """
+    Configurações para produção, com servidores de várias threads.
+    """
+
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": 20,
+        "max_overflow": 10,
+        "pool_timeout": 10,
+        "pool_recycle": 3600,
+    }
+
+
+# Configuração escolhida pela variável de ambiente APP_ENV
+config_by_name = {
+    "development": DevelopmentConfig,
+    "production": ProductionConfig,
+}
@@ -0,0 +1,123 @@
+from sqlalchemy import event
+from models import db, DataVersion
+
+# Reservas criadas ou alteradas: cada processo aplica-as aos seus índices em
+# memória a partir da data de alteração (updated_at)
+RESERVATIONS = "reservas"
+
+# Veículos, categorias e reservas apagadas: não podem ser acompanhados pela
+# data de alteração, por isso os índices em memória são reconstruídos
+FLEET = "frota"
+
+# Os triggers contam todas as escritas, de qualquer processo, incluindo as
+# feitas em lote e fora do ORM. Nos veículos só contam as colunas usadas nos
+# índices (registar uma utilização não obriga a reconstruí-los)
+CREATE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS reservation_version_insert
+    AFTER INSERT ON reservation BEGIN
+        UPDATE data_versions SET version = version + 1 WHERE name = '{RESERVATIONS}';
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS reservation_version_update
+    AFTER UPDATE OF status, start_date, end_date, fk_reservation_vehicle
+    ON reservation BEGIN
+        UPDATE data_versions SET version = version + 1 WHERE name = '{RESERVATIONS}';
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS reservation_version_delete
+    AFTER DELETE ON reservation BEGIN
+        UPDATE data_versions SET version = version + 1 WHERE name = '{FLEET}';
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS veiculos_version_insert
+    AFTER INSERT ON veiculos BEGIN
+        UPDATE data_versions SET version = version + 1 WHERE name = '{FLEET}';
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS veiculos_version_update
+    AFTER UPDATE OF type, brand, model, status, in_maintenance, available_from,
+        categoria_id
+    ON veiculos BEGIN
+        UPDATE data_versions SET version = version + 1 WHERE name = '{FLEET}';
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS veiculos_version_delete
+    AFTER DELETE ON veiculos BEGIN
+        UPDATE data_versions SET version = version + 1 WHERE name = '{FLEET}';
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS categorias_version_update
+    AFTER UPDATE OF nome ON categorias BEGIN
+        UPDATE data_versions SET version = version + 1 WHERE name = '{FLEET}';
+    END
+    """,
+]
+
+DROP_STATEMENTS = [
+    "DROP TRIGGER IF EXISTS categorias_version_update",
+    "DROP TRIGGER IF EXISTS veiculos_version_delete",
+    "DROP TRIGGER IF EXISTS veiculos_version_update",
+    "DROP TRIGGER IF EXISTS veiculos_version_insert",
+    "DROP TRIGGER IF EXISTS reservation_version_delete",
+    "DROP TRIGGER IF EXISTS reservation_version_update",
+    "DROP TRIGGER IF EXISTS reservation_version_insert",
+]
+
+
+def create_version_triggers(connection):
+    """
+    Cria as linhas dos contadores e os triggers (se ainda não existirem).
+    """
+    for name in (RESERVATIONS, FLEET):
+        connection.exec_driver_sql(
+            "INSERT OR IGNORE INTO data_versions (name, version) VALUES (?, 0)",
+            (name,),
+        )
+    for statement in CREATE_TRIGGERS:
+        connection.exec_driver_sql(statement)
+
+
+def drop_version_triggers(connection):
+    """
+    Remove os triggers dos contadores.
+    """
+    for statement in DROP_STATEMENTS:
+        connection.exec_driver_sql(statement)
+
+
+def bump_version(name):
+    """
+    Incrementa um contador (sem fazer commit), para que os outros processos
+    atualizem os seus índices na próxima verificação.
+    """
+    db.session.query(DataVersion).filter(DataVersion.name == name).update(
+        {DataVersion.version: DataVersion.version + 1}
+    )
+
+
+def read_versions():
+    """
+    Lê os contadores: {nome: versão}.
+    """
+    return dict(
+        db.session.query(DataVersion.name, DataVersion.version).filter(
+            DataVersion.name.in_([RESERVATIONS, FLEET])
+        )
+    )
+
+
+@event.listens_for(db.metadata, "after_create")
+def _create_triggers_with_tables(target, connection, **kwargs):
+    """
+    Cria os triggers quando db.create_all() cria as tabelas (depois de todas
+    existirem, porque dependem das tabelas das reservas e dos veículos).
+    """
+    if connection.dialect.name == "sqlite":
+        create_version_triggers(connection)
@@ -0,0 +1,308 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from exports import (
+    EXCEL_CONTENT_TYPE,
+    count_rows,
+    export_sheet,
+    stream_csv,
+    write_excel,
+)
+
+PENDING = "Em espera"
+RUNNING = "Em curso"
+DONE = "Concluída"
+FAILED = "Erro"
+
+FORMATS = {
+    "csv": ("csv", "text/csv"),
+    "excel": ("xlsx", EXCEL_CONTENT_TYPE),
+}
+
+# Intervalo mínimo (em segundos) entre gravações do progresso de um trabalho
+PROGRESS_SAVE_INTERVAL = 0.5
+
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+class ExportJob:
+    """
+    Uma exportação pedida pelo administrador e o seu progresso.
+    """
+
+    def __init__(self, formato, folhas, filtros, key):
+        self.id = uuid.uuid4().hex
+        self.formato = formato
+        self.folhas = folhas
+        self.filtros = filtros
+        self.key = key
+        self.status = PENDING
+        self.done = 0
+        self.total = None
+        self.path = None
+        self.error = None
+        self.cached = False
+        self.created = time.time()
+        self.finished = None
+
+    @property
+    def extension(self):
+        return FORMATS[self.formato][0]
+
+    @property
+    def content_type(self):
+        return FORMATS[self.formato][1]
+
+    @property
+    def filename(self):
+        return f"{'_'.join(self.folhas)}.{self.extension}"
+
+    @property
+    def progress(self):
+        """
+        Percentagem de linhas já escritas (100 quando terminou).
+        """
+        if self.status == DONE:
+            return 100
+        if not self.total:
+            return 0
+        return min(99, int(self.done * 100 / self.total))
+
+    def to_record(self):
+        """
+        Estado do trabalho para o ficheiro de metadados.
+        """
+        return dict(vars(self))
+
+    @classmethod
+    def from_record(cls, record):
+        job = cls.__new__(cls)
+        job.__dict__.update(record)
+        return job
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "formato": self.formato,
+            "folhas": self.folhas,
+            "status": self.status,
+            "linhas": self.done,
+            "total": self.total,
+            "progresso": self.progress,
+            "cache": self.cached,
+            "erro": self.error,
+        }
+
+
+class ExportJobQueue:
+    """
+    Fila de exportações em segundo plano.
+
+    As exportações correm num conjunto limitado de threads (EXPORT_WORKERS),
+    para que não ocupem os workers do servidor nem concorram com as reservas.
+    O ficheiro gerado fica em EXPORT_CACHE_DIR durante EXPORT_CACHE_TTL
+    segundos; um pedido igual nesse período reutiliza-o sem o gerar de novo.
+    O estado de cada trabalho fica num ficheiro de metadados ({id}.job.json)
+    na mesma pasta, para que o progresso e a descarga possam ser pedidos a
+    qualquer processo do servidor.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._running = {}
+
+    @property
+    def cache_dir(self):
+        return current_app.config["EXPORT_CACHE_DIR"]
+
+    @property
+    def ttl(self):
+        return current_app.config["EXPORT_CACHE_TTL"]
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=current_app.config["EXPORT_WORKERS"],
+                thread_name_prefix="export",
+            )
+        return self._executor
+
+    @staticmethod
+    def cache_key(formato, folhas, filtros):
+        """
+        Chave do ficheiro gerado: o mesmo formato, folhas e filtros dão o
+        mesmo ficheiro.
+        """
+        data = json.dumps([formato, folhas, filtros], sort_keys=True, default=str)
+        return hashlib.sha256(data.encode()).hexdigest()[:32]
+
+    @staticmethod
+    def _job_path(cache_dir, job_id):
+        return os.path.join(cache_dir, f"{job_id}.job.json")
+
+    def _save(self, job, cache_dir):
+        """
+        Grava o estado do trabalho (substituindo o ficheiro de uma só vez,
+        para que outro processo nunca leia um ficheiro incompleto).
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        path = self._job_path(cache_dir, job.id)
+        partial = f"{path}.{threading.get_ident()}.part"
+        with open(partial, "w", encoding="utf-8") as output:
+            json.dump(job.to_record(), output, default=str)
+        os.replace(partial, path)
+
+    def _cached_path(self, key, extension):
+        """
+        Caminho do ficheiro em cache, se existir e ainda estiver dentro do TTL.
+        """
+        path = os.path.join(self.cache_dir, f"{key}.{extension}")
+        try:
+            if time.time() - os.path.getmtime(path) < self.ttl:
+                return path
+        except OSError:
+            pass
+        return None
+
+    def submit(self, formato, folhas, filtros):
+        """
+        Pede uma exportação e devolve o trabalho criado (ou o trabalho igual
+        que ainda está a correr).
+        """
+        if formato not in FORMATS:
+            raise ValueError("Formato de exportação desconhecido.")
+        if formato == "csv" and len(folhas) != 1:
+            raise ValueError("A exportação CSV tem de ter exatamente uma folha.")
+
+        self.purge()
+        key = self.cache_key(formato, folhas, filtros)
+        with self._lock:
+            running = self._running.get(key)
+            if running is not None:
+                return running
+
+            job = ExportJob(formato, folhas, filtros, key)
+            path = self._cached_path(key, job.extension)
+            if path:
+                job.path = path
+                job.cached = True
+                job.status = DONE
+                job.finished = time.time()
+                self._save(job, self.cache_dir)
+                return job
+
+            self._save(job, self.cache_dir)
+            self._running[key] = job
+
+        self._get_executor().submit(self._run, job, current_app._get_current_object())
+        return job
+
+    def get(self, job_id):
+        """
+        Lê o estado de um trabalho (de qualquer processo); None se não existir.
+        """
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            return None
+        try:
+            with open(self._job_path(self.cache_dir, job_id), encoding="utf-8") as file:
+                return ExportJob.from_record(json.load(file))
+        except (OSError, ValueError):
+            return None
+
+    def jobs(self):
+        """
+        Trabalhos conhecidos, do mais recente para o mais antigo.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return []
+        jobs = [
+            self.get(name[: -len(".job.json")])
+            for name in os.listdir(self.cache_dir)
+            if name.endswith(".job.json")
+        ]
+        return sorted(
+            (job for job in jobs if job is not None),
+            key=lambda job: job.created,
+            reverse=True,
+        )
+
+    def _tracked(self, job, rows, cache_dir):
+        saved = time.monotonic()
+        for row in rows:
+            job.done += 1
+            if time.monotonic() - saved >= PROGRESS_SAVE_INTERVAL:
+                self._save(job, cache_dir)
+                saved = time.monotonic()
+            yield row
+
+    def _run(self, job, app):
+        """
+        Gera o ficheiro de um trabalho (numa thread da fila, com um contexto
+        próprio da aplicação).
+        """
+        job.status = RUNNING
+        cache_dir = app.config["EXPORT_CACHE_DIR"]
+        self._save(job, cache_dir)
+        path = os.path.join(cache_dir, f"{job.key}.{job.extension}")
+        partial = f"{path}.{job.id}.part"
+
+        try:
+            with app.app_context():
+                sheets = [export_sheet(folha, **job.filtros) for folha in job.folhas]
+                job.total = sum(count_rows(query) for _, _, query, _ in sheets)
+                self._save(job, cache_dir)
+                tracked = [
+                    (title, header, self._tracked(job, rows, cache_dir))
+                    for title, header, _, rows in sheets
+                ]
+                if job.formato == "csv":
+                    _, header, rows = tracked[0]
+                    with open(partial, "w", newline="", encoding="utf-8") as output:
+                        for chunk in stream_csv(header, rows):
+                            output.write(chunk)
+                else:
+                    with open(partial, "wb") as output:
+                        write_excel(output, tracked)
+            os.replace(partial, path)
+            job.path = path
+            job.status = DONE
+        except Exception as error:
+            app.logger.exception("Exportação %s falhou", job.id)
+            job.error = str(error)
+            job.status = FAILED
+            if os.path.exists(partial):
+                os.remove(partial)
+        finally:
+            job.finished = time.time()
+            self._save(job, cache_dir)
+            with self._lock:
+                self._running.pop(job.key, None)
+
+    def purge(self):
+        """
+        Apaga os ficheiros gerados e os metadados dos trabalhos com mais tempo
+        do que o TTL (os de um trabalho em curso são regravados com o
+        progresso).
+        """
+        limit = time.time() - self.ttl
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if name.endswith(".part"):
+                    continue
+                if os.path.getmtime(path) < limit:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+export_queue = ExportJobQueue()
@@ -0,0 +1,389 @@
+import csv
+import tempfile
+from datetime import date, time
+from flask import Response, stream_with_context
+from sqlalchemy import func, select
+from models import db, Veiculo, Cliente, Reservation, Categoria
+
+# Linhas lidas da base de dados de cada vez e linhas CSV enviadas por bloco
+YIELD_PER = 1000
+CSV_CHUNK_ROWS = 500
+EXCEL_CHUNK_BYTES = 64 * 1024
+EXCEL_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+VEHICLE_HEADER = [
+    "ID",
+    "Tipo",
+    "Marca",
+    "Modelo",
+    "Ano",
+    "Diária (€)",
+    "Categoria",
+    "Status",
+    "Em Manutenção",
+    "Próxima Manutenção",
+    "Próxima Legalização",
+]
+
+CLIENT_HEADER = [
+    "ID",
+    "Nome",
+    "Apelido",
+    "Email",
+    "Telefone",
+    "Data de Nascimento",
+    "Morada",
+    "NIF",
+    "Categoria",
+]
+
+RESERVATION_HEADER = [
+    "ID",
+    "Cliente",
+    "Email",
+    "Veículo",
+    "Status",
+    "Data de Início",
+    "Hora de Início",
+    "Data de Fim",
+    "Hora de Fim",
+    "Duração (dias)",
+    "Preço (€)",
+]
+
+RESERVATION_STATUSES = ["Ativa", "Concluída", "Cancelada"]
+
+
+def stream_rows(statement, formatter):
+    """
+    Executa a consulta lendo YIELD_PER linhas de cada vez e devolve cada linha
+    convertida por formatter, sem carregar a tabela inteira em memória.
+    """
+    result = db.session.execute(statement.execution_options(yield_per=YIELD_PER))
+    for row in result:
+        yield formatter(row)
+
+
+def count_rows(statement):
+    """
+    Número de linhas que uma consulta de exportação vai devolver.
+    """
+    return db.session.execute(
+        select(func.count()).select_from(statement.order_by(None).subquery())
+    ).scalar()
+
+
+def vehicle_query():
+    """
+    Consulta da exportação de veículos, com a categoria obtida no mesmo JOIN.
+    """
+    return (
+        select(
+            Veiculo.id,
+            Veiculo.type,
+            Veiculo.brand,
+            Veiculo.model,
+            Veiculo.year,
+            Veiculo.price_per_day,
+            Categoria.nome,
+            Veiculo.status,
+            Veiculo.in_maintenance,
+            Veiculo.next_maintenance_date,
+            Veiculo.next_legalization_date,
+        )
+        .join(Categoria, Veiculo.categoria_id == Categoria.id)
+        .order_by(Veiculo.id)
+    )
+
+
+def vehicle_rows():
+    """
+    Linhas da exportação de veículos.
+    """
+
+    def formatter(row):
+        (
+            vehicle_id,
+            tipo,
+            brand,
+            model,
+            year,
+            price_per_day,
+            categoria,
+            status,
+            in_maintenance,
+            next_maintenance_date,
+            next_legalization_date,
+        ) = row
+        return [
+            vehicle_id,
+            tipo.value,
+            brand,
+            model,
+            year,
+            price_per_day,
+            categoria,
+            "Disponível" if status else "Indisponível",
+            "Sim" if in_maintenance else "Não",
+            next_maintenance_date,
+            next_legalization_date,
+        ]
+
+    return stream_rows(vehicle_query(), formatter)
+
+
+def client_query(categoria=None):
+    """
+    Consulta da exportação de clientes (sem a palavra-passe), opcionalmente
+    só de uma categoria.
+    """
+    statement = select(
+        Cliente.id,
+        Cliente.nome,
+        Cliente.apelido,
+        Cliente.email,
+        Cliente.telefone,
+        Cliente.data_nascimento,
+        Cliente.morada,
+        Cliente.nif,
+        Cliente.categoria,
+    ).order_by(Cliente.id)
+    if categoria:
+        statement = statement.where(Cliente.categoria == categoria)
+    return statement
+
+
+def client_rows(categoria=None):
+    """
+    Linhas da exportação de clientes.
+    """
+    return stream_rows(client_query(categoria), list)
+
+
+def reservation_query(data_inicio=None, data_fim=None, status=None):
+    """
+    Consulta da exportação de reservas, com o cliente e o veículo obtidos no
+    mesmo JOIN. Filtra pela data de início (entre data_inicio e data_fim,
+    inclusive) e pelo status.
+    """
+    statement = (
+        select(
+            Reservation.id,
+            Cliente.nome,
+            Cliente.apelido,
+            Cliente.email,
+            Veiculo.brand,
+            Veiculo.model,
+            Reservation.status,
+            Reservation.start_date,
+            Reservation.start_time,
+            Reservation.end_date,
+            Reservation.end_time,
+            Reservation.duration,
+            Reservation.price,
+        )
+        .join(Cliente, Reservation.customer_id == Cliente.id)
+        .join(Veiculo, Reservation.vehicle_id == Veiculo.id)
+        .order_by(Reservation.id)
+    )
+    if data_inicio:
+        statement = statement.where(Reservation.start_date >= data_inicio)
+    if data_fim:
+        statement = statement.where(Reservation.start_date <= data_fim)
+    if status:
+        statement = statement.where(Reservation.status == status)
+    return statement
+
+
+def reservation_rows(data_inicio=None, data_fim=None, status=None):
+    """
+    Linhas da exportação de reservas.
+    """
+
+    def formatter(row):
+        reservation_id, nome, apelido, email, brand, model, *resto = row
+        return [reservation_id, f"{nome} {apelido}", email, f"{brand} {model}", *resto]
+
+    return stream_rows(reservation_query(data_inicio, data_fim, status), formatter)
+
+
+EXPORT_SHEETS = ["veiculos", "reservas", "clientes"]
+
+
+def export_sheet(folha, categoria=None, data_inicio=None, data_fim=None, status=None):
+    """
+    Devolve (título, cabeçalho, consulta, linhas) de uma folha de exportação.
+    A consulta serve para contar as linhas; as linhas são lidas em lotes.
+    """
+    if folha == "veiculos":
+        return "Veículos", VEHICLE_HEADER, vehicle_query(), vehicle_rows()
+    if folha == "clientes":
+        return (
+            "Clientes",
+            CLIENT_HEADER,
+            client_query(categoria),
+            client_rows(categoria),
+        )
+    if folha == "reservas":
+        return (
+            "Reservas",
+            RESERVATION_HEADER,
+            reservation_query(data_inicio, data_fim, status),
+            reservation_rows(data_inicio, data_fim, status),
+        )
+    raise ValueError(f"Folha de exportação desconhecida: {folha}")
+
+
+def csv_value(value):
+    """
+    Formata um valor para o CSV (datas no formato dd/mm/aaaa).
+    """
+    if value is None:
+        return ""
+    if isinstance(value, date):
+        return value.strftime("%d/%m/%Y")
+    if isinstance(value, time):
+        return value.strftime("%H:%M")
+    return value
+
+
+class _Line:
+    """
+    Destino do csv.writer que devolve a linha escrita em vez de a guardar.
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows):
+    """
+    Gera o CSV em blocos de CSV_CHUNK_ROWS linhas, à medida que as linhas
+    são lidas da base de dados.
+    """
+    writer = csv.writer(_Line())
+    yield writer.writerow(header)
+
+    chunk = []
+    for row in rows:
+        chunk.append(writer.writerow([csv_value(value) for value in row]))
+        if len(chunk) >= CSV_CHUNK_ROWS:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def csv_response(filename, header, rows):
+    """
+    Resposta que envia o CSV enquanto é gerado: o primeiro byte sai logo e a
+    memória usada não depende do número de linhas.
+    """
+    response = Response(
+        stream_with_context(stream_csv(header, rows)), content_type="text/csv"
+    )
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+
+def excel_styles():
+    """
+    Estilos com nome usados nas folhas Excel: o cabeçalho branco sobre cinzento
+    escuro e as células centradas (com formato próprio para datas e horas).
+    """
+    from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+
+    centered = Alignment(horizontal="center", vertical="center")
+    return [
+        NamedStyle(
+            name="cabecalho",
+            font=Font(bold=True, color="FFFFFFFF"),
+            fill=PatternFill(
+                start_color="333333", end_color="333333", fill_type="solid"
+            ),
+            alignment=centered,
+        ),
+        NamedStyle(name="celula", alignment=centered),
+        NamedStyle(name="celula_data", alignment=centered, number_format="DD/MM/YYYY"),
+        NamedStyle(name="celula_hora", alignment=centered, number_format="HH:MM"),
+    ]
+
+
+class _SheetCells:
+    """
+    Cria as células de uma folha em modo write-only com o estilo certo.
+    """
+
+    def __init__(self, ws):
+        from openpyxl.cell import WriteOnlyCell
+
+        self.ws = ws
+        self._cell_class = WriteOnlyCell
+
+    def cell(self, value, style):
+        cell = self._cell_class(self.ws, value=value)
+        cell.style = style
+        return cell
+
+    def header(self, values):
+        return [self.cell(value, "cabecalho") for value in values]
+
+    def row(self, values):
+        cells = []
+        for value in values:
+            if isinstance(value, date):
+                cells.append(self.cell(value, "celula_data"))
+            elif isinstance(value, time):
+                cells.append(self.cell(value, "celula_hora"))
+            else:
+                cells.append(self.cell(value, "celula"))
+        return cells
+
+
+def write_excel(target, sheets):
+    """
+    Escreve um livro Excel com uma folha por (título, cabeçalho, linhas),
+    numa única passagem e em modo write-only: as linhas vão sendo escritas
+    em disco pelo openpyxl e não ficam em memória.
+    """
+    # Importado aqui para o openpyxl só ser carregado na primeira exportação
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for style in excel_styles():
+        wb.add_named_style(style)
+
+    for title, header, rows in sheets:
+        ws = wb.create_sheet(title)
+        cells = _SheetCells(ws)
+        ws.append(cells.header(header))
+        for row in rows:
+            ws.append(cells.row(row))
+
+    wb.save(target)
+
+
+def _file_chunks(file):
+    """
+    Lê um ficheiro em blocos e fecha-o no fim (os temporários são apagados).
+    """
+    with file:
+        while True:
+            chunk = file.read(EXCEL_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+
+def excel_response(filename, sheets):
+    """
+    Resposta com o livro Excel gerado num ficheiro temporário e enviado em
+    blocos, sem nunca ter o ficheiro inteiro em memória.
+    """
+    output = tempfile.TemporaryFile()
+    write_excel(output, sheets)
+    output.seek(0)
+
+    response = Response(_file_chunks(output), content_type=EXCEL_CONTENT_TYPE)
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
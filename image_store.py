@@ -0,0 +1,290 @@
+import hashlib
+import os
+import re
+import tempfile
+from flask import current_app
+from PIL import Image
+from sqlalchemy import delete, exists, func, or_, select, update
+from sqlalchemy.dialects.sqlite import insert
+from werkzeug.utils import secure_filename
+from models import db, VehicleImage, StoredImage
+from images import image_pipeline
+
+# Nome de uma imagem guardada pelo conteúdo: ab/ab12...ef.jpg (SHA-256)
+CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{64}\.[a-z0-9]+$")
+
+# As imagens guardadas pelo conteúdo e as suas variantes
+# (variants/ab/ab12...ef.jpg/card.webp) nunca mudam de conteúdo
+IMMUTABLE = re.compile(
+    r"^(variants/)?[0-9a-f]{2}/[0-9a-f]{64}\.[a-z0-9]+(/\w+\.[a-z]+)?$"
+)
+
+# Tempo (em segundos) que o browser guarda essas imagens em cache
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+CHUNK_BYTES = 64 * 1024
+
+
+def is_content_addressed(path):
+    """
+    Verifica se o caminho é o de uma imagem guardada pelo conteúdo.
+    """
+    return CONTENT_ADDRESSED.match(path) is not None
+
+
+def is_immutable(filename):
+    """
+    Verifica se um ficheiro da pasta das imagens pode ser guardado em cache
+    sem revalidação.
+    """
+    return IMMUTABLE.match(filename) is not None
+
+
+def _extension(filename):
+    extension = os.path.splitext(secure_filename(filename or ""))[1].lower()
+    return ".jpg" if extension == ".jpeg" else extension or ".bin"
+
+
+def _write_temporary(stream, filename):
+    """
+    Copia o conteúdo para um ficheiro temporário na pasta das imagens.
+    Devolve (ficheiro temporário, caminho dado pelo hash do conteúdo).
+    """
+    folder = current_app.config["UPLOAD_FOLDER"]
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=folder, delete=False) as output:
+        for chunk in iter(lambda: stream.read(CHUNK_BYTES), b""):
+            digest.update(chunk)
+            output.write(chunk)
+
+    hexdigest = digest.hexdigest()
+    return output.name, f"{hexdigest[:2]}/{hexdigest}{_extension(filename)}"
+
+
+def _place(temporary, path):
+    """
+    Move o ficheiro temporário para o caminho final, ou apaga-o se já
+    existir um ficheiro com o mesmo conteúdo (que é reutilizado).
+    Devolve True se o ficheiro foi criado.
+    """
+    full_path = os.path.join(current_app.config["UPLOAD_FOLDER"], path)
+    if os.path.exists(full_path):
+        os.remove(temporary)
+        return False
+
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    os.replace(temporary, full_path)
+    return True
+
+
+def _store(stream, filename):
+    """
+    Copia o conteúdo para a pasta das imagens com o nome dado pelo seu hash.
+    Devolve (caminho, criado); criado é False se já existia um ficheiro com
+    o mesmo conteúdo (que é reutilizado).
+    """
+    temporary, path = _write_temporary(stream, filename)
+    return path, _place(temporary, path)
+
+
+def save_upload(imagem):
+    """
+    Guarda uma imagem enviada pelo formulário pelo seu conteúdo e regista
+    mais uma referência a ela (com commit). Devolve o caminho relativo à
+    pasta das imagens; uma imagem igual a outra já guardada reutiliza o
+    mesmo ficheiro. Se a imagem acabar por não ser usada, a referência tem
+    de ser libertada com release.
+
+    O ficheiro é colocado e a referência registada numa transação aberta
+    com BEGIN IMMEDIATE, o mesmo bloqueio de escrita que remove_files obtém
+    antes de apagar: um ficheiro reutilizado não pode ser apagado por um
+    pedido que libertou a última referência ao mesmo tempo.
+    """
+    temporary, path = _write_temporary(imagem.stream, imagem.filename)
+
+    # Uma imagem anterior à contagem de referências começa com o número de
+    # veículos que já a usam
+    existing = (
+        select(func.count(func.distinct(VehicleImage.vehicle_id)) + 1)
+        .where(VehicleImage.path == path)
+        .scalar_subquery()
+    )
+    statement = (
+        insert(StoredImage)
+        .values(path=path, refcount=existing)
+        .on_conflict_do_update(
+            index_elements=[StoredImage.path],
+            set_={"refcount": StoredImage.refcount + 1},
+        )
+    )
+    with db.engine.connect() as connection:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        _place(temporary, path)
+        connection.execute(statement)
+        connection.commit()
+    return path
+
+
+def image_size(path):
+    """
+    Dimensões (largura, altura) de uma imagem guardada, lidas do cabeçalho
+    do ficheiro; (None, None) se não for uma imagem válida.
+    """
+    try:
+        with Image.open(
+            os.path.join(current_app.config["UPLOAD_FOLDER"], path)
+        ) as image:
+            return image.size
+    except (OSError, ValueError):
+        return None, None
+
+
+def generate_missing_variants(paths):
+    """
+    Pede a geração das variantes das imagens que ainda não as têm (uma
+    imagem repetida já tem as variantes da primeira cópia).
+    """
+    for path in paths:
+        if image_pipeline.manifest(path) is None:
+            image_pipeline.submit(path)
+
+
+def release(paths):
+    """
+    Regista que um veículo deixou de usar as imagens (sem fazer commit).
+    Devolve as imagens que deixaram de ser usadas, para serem apagadas com
+    remove_files depois do commit.
+    """
+    orphans = []
+    for path in paths:
+        # Decremento na base de dados (e não no objeto lido antes), para não
+        # perder uma referência registada entretanto por save_upload
+        released = db.session.execute(
+            update(StoredImage)
+            .where(StoredImage.path == path)
+            .values(refcount=StoredImage.refcount - 1)
+        ).rowcount
+        if not released:
+            # Imagem anterior à contagem de referências: conta os veículos
+            if _count_references(path) <= 1:
+                orphans.append(path)
+            continue
+        refcount = db.session.execute(
+            select(StoredImage.refcount).where(StoredImage.path == path)
+        ).scalar()
+        if refcount <= 0:
+            db.session.execute(delete(StoredImage).where(StoredImage.path == path))
+            orphans.append(path)
+    return orphans
+
+
+def _count_references(path):
+    """
+    Número de veículos com a imagem path.
+    """
+    return (
+        db.session.query(func.count(func.distinct(VehicleImage.vehicle_id)))
+        .filter(VehicleImage.path == path)
+        .scalar()
+    )
+
+
+def remove_files(paths):
+    """
+    Apaga do disco as imagens (e as suas variantes) que ninguém usa.
+
+    Com o bloqueio de escrita (BEGIN IMMEDIATE, como em save_upload), volta
+    a verificar se a imagem ficou sem referências: outro pedido pode tê-la
+    guardado de novo depois de release a dar como órfã.
+    """
+    if not paths:
+        return
+    folder = current_app.config["UPLOAD_FOLDER"]
+    with db.engine.connect() as connection:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        for path in paths:
+            in_use = connection.execute(
+                select(
+                    or_(
+                        exists().where(
+                            StoredImage.path == path, StoredImage.refcount > 0
+                        ),
+                        exists().where(VehicleImage.path == path),
+                    )
+                )
+            ).scalar()
+            if in_use:
+                continue
+            image_pipeline.remove(path)
+            try:
+                os.remove(os.path.join(folder, path))
+            except FileNotFoundError:
+                pass
+        connection.commit()
+
+
+def rebuild_refcounts():
+    """
+    Recalcula a contagem de referências de todas as imagens a partir das
+    imagens dos veículos. Devolve o número de imagens em uso.
+    """
+    counts = db.session.query(
+        VehicleImage.path, func.count(func.distinct(VehicleImage.vehicle_id))
+    ).group_by(VehicleImage.path)
+    counts = dict(counts.all())
+
+    db.session.query(StoredImage).delete()
+    db.session.add_all(
+        StoredImage(path=path, refcount=count) for path, count in counts.items()
+    )
+    db.session.commit()
+    return len(counts)
+
+
+def fingerprint_legacy_images():
+    """
+    Passa as imagens guardadas pelo nome original para nomes dados pelo
+    conteúdo, juntando as repetidas, e atualiza os veículos. As variantes
+    antigas são apagadas (geram-se de novo com image_pipeline.backfill).
+    Devolve (imagens convertidas, imagens em falta).
+    """
+    folder = current_app.config["UPLOAD_FOLDER"]
+    renamed = {}
+    missing = set()
+    for imagem in VehicleImage.query.order_by(VehicleImage.id).all():
+        path = imagem.path
+        if is_content_addressed(path) or path in missing:
+            continue
+        if path not in renamed:
+            try:
+                with open(os.path.join(folder, path), "rb") as source:
+                    renamed[path] = _store(source, path)[0]
+            except FileNotFoundError:
+                missing.add(path)
+                continue
+        if renamed[path] in imagem.veiculo.image_paths:
+            # Cópia de uma imagem que o veículo já tem
+            imagem.veiculo.remove_image(path)
+        else:
+            imagem.path = renamed[path]
+    db.session.commit()
+
+    rebuild_refcounts()
+    remove_files(renamed)
+    return len(renamed), len(missing)
+
+
+def fill_dimensions():
+    """
+    Preenche as dimensões das imagens que ainda não as têm (por exemplo,
+    as migradas da antiga lista de imagens). Devolve o número preenchido.
+    """
+    filled = 0
+    sizes = {}
+    for imagem in VehicleImage.query.filter(VehicleImage.width.is_(None)):
+        if imagem.path not in sizes:
+            sizes[imagem.path] = image_size(imagem.path)
+        imagem.width, imagem.height = sizes[imagem.path]
+        filled += imagem.width is not None
+    db.session.commit()
+    return filled
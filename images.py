@@ -0,0 +1,228 @@
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from flask import current_app, url_for
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Largura máxima (em píxeis) de cada variante, da mais pequena para a maior
+VARIANTS = {"thumb": 320, "card": 640, "full": 1600}
+
+# As variantes de static/images/foto.jpg ficam em static/images/variants/foto.jpg/
+VARIANTS_FOLDER = "variants"
+MANIFEST = "manifest.json"
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+# Segundos durante os quais uma imagem sem manifesto não volta a ser
+# procurada no disco (as variantes podem ser geradas noutro processo)
+MISSING_RECHECK = 5.0
+
+
+def generate_variants(source, destination):
+    """
+    Gera as variantes redimensionadas de uma imagem, cada uma em WebP e num
+    formato de recurso (JPEG, ou PNG se a imagem tiver transparência), e
+    escreve por último o manifesto com as dimensões de cada variante.
+
+    Corre num processo do pool, por isso não usa a aplicação Flask.
+    """
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    fallback = "png" if has_alpha else "jpg"
+    os.makedirs(destination, exist_ok=True)
+    manifest = {
+        "width": image.width,
+        "height": image.height,
+        "fallback": fallback,
+        "variants": {},
+    }
+
+    previous = None
+    for name, max_width in VARIANTS.items():
+        # Uma imagem pequena não é ampliada: as variantes repetidas são omitidas
+        width = min(max_width, image.width)
+        if width == previous:
+            continue
+        previous = width
+        height = max(round(image.height * width / image.width), 1)
+        resized = image
+        if width != image.width:
+            resized = image.resize((width, height), Image.LANCZOS)
+
+        resized.save(
+            os.path.join(destination, f"{name}.webp"), "WEBP", quality=WEBP_QUALITY
+        )
+        if fallback == "jpg":
+            resized.save(
+                os.path.join(destination, f"{name}.jpg"),
+                "JPEG",
+                quality=JPEG_QUALITY,
+                optimize=True,
+                progressive=True,
+            )
+        else:
+            resized.save(os.path.join(destination, f"{name}.png"), "PNG", optimize=True)
+        manifest["variants"][name] = {"width": width, "height": height}
+
+    # O manifesto só aparece quando todas as variantes estão escritas
+    partial = os.path.join(destination, f"{MANIFEST}.part")
+    with open(partial, "w") as output:
+        json.dump(manifest, output)
+    os.replace(partial, os.path.join(destination, MANIFEST))
+    return manifest
+
+
+class ImagePipeline:
+    """
+    Geração das variantes das imagens dos veículos num conjunto de processos,
+    fora da thread do pedido.
+
+    Enquanto as variantes de uma imagem não existem, as páginas usam a imagem
+    original. Os manifestos já lidos ficam em memória (local ao processo),
+    tal como as imagens que ainda não os têm, durante MISSING_RECHECK.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._manifests = {}
+        self._missing = {}
+
+    def _get_executor(self):
+        # O servidor tem várias threads: os processos do pool são arrancados
+        # de novo (spawn) em vez de copiados com fork a meio de um pedido
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=current_app.config["IMAGE_WORKERS"],
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    @staticmethod
+    def _paths(filename):
+        folder = current_app.config["UPLOAD_FOLDER"]
+        return (
+            os.path.join(folder, filename),
+            os.path.join(folder, VARIANTS_FOLDER, filename),
+        )
+
+    def submit(self, filename):
+        """
+        Pede a geração das variantes de uma imagem (sem esperar por ela).
+        """
+        source, destination = self._paths(filename)
+        self._forget(filename)
+        future = self._get_executor().submit(generate_variants, source, destination)
+        future.add_done_callback(lambda done: self._store(filename, done))
+        return future
+
+    def _store(self, filename, future):
+        if future.exception() is not None:
+            logger.error(
+                "Falha ao gerar as variantes de %s: %s", filename, future.exception()
+            )
+            return
+        self._manifests[filename] = future.result()
+        self._missing.pop(filename, None)
+
+    def _forget(self, filename):
+        self._manifests.pop(filename, None)
+        self._missing.pop(filename, None)
+
+    def backfill(self, filenames, force=False):
+        """
+        Gera as variantes das imagens indicadas que ainda não as têm (ou de
+        todas, com force) e espera pelo fim. Devolve (nome, erro) à medida
+        que cada imagem termina; erro é None quando correu bem.
+        """
+        futures = {}
+        for filename in filenames:
+            source, _ = self._paths(filename)
+            if not os.path.exists(source):
+                yield filename, "ficheiro original não encontrado"
+                continue
+            if force or self.manifest(filename) is None:
+                futures[self.submit(filename)] = filename
+
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], str(error) if error else None
+
+    def manifest(self, filename):
+        """
+        Manifesto das variantes de uma imagem, ou None se ainda não existem.
+        """
+        manifest = self._manifests.get(filename)
+        if manifest is None:
+            missing_since = self._missing.get(filename)
+            if (
+                missing_since is not None
+                and time.monotonic() - missing_since < MISSING_RECHECK
+            ):
+                return None
+            _, destination = self._paths(filename)
+            try:
+                with open(os.path.join(destination, MANIFEST)) as file:
+                    manifest = json.load(file)
+            except (OSError, ValueError):
+                self._missing[filename] = time.monotonic()
+                return None
+            self._manifests[filename] = manifest
+            self._missing.pop(filename, None)
+        return manifest
+
+    def remove(self, filename):
+        """
+        Apaga as variantes de uma imagem.
+        """
+        self._forget(filename)
+        _, destination = self._paths(filename)
+        shutil.rmtree(destination, ignore_errors=True)
+
+    def sources(self, filename, default="card"):
+        """
+        Dados para o <picture> de uma imagem: src (a variante default ou a
+        maior que exista), srcset em WebP e no formato de recurso, e as
+        dimensões. Sem variantes, só src com a imagem original.
+        """
+        manifest = self.manifest(filename) if filename else None
+        if manifest is None:
+            return {"src": url_for("uploaded_image", filename=filename)}
+
+        def variant_url(name, extension):
+            return url_for(
+                "uploaded_image",
+                filename=f"{VARIANTS_FOLDER}/{filename}/{name}.{extension}",
+            )
+
+        variants = manifest["variants"]
+        fallback = manifest["fallback"]
+        chosen = default if default in variants else list(variants)[-1]
+        return {
+            "src": variant_url(chosen, fallback),
+            "webp": ", ".join(
+                f"{variant_url(name, 'webp')} {size['width']}w"
+                for name, size in variants.items()
+            ),
+            "fallback": ", ".join(
+                f"{variant_url(name, fallback)} {size['width']}w"
+                for name, size in variants.items()
+            ),
+            "width": variants[chosen]["width"],
+            "height": variants[chosen]["height"],
+        }
+
+
+image_pipeline = ImagePipeline()
@@ -0,0 +1,49 @@
+"""composite indexes for view queries
+
+Revision ID: 1610e9c0ca97
+Revises: 
+Create Date: 2026-10-18 07:10:36.932296
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1610e9c0ca97'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# As tabelas são criadas por db.create_all(); esta revisão acrescenta os
+# índices compostos às bases de dados que já existiam antes deles.
+INDEXES = [
+    (
+        "ix_reservation_vehicle_status_dates",
+        "reservation",
+        ["fk_reservation_vehicle", "status", "start_date", "end_date"],
+    ),
+    (
+        "ix_reservation_customer_start_date",
+        "reservation",
+        ["fk_reservation_customer", "start_date"],
+    ),
+    ("ix_reservation_status_end_date", "reservation", ["status", "end_date"]),
+    (
+        "ix_veiculos_maintenance_next_date",
+        "veiculos",
+        ["in_maintenance", "next_maintenance_date"],
+    ),
+    ("ix_veiculos_categoria_id", "veiculos", ["categoria_id"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
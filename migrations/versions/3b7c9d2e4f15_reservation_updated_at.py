@@ -0,0 +1,38 @@
+"""reservation updated_at
+
+Revision ID: 3b7c9d2e4f15
+Revises: 8d4f1b6e2a90
+Create Date: 2026-10-18 15:41:27.903512
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7c9d2e4f15'
+down_revision = '8d4f1b6e2a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # O SQLite não aceita um valor por omissão dinâmico em ADD COLUMN: a
+    # coluna é criada vazia, preenchida e só depois passa a NOT NULL
+    with op.batch_alter_table('reservation') as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    reservation = sa.table('reservation', sa.column('updated_at', sa.DateTime()))
+    op.execute(reservation.update().values(updated_at=datetime.now()))
+
+    with op.batch_alter_table('reservation') as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index('ix_reservation_updated_at', ['updated_at'])
+
+
+def downgrade():
+    with op.batch_alter_table('reservation') as batch_op:
+        batch_op.drop_index('ix_reservation_updated_at')
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,33 @@
+"""vehicle list sort indexes
+
+Revision ID: 5c2e8a41d7b3
+Revises: 1610e9c0ca97
+Create Date: 2026-10-18 09:12:04.518337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2e8a41d7b3'
+down_revision = '1610e9c0ca97'
+branch_labels = None
+depends_on = None
+
+
+# Índices usados pela ordenação da lista de veículos paginada.
+INDEXES = [
+    ("ix_veiculos_year", "veiculos", ["year"]),
+    ("ix_veiculos_price_per_day", "veiculos", ["price_per_day"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
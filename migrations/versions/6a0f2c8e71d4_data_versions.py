@@ -0,0 +1,35 @@
+"""data versions for the in-memory indexes
+
+Revision ID: 6a0f2c8e71d4
+Revises: d9e4a7b1c356
+Create Date: 2026-10-19 14:37:05.284611
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from data_versions import create_version_triggers, drop_version_triggers
+
+
+# revision identifiers, used by Alembic.
+revision = '6a0f2c8e71d4'
+down_revision = 'd9e4a7b1c356'
+branch_labels = None
+depends_on = None
+
+
+# Nas bases de dados novas a tabela e os triggers são criados pelo
+# db.create_all(); esta revisão cria-os nas restantes.
+def upgrade():
+    op.create_table(
+        'data_versions',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    create_version_triggers(op.get_bind())
+
+
+def downgrade():
+    drop_version_triggers(op.get_bind())
+    op.drop_table('data_versions')
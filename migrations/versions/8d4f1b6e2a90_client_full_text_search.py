@@ -0,0 +1,28 @@
+"""client full text search
+
+Revision ID: 8d4f1b6e2a90
+Revises: 5c2e8a41d7b3
+Create Date: 2026-10-18 10:03:47.210914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from client_search import create_client_search_index, drop_client_search_index
+
+
+# revision identifiers, used by Alembic.
+revision = '8d4f1b6e2a90'
+down_revision = '5c2e8a41d7b3'
+branch_labels = None
+depends_on = None
+
+
+# Nas bases de dados novas a tabela FTS5 é criada com a tabela clientes;
+# esta revisão cria-a (e indexa os clientes existentes) nas restantes.
+def upgrade():
+    create_client_search_index(op.get_bind())
+
+
+def downgrade():
+    drop_client_search_index(op.get_bind())
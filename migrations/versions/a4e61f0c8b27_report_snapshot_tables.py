@@ -0,0 +1,59 @@
+"""report snapshot tables
+
+Revision ID: a4e61f0c8b27
+Revises: 3b7c9d2e4f15
+Create Date: 2026-10-18 17:02:51.226940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4e61f0c8b27'
+down_revision = '3b7c9d2e4f15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'vehicle_utilization',
+        sa.Column('vehicle_id', sa.Integer(), nullable=False),
+        sa.Column('brand', sa.String(length=100), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('categoria', sa.String(length=50), nullable=False),
+        sa.Column('reservations', sa.Integer(), nullable=False),
+        sa.Column('reserved_days', sa.Integer(), nullable=False),
+        sa.Column('occupancy', sa.Float(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('vehicle_id'),
+    )
+    op.create_index(
+        'ix_vehicle_utilization_occupancy',
+        'vehicle_utilization',
+        ['occupancy', 'vehicle_id'],
+    )
+
+    op.create_table(
+        'category_revenue',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('categoria', sa.String(length=50), nullable=False),
+        sa.Column('reservations', sa.Integer(), nullable=False),
+        sa.Column('reserved_days', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_category_revenue_month_categoria',
+        'category_revenue',
+        ['month', 'categoria'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_category_revenue_month_categoria', table_name='category_revenue')
+    op.drop_table('category_revenue')
+    op.drop_index('ix_vehicle_utilization_occupancy', table_name='vehicle_utilization')
+    op.drop_table('vehicle_utilization')
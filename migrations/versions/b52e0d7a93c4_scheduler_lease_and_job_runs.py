@@ -0,0 +1,49 @@
+"""scheduler lease and job runs
+
+Revision ID: b52e0d7a93c4
+Revises: f1a7c3d95e28
+Create Date: 2026-10-18 21:02:41.118903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b52e0d7a93c4'
+down_revision = 'f1a7c3d95e28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'scheduler_leases',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('holder', sa.String(length=100), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.create_table(
+        'job_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('holder', sa.String(length=100), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('duration_ms', sa.Float(), nullable=False),
+        sa.Column('rows', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=10), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_job_runs_started_at', 'job_runs', ['started_at'])
+    op.create_index(
+        'ix_job_runs_name_started_at', 'job_runs', ['name', 'started_at']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_job_runs_name_started_at', table_name='job_runs')
+    op.drop_index('ix_job_runs_started_at', table_name='job_runs')
+    op.drop_table('job_runs')
+    op.drop_table('scheduler_leases')
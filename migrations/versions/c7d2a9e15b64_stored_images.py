@@ -0,0 +1,44 @@
+"""stored images reference counts
+
+Revision ID: c7d2a9e15b64
+Revises: a4e61f0c8b27
+Create Date: 2026-10-18 18:21:07.514382
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d2a9e15b64'
+down_revision = 'a4e61f0c8b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    op.create_table(
+        'stored_images',
+        sa.Column('path', sa.String(length=100), nullable=False),
+        sa.Column('refcount', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('path'),
+    )
+
+    # Contagem inicial: número de veículos que usam cada imagem existente
+    counts = {}
+    for (imagens,) in bind.execute(sa.text('SELECT imagens FROM veiculos')):
+        for path in set((imagens or '').split(',')):
+            if path:
+                counts[path] = counts.get(path, 0) + 1
+
+    bind.execute(sa.text('DELETE FROM stored_images'))
+    if counts:
+        bind.execute(
+            sa.text('INSERT INTO stored_images (path, refcount) VALUES (:path, :refcount)'),
+            [{'path': path, 'refcount': count} for path, count in counts.items()],
+        )
+
+
+def downgrade():
+    op.drop_table('stored_images')
@@ -0,0 +1,96 @@
+"""watermarks and vehicle alerts
+
+Revision ID: d9e4a7b1c356
+Revises: b52e0d7a93c4
+Create Date: 2026-10-19 09:14:52.630148
+
+"""
+from datetime import date, datetime, time, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9e4a7b1c356'
+down_revision = 'b52e0d7a93c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'watermarks',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('value', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    vehicle_alerts = op.create_table(
+        'vehicle_alerts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('vehicle_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('due_date', sa.Date(), nullable=False),
+        sa.Column(
+            'type', sa.Enum('CARRO', 'MOTA', name='vehicletype'), nullable=False
+        ),
+        sa.Column('brand', sa.String(length=100), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.ForeignKeyConstraint(['vehicle_id'], ['veiculos.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_vehicle_alerts_vehicle_id', 'vehicle_alerts', ['vehicle_id']
+    )
+    op.create_index(
+        'ix_vehicle_alerts_kind_due_date', 'vehicle_alerts', ['kind', 'due_date']
+    )
+
+    # Alertas iniciais: veículos fora de manutenção com a próxima manutenção
+    # ou legalização nos próximos 30 dias (ou já passada)
+    veiculos = sa.table(
+        'veiculos',
+        sa.column('id', sa.Integer),
+        sa.column('type', sa.String),
+        sa.column('brand', sa.String),
+        sa.column('model', sa.String),
+        sa.column('in_maintenance', sa.Boolean),
+        sa.column('next_maintenance_date', sa.Date),
+        sa.column('next_legalization_date', sa.Date),
+    )
+    today = date.today()
+    limit = today + timedelta(days=30)
+    for kind, due_date in [
+        ('manutencao', veiculos.c.next_maintenance_date),
+        ('legalizacao', veiculos.c.next_legalization_date),
+    ]:
+        op.execute(
+            vehicle_alerts.insert().from_select(
+                ['vehicle_id', 'kind', 'due_date', 'type', 'brand', 'model'],
+                sa.select(
+                    veiculos.c.id,
+                    sa.literal(kind),
+                    due_date,
+                    veiculos.c.type,
+                    veiculos.c.brand,
+                    veiculos.c.model,
+                ).where(
+                    veiculos.c.in_maintenance == sa.false(),
+                    due_date <= limit,
+                ),
+            )
+        )
+
+    watermarks = sa.table(
+        'watermarks', sa.column('name', sa.String), sa.column('value', sa.DateTime)
+    )
+    op.bulk_insert(
+        watermarks, [{'name': 'alerts', 'value': datetime.combine(today, time.min)}]
+    )
+
+
+def downgrade():
+    op.drop_index('ix_vehicle_alerts_kind_due_date', table_name='vehicle_alerts')
+    op.drop_index('ix_vehicle_alerts_vehicle_id', table_name='vehicle_alerts')
+    op.drop_table('vehicle_alerts')
+    op.drop_table('watermarks')
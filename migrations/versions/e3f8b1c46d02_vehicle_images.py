@@ -0,0 +1,92 @@
+"""vehicle images table
+
+Revision ID: e3f8b1c46d02
+Revises: c7d2a9e15b64
+Create Date: 2026-10-18 19:04:33.861205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3f8b1c46d02'
+down_revision = 'c7d2a9e15b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    op.create_table(
+        'vehicle_images',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('vehicle_id', sa.Integer(), nullable=False),
+        sa.Column('path', sa.String(length=100), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('is_cover', sa.Boolean(), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['vehicle_id'], ['veiculos.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_vehicle_images_path', 'vehicle_images', ['path'])
+    op.create_index(
+        'ix_vehicle_images_vehicle_position',
+        'vehicle_images',
+        ['vehicle_id', 'position'],
+    )
+    op.create_index(
+        'ix_vehicle_images_vehicle_cover', 'vehicle_images', ['vehicle_id', 'is_cover']
+    )
+
+    # Uma linha por imagem, pela ordem da lista; a primeira é a capa.
+    # As dimensões são preenchidas depois com `flask images backfill`.
+    rows = []
+    for vehicle_id, imagens in bind.execute(
+        sa.text("SELECT id, imagens FROM veiculos WHERE imagens != ''")
+    ):
+        paths = []
+        for path in (imagens or '').split(','):
+            if path and path not in paths:
+                paths.append(path)
+        rows.extend(
+            {
+                'vehicle_id': vehicle_id,
+                'path': path,
+                'position': position,
+                'is_cover': position == 0,
+            }
+            for position, path in enumerate(paths)
+        )
+    if rows:
+        bind.execute(
+            sa.text(
+                'INSERT INTO vehicle_images (vehicle_id, path, position, is_cover) '
+                'VALUES (:vehicle_id, :path, :position, :is_cover)'
+            ),
+            rows,
+        )
+
+    with op.batch_alter_table('veiculos', schema=None) as batch_op:
+        batch_op.drop_column('imagens')
+
+
+def downgrade():
+    with op.batch_alter_table('veiculos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('imagens', sa.String(length=1000), nullable=True))
+
+    bind = op.get_bind()
+    imagens = {}
+    for vehicle_id, path in bind.execute(
+        sa.text('SELECT vehicle_id, path FROM vehicle_images ORDER BY vehicle_id, is_cover DESC, position')
+    ):
+        imagens.setdefault(vehicle_id, []).append(path)
+    bind.execute(sa.text("UPDATE veiculos SET imagens = ''"))
+    if imagens:
+        bind.execute(
+            sa.text('UPDATE veiculos SET imagens = :imagens WHERE id = :id'),
+            [{'id': id, 'imagens': ','.join(paths)} for id, paths in imagens.items()],
+        )
+
+    op.drop_table('vehicle_images')
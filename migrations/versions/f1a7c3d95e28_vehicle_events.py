@@ -0,0 +1,163 @@
+"""vehicle events log
+
+Revision ID: f1a7c3d95e28
+Revises: e3f8b1c46d02
+Create Date: 2026-10-18 19:48:12.406731
+
+"""
+from datetime import date, datetime
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a7c3d95e28'
+down_revision = 'e3f8b1c46d02'
+branch_labels = None
+depends_on = None
+
+EVENT_TYPES = sa.Enum(
+    'MANUTENCAO_INICIADA',
+    'MANUTENCAO_CONCLUIDA',
+    'LEGALIZACAO',
+    name='vehicleeventtype',
+)
+
+# Texto de cada tipo de evento nas antigas colunas de histórico
+LEGACY_TEXT = {
+    'MANUTENCAO_INICIADA': 'Manutenção iniciada',
+    'MANUTENCAO_CONCLUIDA': 'Manutenção concluída',
+    'LEGALIZACAO': 'Legalização realizada',
+}
+
+DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+def legacy_events(history, default_type, default_date):
+    """
+    Converte uma coluna de histórico ("texto aaaa-mm-dd;...") em eventos.
+    """
+    for entry in (history or '').split(';'):
+        entry = entry.strip()
+        if not entry:
+            continue
+        type = next(
+            (t for t, text in LEGACY_TEXT.items() if entry.startswith(text)),
+            default_type,
+        )
+        match = DATE_PATTERN.search(entry)
+        try:
+            on = datetime.strptime(match.group(), '%Y-%m-%d').date()
+        except (AttributeError, ValueError):
+            on = None
+        notes = None
+        if on is None or entry != f'{LEGACY_TEXT[type]} {on.isoformat()}':
+            notes = entry[:200]
+        yield type, on or default_date or date.today(), notes
+
+
+def upgrade():
+    bind = op.get_bind()
+    op.create_table(
+        'vehicle_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('vehicle_id', sa.Integer(), nullable=False),
+        sa.Column('type', EVENT_TYPES, nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('num_uses', sa.Integer(), nullable=False),
+        sa.Column('notes', sa.String(length=200), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['vehicle_id'], ['veiculos.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_vehicle_events_date', 'vehicle_events', ['date'])
+    op.create_index(
+        'ix_vehicle_events_vehicle_date', 'vehicle_events', ['vehicle_id', 'date']
+    )
+    op.create_index('ix_vehicle_events_type_date', 'vehicle_events', ['type', 'date'])
+
+    # O número de utilizações na data de cada evento antigo não é conhecido
+    now = datetime.now()
+    rows = []
+    for (
+        vehicle_id,
+        maintenance_history,
+        legalization_history,
+        last_maintenance_date,
+        last_legalization_date,
+    ) in bind.execute(
+        sa.text(
+            'SELECT id, maintenance_history, legalization_history, '
+            'last_maintenance_date, last_legalization_date FROM veiculos '
+            "WHERE maintenance_history != '' OR legalization_history != ''"
+        )
+    ):
+        for history, default_type, default_date in [
+            (maintenance_history, 'MANUTENCAO_INICIADA', last_maintenance_date),
+            (legalization_history, 'LEGALIZACAO', last_legalization_date),
+        ]:
+            for type, on, notes in legacy_events(history, default_type, default_date):
+                rows.append(
+                    {
+                        'vehicle_id': vehicle_id,
+                        'type': type,
+                        'date': on,
+                        'num_uses': 0,
+                        'notes': notes,
+                        'created_at': now,
+                    }
+                )
+    if rows:
+        bind.execute(
+            sa.text(
+                'INSERT INTO vehicle_events '
+                '(vehicle_id, type, date, num_uses, notes, created_at) '
+                'VALUES (:vehicle_id, :type, :date, :num_uses, :notes, :created_at)'
+            ),
+            rows,
+        )
+
+    with op.batch_alter_table('veiculos', schema=None) as batch_op:
+        batch_op.drop_column('maintenance_history')
+        batch_op.drop_column('legalization_history')
+
+
+def downgrade():
+    with op.batch_alter_table('veiculos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('maintenance_history', sa.String(length=1000), nullable=True))
+        batch_op.add_column(sa.Column('legalization_history', sa.String(length=1000), nullable=True))
+
+    # Reconstrói as colunas de histórico (cortadas aos 1000 caracteres)
+    bind = op.get_bind()
+    histories = {}
+    for vehicle_id, type, on in bind.execute(
+        sa.text('SELECT vehicle_id, type, date FROM vehicle_events ORDER BY date, id')
+    ):
+        column = 'legalization_history' if type == 'LEGALIZACAO' else 'maintenance_history'
+        entries = histories.setdefault(vehicle_id, {
+            'maintenance_history': '',
+            'legalization_history': '',
+        })
+        entries[column] += f'{LEGACY_TEXT[type]} {on};'
+    bind.execute(sa.text(
+        "UPDATE veiculos SET maintenance_history = '', legalization_history = ''"
+    ))
+    if histories:
+        bind.execute(
+            sa.text(
+                'UPDATE veiculos SET maintenance_history = :maintenance_history, '
+                'legalization_history = :legalization_history WHERE id = :id'
+            ),
+            [
+                {
+                    'id': id,
+                    'maintenance_history': entries['maintenance_history'][-1000:],
+                    'legalization_history': entries['legalization_history'][-1000:],
+                }
+                for id, entries in histories.items()
+            ],
+        )
+
+    op.drop_table('vehicle_events')
@@ -14,6 +14,16 @@ class VehicleType(Enum):
     MOTA = "Mota"
 
 
+class VehicleEventType(Enum):
+    """
+    Enumeração dos tipos de eventos do histórico de um veículo.
+    """
+
+    MANUTENCAO_INICIADA = "Manutenção iniciada"
+    MANUTENCAO_CONCLUIDA = "Manutenção concluída"
+    LEGALIZACAO = "Legalização realizada"
+
+
 class Categoria(db.Model):
     """
     Modelo de Categoria de Veículo.
@@ -34,31 +44,45 @@ class Veiculo(db.Model):
     """
 
     __tablename__ = "veiculos"
+    __table_args__ = (
+        # Varrimento de manutenção: veículos em manutenção por data prevista
+        db.Index(
+            "ix_veiculos_maintenance_next_date",
+            "in_maintenance",
+            "next_maintenance_date",
+        ),
+    )
     id = db.Column(db.Integer, primary_key=True)
     type = db.Column(db.Enum(VehicleType), nullable=False)
     brand = db.Column(db.String(100), nullable=False, index=True)
     model = db.Column(db.String(100), nullable=False, index=True)
-    year = db.Column(db.Integer, nullable=False)
-    price_per_day = db.Column(db.Float, nullable=False)
+    year = db.Column(db.Integer, nullable=False, index=True)
+    price_per_day = db.Column(db.Float, nullable=False, index=True)
     status = db.Column(db.Boolean, default=True)
     in_maintenance = db.Column(db.Boolean, default=False)
     last_maintenance_date = db.Column(db.Date)
     next_maintenance_date = db.Column(db.Date)
-    maintenance_history = db.Column(db.String(1000), default="")
     last_legalization_date = db.Column(db.Date)
     next_legalization_date = db.Column(db.Date)
-    legalization_history = db.Column(db.String(1000), default="")
-    imagens = db.Column(db.String(1000))
     available_from = db.Column(db.Date, nullable=True)
     num_uses = db.Column(db.Integer, default=0)
     max_uses_before_maintenance = db.Column(db.Integer, default=50)
-    categoria_id = db.Column(db.Integer, db.ForeignKey("categorias.id"), nullable=False)
+    categoria_id = db.Column(
+        db.Integer, db.ForeignKey("categorias.id"), nullable=False, index=True
+    )
     categoria = db.relationship("Categoria", backref=db.backref("veiculos", lazy=True))
     reservations = db.relationship(
         "Reservation",
         backref="veiculos",
         lazy=True,
     )
+    imagens = db.relationship(
+        "VehicleImage",
+        backref="veiculo",
+        order_by="VehicleImage.position",
+        cascade="all, delete-orphan",
+        lazy=True,
+    )
 
     def __init__(self, type, brand, model, year, price_per_day, categoria=None):
         """
@@ -70,11 +94,8 @@ class Veiculo(db.Model):
         self.year = year
         self.price_per_day = price_per_day
         self.categoria = categoria
-        self.maintenance_history = ""
         self.last_legalization_date = None
         self.next_legalization_date = None
-        self.legalization_history = ""
-        self.imagens = ""
 
     def initialize_vehicle(self):
         """
@@ -104,6 +125,138 @@ class Veiculo(db.Model):
         self.status = True
         self.next_maintenance_date = self.last_maintenance_date + timedelta(days=180)
 
+    @property
+    def image_paths(self):
+        """
+        Caminhos das imagens do veículo, pela ordem em que são mostradas.
+        """
+        return [imagem.path for imagem in self.imagens]
+
+    @property
+    def cover(self):
+        """
+        Imagem de capa do veículo (None se não tiver imagens).
+        """
+        return next((imagem for imagem in self.imagens if imagem.is_cover), None)
+
+    def add_image(self, path, width=None, height=None):
+        """
+        Acrescenta uma imagem no fim da lista; a primeira passa a ser a capa.
+        Devolve a imagem, ou None se o veículo já a tinha.
+        """
+        if path in self.image_paths:
+            return None
+        imagem = VehicleImage(
+            path=path,
+            position=max((i.position for i in self.imagens), default=-1) + 1,
+            is_cover=self.cover is None,
+            width=width,
+            height=height,
+        )
+        self.imagens.append(imagem)
+        return imagem
+
+    def remove_image(self, path):
+        """
+        Retira uma imagem do veículo; se era a capa, a seguinte passa a ser.
+        Devolve a imagem retirada, ou None se o veículo não a tinha.
+        """
+        imagem = next((i for i in self.imagens if i.path == path), None)
+        if imagem is None:
+            return None
+        self.imagens.remove(imagem)
+        if imagem.is_cover and self.imagens:
+            self.imagens[0].is_cover = True
+        return imagem
+
+    def set_cover(self, path):
+        """
+        Define a imagem de capa do veículo.
+        """
+        for imagem in self.imagens:
+            imagem.is_cover = imagem.path == path
+
+
+class VehicleEvent(db.Model):
+    """
+    Modelo de Evento de Veículo.
+    Registo (só de acréscimo) das manutenções e legalizações de um veículo,
+    com o número de utilizações do veículo nesse momento.
+    """
+
+    __tablename__ = "vehicle_events"
+    __table_args__ = (
+        # Histórico de um veículo, do mais recente para o mais antigo
+        db.Index("ix_vehicle_events_vehicle_date", "vehicle_id", "date"),
+        # Eventos de um tipo na frota inteira num intervalo de datas
+        db.Index("ix_vehicle_events_type_date", "type", "date"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey("veiculos.id"), nullable=False)
+    type = db.Column(db.Enum(VehicleEventType), nullable=False)
+    date = db.Column(db.Date, nullable=False, index=True)
+    num_uses = db.Column(db.Integer, nullable=False, default=0)
+    notes = db.Column(db.String(200))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    veiculo = db.relationship(
+        "Veiculo", backref=db.backref("events", lazy="dynamic", cascade="all")
+    )
+
+    @staticmethod
+    def record(vehicle, type, notes=None, on=None):
+        """
+        Acrescenta um evento ao histórico do veículo (sem fazer commit).
+        """
+        event = VehicleEvent(
+            veiculo=vehicle,
+            type=type,
+            date=on or date.today(),
+            num_uses=vehicle.num_uses or 0,
+            notes=notes,
+        )
+        db.session.add(event)
+        return event
+
+
+class VehicleImage(db.Model):
+    """
+    Modelo de Imagem de Veículo.
+    Uma imagem de um veículo (caminho relativo à pasta das imagens), a sua
+    posição na galeria e as dimensões da imagem original.
+    """
+
+    __tablename__ = "vehicle_images"
+    __table_args__ = (
+        # Galeria de um veículo, pela ordem em que é mostrada
+        db.Index("ix_vehicle_images_vehicle_position", "vehicle_id", "position"),
+        # Capas das listagens, obtidas numa só consulta para vários veículos
+        db.Index("ix_vehicle_images_vehicle_cover", "vehicle_id", "is_cover"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey("veiculos.id"), nullable=False)
+    path = db.Column(db.String(100), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    is_cover = db.Column(db.Boolean, nullable=False, default=False)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+
+    @staticmethod
+    def covers(vehicle_ids):
+        """
+        Imagens de capa de vários veículos numa só consulta, por id do veículo.
+        """
+        vehicle_ids = list(vehicle_ids)
+        if not vehicle_ids:
+            return {}
+        return {
+            imagem.vehicle_id: imagem
+            for imagem in VehicleImage.query.filter(
+                VehicleImage.vehicle_id.in_(vehicle_ids),
+                VehicleImage.is_cover == True,  # noqa: E712
+            )
+        }
+
 
 class Cliente(db.Model):
     """
@@ -178,12 +331,192 @@ class Cliente(db.Model):
         return f"<Cliente {self.nome} {self.apelido}>"
 
 
+class VehicleAlert(db.Model):
+    """
+    Modelo de Alerta de Veículo.
+    Tabela materializada com os veículos que precisam de manutenção ou de
+    legalização nos próximos 30 dias, atualizada pelo scheduler.
+    """
+
+    __tablename__ = "vehicle_alerts"
+    __table_args__ = (db.Index("ix_vehicle_alerts_kind_due_date", "kind", "due_date"),)
+
+    MAINTENANCE = "manutencao"
+    LEGALIZATION = "legalizacao"
+
+    id = db.Column(db.Integer, primary_key=True)
+    vehicle_id = db.Column(
+        db.Integer, db.ForeignKey("veiculos.id"), nullable=False, index=True
+    )
+    kind = db.Column(db.String(20), nullable=False)
+    due_date = db.Column(db.Date, nullable=False)
+    type = db.Column(db.Enum(VehicleType), nullable=False)
+    brand = db.Column(db.String(100), nullable=False)
+    model = db.Column(db.String(100), nullable=False)
+
+
+class VehicleUtilization(db.Model):
+    """
+    Modelo de Utilização de Veículo.
+    Tabela materializada com a ocupação e a receita de cada veículo na janela
+    dos relatórios, atualizada diariamente pelo scheduler.
+    """
+
+    __tablename__ = "vehicle_utilization"
+    __table_args__ = (
+        db.Index("ix_vehicle_utilization_occupancy", "occupancy", "vehicle_id"),
+    )
+
+    vehicle_id = db.Column(db.Integer, primary_key=True)
+    brand = db.Column(db.String(100), nullable=False)
+    model = db.Column(db.String(100), nullable=False)
+    categoria = db.Column(db.String(50), nullable=False)
+    reservations = db.Column(db.Integer, nullable=False)
+    reserved_days = db.Column(db.Integer, nullable=False)
+    occupancy = db.Column(db.Float, nullable=False)
+    revenue = db.Column(db.Float, nullable=False)
+
+
+class CategoryRevenue(db.Model):
+    """
+    Modelo de Receita por Categoria.
+    Tabela materializada com a receita, o número de reservas e os dias
+    reservados de cada categoria por mês, atualizada diariamente pelo scheduler.
+    """
+
+    __tablename__ = "category_revenue"
+    __table_args__ = (
+        db.Index("ix_category_revenue_month_categoria", "month", "categoria"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Date, nullable=False)
+    categoria = db.Column(db.String(50), nullable=False)
+    reservations = db.Column(db.Integer, nullable=False)
+    reserved_days = db.Column(db.Integer, nullable=False)
+    revenue = db.Column(db.Float, nullable=False)
+
+    @property
+    def average_duration(self):
+        return self.reserved_days / self.reservations if self.reservations else 0
+
+
+class StoredImage(db.Model):
+    """
+    Modelo de Imagem Guardada.
+    Uma imagem guardada pelo seu conteúdo (static/images/<hash>) e o número
+    de veículos que a usam; o ficheiro só é apagado quando ninguém o usa.
+    """
+
+    __tablename__ = "stored_images"
+    path = db.Column(db.String(100), primary_key=True)
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+
+
+class Watermark(db.Model):
+    """
+    Modelo de Marca de Água das tarefas periódicas.
+    Guarda, por nome de tarefa, até onde foi processado na última execução.
+    """
+
+    __tablename__ = "watermarks"
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.DateTime, nullable=False)
+
+    @staticmethod
+    def get(name):
+        """
+        Obtém o valor da marca de água ou None se a tarefa nunca correu.
+        """
+        watermark = db.session.get(Watermark, name)
+        return watermark.value if watermark else None
+
+    @staticmethod
+    def set(name, value):
+        """
+        Atualiza o valor da marca de água (sem fazer commit).
+        """
+        watermark = db.session.get(Watermark, name)
+        if watermark:
+            watermark.value = value
+        else:
+            db.session.add(Watermark(name=name, value=value))
+
+
+class DataVersion(db.Model):
+    """
+    Modelo de Versão dos Dados.
+    Contador de alterações incrementado por triggers do SQLite em cada escrita
+    (de qualquer processo) nas tabelas usadas pelos índices em memória; cada
+    processo compara-o com a versão que já aplicou (ver data_versions.py).
+    """
+
+    __tablename__ = "data_versions"
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class SchedulerLease(db.Model):
+    """
+    Modelo de Concessão do Scheduler.
+    Indica o processo (líder) que corre as tarefas periódicas e até quando; os
+    outros processos só ficam com a concessão depois de ela expirar.
+    """
+
+    __tablename__ = "scheduler_leases"
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class JobRun(db.Model):
+    """
+    Modelo de Execução de Tarefa.
+    Histórico das execuções das tarefas periódicas: processo, duração, linhas
+    alteradas e erro (se a tarefa falhou).
+    """
+
+    __tablename__ = "job_runs"
+    __table_args__ = (db.Index("ix_job_runs_name_started_at", "name", "started_at"),)
+
+    SUCCESS = "sucesso"
+    FAILED = "erro"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)
+    holder = db.Column(db.String(100), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False, index=True)
+    duration_ms = db.Column(db.Float, nullable=False)
+    rows = db.Column(db.Integer)
+    status = db.Column(db.String(10), nullable=False)
+    error = db.Column(db.Text)
+
+
 # Classe para o modelo de Reserva
 class Reservation(db.Model):
     """
     Modelo de Reserva.
     """
 
+    __table_args__ = (
+        # Pesquisa de sobreposições por veículo (disponibilidade e reservas)
+        db.Index(
+            "ix_reservation_vehicle_status_dates",
+            "fk_reservation_vehicle",
+            "status",
+            "start_date",
+            "end_date",
+        ),
+        # Reservas futuras e passadas de um cliente
+        db.Index(
+            "ix_reservation_customer_start_date",
+            "fk_reservation_customer",
+            "start_date",
+        ),
+        # Varrimento das reservas ativas já terminadas
+        db.Index("ix_reservation_status_end_date", "status", "end_date"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(
         db.Integer,
@@ -206,6 +539,14 @@ class Reservation(db.Model):
     end_time = db.Column(db.Time, nullable=False)
     duration = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)
+    # Última alteração da reserva (usada pelas exportações incrementais)
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.now,
+        onupdate=datetime.now,
+        index=True,
+    )
 
     def add_reservations(self):
         """
@@ -214,16 +555,38 @@ class Reservation(db.Model):
         db.session.add(self)
         db.session.commit()
 
+        # Importado aqui para evitar a importação circular com availability.py
+        from availability import register_reservation
+
+        register_reservation(self)
+
+    @property
+    def effective_status(self):
+        """
+        Status apresentado ao cliente: uma reserva ativa cujo fim já passou é
+        mostrada como concluída, mesmo antes de o varrimento a atualizar.
+        """
+        if self.status == "Ativa" and self.end_date < date.today():
+            return "Concluída"
+        return self.status
+
     @staticmethod
     def update_completed_reservations():
         """
-        Atualiza as reservas concluídas para o status "Concluída".
+        Atualiza as reservas ativas já terminadas para o status "Concluída",
+        com um único UPDATE. Devolve o número de reservas atualizadas.
         """
         today = date.today()
-        completed_reservations = Reservation.query.filter(
-            Reservation.end_date < today, Reservation.status != "Concluída"
-        ).all()
+        result = db.session.execute(
+            db.update(Reservation)
+            .where(Reservation.status == "Ativa", Reservation.end_date < today)
+            .values(status="Concluída")
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        from availability import availability_index
+
+        availability_index.prune(today)
 
-        for reservation in completed_reservations:
-            reservation.status = "Concluída"
-            db.session.commit()
+        return result.rowcount
@@ -0,0 +1,218 @@
+import threading
+from datetime import date, datetime, timedelta
+from models import db, Veiculo, Reservation, Categoria
+
+
+class OccupancyMatrix:
+    """
+    Matriz de ocupação veículos × dias, usada na pesquisa com datas flexíveis.
+
+    Cada linha corresponde a um veículo e cada coluna a um dia a partir de
+    hoje. As reservas ativas são guardadas como contagens por dia (para que o
+    cancelamento de uma reserva não liberte dias ocupados por outra) e os dias
+    bloqueados por manutenção ou por available_from numa máscara à parte.
+    As colunas de cada reserva contada ficam guardadas pelo seu id, para que
+    uma reserva não seja contada nem libertada duas vezes.
+    Uma reserva ocupa os dias do início até à véspera da entrega: no dia de
+    entrega o veículo pode ser recolhido por outro cliente.
+    """
+
+    def __init__(self, horizon_days=365):
+        self.horizon_days = horizon_days
+        self._lock = threading.RLock()
+        self.origin = None
+        self._rows = {}
+        self._reservations = {}
+        # As matrizes (numpy) só são criadas na primeira reconstrução
+        self._vehicle_ids = None
+        self._categorias = None
+        self._active = None
+        self._reserved = None
+        self._blocked = None
+        self.loaded = False
+
+    def rebuild(self):
+        """
+        Constrói a matriz a partir dos veículos e das reservas ativas.
+        """
+        # Importado aqui para o numpy só ser carregado na primeira pesquisa
+        # com datas flexíveis
+        import numpy as np
+
+        origin = date.today()
+        horizon = self.horizon_days
+
+        vehicles = (
+            db.session.query(
+                Veiculo.id,
+                Veiculo.status,
+                Veiculo.in_maintenance,
+                Veiculo.available_from,
+                Categoria.nome,
+            )
+            .join(Categoria)
+            .order_by(Veiculo.id)
+            .all()
+        )
+        rows = {vehicle_id: row for row, (vehicle_id, *_) in enumerate(vehicles)}
+
+        blocked = np.zeros((len(vehicles), horizon), dtype=bool)
+        for row, (_, _, in_maintenance, available_from, _) in enumerate(vehicles):
+            if in_maintenance:
+                blocked[row, :] = True
+            elif available_from and available_from > origin:
+                blocked[row, : (available_from - origin).days] = True
+
+        reservations = db.session.query(
+            Reservation.id,
+            Reservation.vehicle_id,
+            Reservation.start_date,
+            Reservation.end_date,
+        ).filter(Reservation.status == "Ativa", Reservation.end_date > origin)
+
+        # Soma de diferenças: +1 no primeiro dia, -1 no dia seguinte ao último
+        diff = np.zeros((len(vehicles), horizon + 1), dtype=np.int32)
+        counted = {}
+        reservation_rows, starts, ends = [], [], []
+        for reservation_id, vehicle_id, start, end in reservations:
+            if vehicle_id not in rows:
+                continue
+            start_index, end_index = self._clip(origin, start, end)
+            if start_index is None:
+                continue
+            counted[reservation_id] = (rows[vehicle_id], start_index, end_index)
+            reservation_rows.append(rows[vehicle_id])
+            starts.append(start_index)
+            ends.append(end_index + 1)
+        reservation_rows = np.array(reservation_rows, dtype=np.intp)
+        np.add.at(diff, (reservation_rows, np.array(starts, dtype=np.intp)), 1)
+        np.add.at(diff, (reservation_rows, np.array(ends, dtype=np.intp)), -1)
+        reserved = np.cumsum(diff[:, :horizon], axis=1).astype(np.uint8)
+
+        with self._lock:
+            self.origin = origin
+            self._rows = rows
+            self._reservations = counted
+            self._vehicle_ids = np.array([v[0] for v in vehicles], dtype=np.int64)
+            self._active = np.array([bool(v[1]) for v in vehicles], dtype=bool)
+            self._categorias = np.array([v[4] for v in vehicles], dtype=object)
+            self._reserved = reserved
+            self._blocked = blocked
+            self.loaded = True
+
+    def invalidate(self):
+        """
+        Marca a matriz para ser reconstruída na próxima pesquisa
+        (usado quando os veículos mudam).
+        """
+        with self._lock:
+            self.loaded = False
+
+    def _clip(self, origin, start, end):
+        """
+        Converte os dias ocupados por uma reserva (sem o dia de entrega) em
+        índices de colunas, limitados ao horizonte.
+        """
+        start_index = max((start - origin).days, 0)
+        end_index = min((end - origin).days - 1, self.horizon_days - 1)
+        if start_index > end_index:
+            return None, None
+        return start_index, end_index
+
+    def add(self, reservation):
+        """
+        Marca os dias de uma nova reserva ativa como ocupados (uma reserva já
+        contada é ignorada).
+        """
+        if reservation.status != "Ativa":
+            return
+        with self._lock:
+            if not self.loaded or reservation.id in self._reservations:
+                return
+            row = self._rows.get(int(reservation.vehicle_id))
+            if row is None:
+                return
+            start = reservation.start_date
+            end = reservation.end_date
+            if isinstance(start, datetime):
+                start = start.date()
+            if isinstance(end, datetime):
+                end = end.date()
+            start_index, end_index = self._clip(self.origin, start, end)
+            if start_index is None:
+                return
+            self._reservations[reservation.id] = (row, start_index, end_index)
+            self._reserved[row, start_index : end_index + 1] += 1
+
+    def remove(self, reservation):
+        """
+        Liberta os dias de uma reserva cancelada (só se tiver sido contada,
+        e uma única vez).
+        """
+        with self._lock:
+            if not self.loaded:
+                return
+            counted = self._reservations.pop(reservation.id, None)
+            if counted is None:
+                return
+            row, start_index, end_index = counted
+            self._reserved[row, start_index : end_index + 1] -= 1
+
+    def search(self, data_inicio, data_entrega, flex_days=3, categoria="all"):
+        """
+        Procura veículos livres para todos os períodos obtidos deslocando as
+        datas entre -flex_days e +flex_days, numa única passagem vetorizada.
+
+        Devolve um dicionário {vehicle_id: [(inicio, entrega), ...]} com os
+        períodos em que cada veículo está livre.
+        """
+        import numpy as np
+
+        with self._lock:
+            if not self.loaded or self.origin != date.today():
+                self.rebuild()
+
+            # Colunas do início até à véspera da entrega, como nas reservas
+            duration = (data_entrega - data_inicio).days
+            periods = []
+            for shift in range(-flex_days, flex_days + 1):
+                start_index = (data_inicio - self.origin).days + shift
+                end_index = start_index + duration - 1
+                if start_index < 0 or end_index >= self.horizon_days:
+                    continue
+                periods.append((start_index, end_index))
+            if not periods:
+                return {}
+
+            candidates = self._active.copy()
+            if categoria and categoria != "all":
+                candidates &= self._categorias == categoria
+
+            # Só as colunas entre o primeiro início e o último fim interessam
+            first = periods[0][0]
+            last = periods[-1][1]
+            occupied = (self._reserved[candidates, first : last + 1] > 0) | (
+                self._blocked[candidates, first : last + 1]
+            )
+            vehicle_ids = self._vehicle_ids[candidates]
+
+        # Soma acumulada por linha: dias ocupados num período = cs[fim+1] - cs[início]
+        cumulative = np.zeros((occupied.shape[0], occupied.shape[1] + 1), np.int32)
+        np.cumsum(occupied, axis=1, out=cumulative[:, 1:])
+        starts = np.array([start - first for start, _ in periods])
+        ends = np.array([end - first for _, end in periods])
+        free = (cumulative[:, ends + 1] - cumulative[:, starts]) == 0
+
+        result = {}
+        for row, column in zip(*np.nonzero(free)):
+            start_index, end_index = periods[column]
+            result.setdefault(int(vehicle_ids[row]), []).append(
+                (
+                    self.origin + timedelta(days=int(start_index)),
+                    self.origin + timedelta(days=int(end_index) + 1),
+                )
+            )
+        return result
+
+
+occupancy_matrix = OccupancyMatrix()
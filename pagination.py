@@ -0,0 +1,105 @@
+import base64
+import binascii
+import json
+import math
+from datetime import date, datetime
+from sqlalchemy import tuple_
+
+# Limites dos inteiros do SQLite (fora deles o sqlite3 dá OverflowError)
+SQLITE_INT_MIN, SQLITE_INT_MAX = -(2**63), 2**63 - 1
+
+
+def encode_cursor(values):
+    """
+    Codifica os valores da última linha de uma página num cursor para o URL.
+    As datas ficam em texto ISO, o formato em que o SQLite as guarda.
+    """
+    data = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def _cursor_value(column, value):
+    """
+    Converte um valor do cursor para o tipo da coluna de ordenação.
+    Lança ValueError se o valor não for do tipo da coluna.
+    """
+    python_type = column.type.python_type
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if python_type is int:
+        if not isinstance(value, int) or not (
+            SQLITE_INT_MIN <= value <= SQLITE_INT_MAX
+        ):
+            raise ValueError(value)
+    elif python_type is float:
+        if not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(value)
+    elif python_type in (date, datetime):
+        if not isinstance(value, str):
+            raise ValueError(value)
+        value = python_type.fromisoformat(value)
+    elif not isinstance(value, python_type):
+        raise ValueError(value)
+    return value
+
+
+def decode_cursor(cursor, columns):
+    """
+    Descodifica um cursor criado por encode_cursor, com um valor por cada
+    coluna de ordenação (columns).
+    Devolve None se o cursor estiver vazio ou for inválido (formato, número
+    de valores ou tipos diferentes dos das colunas), o que leva à primeira
+    página em vez de um erro.
+    """
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != len(columns):
+        return None
+    try:
+        return [_cursor_value(column, value) for column, value in zip(columns, values)]
+    except ValueError:
+        return None
+
+
+def keyset_page(
+    query, sort_column, id_column, descending=False, cursor=None, per_page=50
+):
+    """
+    Devolve uma página de resultados ordenada por (sort_column, id_column),
+    a começar depois da linha indicada pelo cursor.
+
+    Em vez de OFFSET, filtra pelas linhas seguintes à última da página
+    anterior, o que permite ao SQLite continuar a leitura a partir do índice
+    e mantém o custo de cada página constante, seja qual for a página.
+    Devolve (linhas, cursor_seguinte); cursor_seguinte é None na última página.
+    """
+    same_column = sort_column is id_column
+    values = decode_cursor(cursor, [sort_column, id_column])
+    if values is not None:
+        if same_column:
+            key, after = id_column, values[1]
+        else:
+            key, after = tuple_(sort_column, id_column), tuple_(*values)
+        query = query.filter(key < after if descending else key > after)
+
+    if same_column:
+        order = [id_column.desc() if descending else id_column.asc()]
+    elif descending:
+        order = [sort_column.desc(), id_column.desc()]
+    else:
+        order = [sort_column.asc(), id_column.asc()]
+
+    rows = query.order_by(*order).limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            [getattr(last, sort_column.key), getattr(last, id_column.key)]
+        )
+
+    return rows, next_cursor
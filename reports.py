@@ -0,0 +1,171 @@
+from datetime import date, datetime
+from sqlalchemy import delete, insert, select
+from models import (
+    db,
+    Veiculo,
+    Reservation,
+    Categoria,
+    VehicleUtilization,
+    CategoryRevenue,
+    Watermark,
+)
+
+# Número de dias (até hoje, inclusive) usados no cálculo da ocupação
+REPORT_WINDOW_DAYS = 90
+
+# Reservas inseridas de cada vez nas tabelas dos relatórios
+INSERT_BATCH = 5000
+
+
+def load_reservations():
+    """
+    Carrega de uma vez os intervalos das reservas não canceladas num
+    DataFrame, com a categoria do veículo.
+    """
+    # Importado aqui para o pandas só ser carregado quando os relatórios
+    # são calculados
+    import pandas as pd
+
+    rows = db.session.execute(
+        select(
+            Reservation.vehicle_id,
+            Reservation.start_date,
+            Reservation.end_date,
+            Reservation.duration,
+            Reservation.price,
+            Categoria.nome,
+        )
+        .join(Veiculo, Reservation.vehicle_id == Veiculo.id)
+        .join(Categoria, Veiculo.categoria_id == Categoria.id)
+        .where(Reservation.status != "Cancelada")
+    ).all()
+
+    df = pd.DataFrame(
+        rows,
+        columns=["vehicle_id", "start", "end", "duration", "price", "categoria"],
+    )
+    df["start"] = df["start"].astype("datetime64[s]")
+    df["end"] = df["end"].astype("datetime64[s]")
+    return df
+
+
+def vehicle_utilization(reservations, today=None):
+    """
+    Ocupação e receita de cada veículo nos últimos REPORT_WINDOW_DAYS dias.
+
+    Os dias ocupados por cada reserva vão do início até à véspera da
+    entrega (o dia de entrega fica livre, como na matriz de ocupação), são
+    cortados à janela com operações vetoriais e somados por veículo, pelo
+    que uma reserva de N dias conta N dias, como a duração em
+    category_revenue. A receita é a das reservas que começam na janela.
+    """
+    import numpy as np
+    import pandas as pd
+
+    today = np.datetime64(today or date.today(), "D")
+    window_start = today - (REPORT_WINDOW_DAYS - 1)
+
+    starts = reservations["start"].to_numpy().astype("datetime64[D]")
+    ends = reservations["end"].to_numpy().astype("datetime64[D]")
+    first = np.maximum(starts, window_start)
+    end = np.minimum(ends, today + 1)
+    days = np.clip((end - first).astype(np.int64), 0, None)
+    in_window = (starts >= window_start) & (starts <= today)
+
+    per_vehicle = (
+        pd.DataFrame(
+            {
+                "vehicle_id": reservations["vehicle_id"].to_numpy(),
+                "reserved_days": days,
+                "reservations": (days > 0).astype(np.int64),
+                "revenue": np.where(in_window, reservations["price"].to_numpy(), 0),
+            }
+        )
+        .groupby("vehicle_id")
+        .sum()
+    )
+
+    vehicles = pd.DataFrame(
+        db.session.execute(
+            select(Veiculo.id, Veiculo.brand, Veiculo.model, Categoria.nome)
+            .join(Categoria, Veiculo.categoria_id == Categoria.id)
+            .order_by(Veiculo.id)
+        ).all(),
+        columns=["vehicle_id", "brand", "model", "categoria"],
+    ).set_index("vehicle_id")
+
+    # Veículos sem reservas na janela ficam com ocupação zero
+    result = vehicles.join(per_vehicle, how="left").fillna(
+        {"reserved_days": 0, "reservations": 0, "revenue": 0.0}
+    )
+    result["reserved_days"] = result["reserved_days"].astype(np.int64)
+    result["reservations"] = result["reservations"].astype(np.int64)
+    result["occupancy"] = (result["reserved_days"] / REPORT_WINDOW_DAYS).round(4)
+    return result.reset_index()
+
+
+def category_revenue(reservations):
+    """
+    Receita, número de reservas e dias reservados por categoria e por mês
+    (o mês em que a reserva começa).
+    """
+    month = reservations["start"].to_numpy().astype("datetime64[M]")
+    result = (
+        reservations.assign(month=month.astype("datetime64[s]"))
+        .groupby(["month", "categoria"], as_index=False)
+        .agg(
+            reservations=("price", "size"),
+            reserved_days=("duration", "sum"),
+            revenue=("price", "sum"),
+        )
+    )
+    result["month"] = result["month"].dt.date
+    result["revenue"] = result["revenue"].round(2)
+    return result
+
+
+def _records(df, columns):
+    """
+    Converte as colunas de um DataFrame em dicionários com tipos Python,
+    prontos para um INSERT em lote.
+    """
+    return [
+        dict(zip(columns, values))
+        for values in zip(*(df[column].tolist() for column in columns))
+    ]
+
+
+def refresh_reports(today=None):
+    """
+    Recalcula as tabelas dos relatórios (ocupação por veículo e receita por
+    categoria e mês) e substitui-as numa única transação.
+    Devolve o número de linhas inseridas.
+    """
+    reservations = load_reservations()
+    utilization = vehicle_utilization(reservations, today)
+    revenue = category_revenue(reservations)
+
+    db.session.execute(delete(VehicleUtilization))
+    db.session.execute(delete(CategoryRevenue))
+
+    inserted = 0
+    for model, df in [
+        (VehicleUtilization, utilization),
+        (CategoryRevenue, revenue),
+    ]:
+        columns = [c.name for c in model.__table__.columns if c.name in df.columns]
+        records = _records(df, columns)
+        for start in range(0, len(records), INSERT_BATCH):
+            db.session.execute(insert(model), records[start : start + INSERT_BATCH])
+        inserted += len(records)
+
+    Watermark.set("reports", datetime.now())
+    db.session.commit()
+    return inserted
+
+
+def reports_refreshed_at():
+    """
+    Data e hora do último cálculo dos relatórios (None se nunca foram calculados).
+    """
+    return Watermark.get("reports")
@@ -0,0 +1,279 @@
+import random
+from datetime import date, time, timedelta
+from sqlalchemy import func
+from models import db, Categoria, Cliente, Reservation, Veiculo, VehicleType
+
+# Linhas inseridas de cada vez (para grandes volumes não ficarem em memória)
+INSERT_BATCH = 5000
+
+# Perfil de cada categoria: parte da frota e dos clientes, intervalo da
+# diária (coerente com as regras de categoria da aplicação), ocupação média
+# e duração média das reservas (em dias)
+TIERS = {
+    "Gold": {
+        "fleet": 0.15,
+        "clients": 0.10,
+        "price": (260, 600),
+        "occupancy": 0.45,
+        "duration": 6,
+    },
+    "Silver": {
+        "fleet": 0.35,
+        "clients": 0.35,
+        "price": (55, 250),
+        "occupancy": 0.60,
+        "duration": 4,
+    },
+    "Económico": {
+        "fleet": 0.50,
+        "clients": 0.55,
+        "price": (20, 50),
+        "occupancy": 0.70,
+        "duration": 3,
+    },
+}
+
+# Marcas e modelos por categoria; as marcas de motas estão em MOTAS
+MODELOS = {
+    "Gold": {
+        "BMW": ["X5", "Série 5", "R 1250 GS"],
+        "Mercedes-Benz": ["Classe E", "GLE"],
+        "Tesla": ["Model S", "Model X"],
+        "Ducati": ["Multistrada V4"],
+    },
+    "Silver": {
+        "Toyota": ["Corolla", "C-HR", "RAV4"],
+        "Volkswagen": ["Golf", "Passat", "T-Roc"],
+        "Peugeot": ["308", "3008"],
+        "Honda": ["Africa Twin", "CB 650R"],
+        "Yamaha": ["Tracer 9", "MT-07"],
+    },
+    "Económico": {
+        "Renault": ["Clio", "Captur"],
+        "Fiat": ["Panda", "500"],
+        "Dacia": ["Sandero", "Spring"],
+        "Honda": ["PCX 125"],
+        "Yamaha": ["NMAX"],
+    },
+}
+MOTAS = {"Honda", "Yamaha", "Ducati"}
+
+# Nome da categoria de veículos de cada perfil, como em add_vehicle e
+# edit_vehicle (os clientes guardam o nome do perfil, "Económico")
+CATEGORIA_VEICULO = {"Gold": "Gold", "Silver": "Silver", "Económico": "Econômico"}
+
+NOMES = ["Ana", "João", "Maria", "Pedro", "Inês", "Tiago", "Rita", "Miguel"]
+NOMES += ["Sofia", "Rui", "Beatriz", "Diogo", "Carla", "Nuno", "Marta", "Luís"]
+APELIDOS = ["Silva", "Santos", "Ferreira", "Pereira", "Oliveira", "Costa"]
+APELIDOS += ["Rodrigues", "Martins", "Sousa", "Fernandes", "Gonçalves", "Lopes"]
+CIDADES = ["Lisboa", "Porto", "Braga", "Coimbra", "Faro", "Aveiro", "Setúbal"]
+
+# Ocupação relativa por mês (verão mais procurado, inverno menos)
+SAZONALIDADE = {1: 0.7, 2: 0.7, 3: 0.8, 4: 0.95, 5: 1.0, 6: 1.15}
+SAZONALIDADE.update({7: 1.35, 8: 1.4, 9: 1.1, 10: 0.9, 11: 0.75, 12: 0.9})
+
+# Percentagem de reservas canceladas
+CANCEL_RATE = 0.08
+
+
+def seed_categorias():
+    """
+    Garante que as categorias de veículos de cada perfil existem e devolve
+    {perfil: id}.
+    """
+    existentes = {c.nome: c.id for c in Categoria.query.all()}
+    for nome in CATEGORIA_VEICULO.values():
+        if nome not in existentes:
+            categoria = Categoria(nome=nome)
+            db.session.add(categoria)
+            db.session.flush()
+            existentes[nome] = categoria.id
+    db.session.commit()
+    return {tier: existentes[nome] for tier, nome in CATEGORIA_VEICULO.items()}
+
+
+def _insert(model, rows):
+    for start in range(0, len(rows), INSERT_BATCH):
+        db.session.execute(db.insert(model), rows[start : start + INSERT_BATCH])
+
+
+def _tier(rng, share):
+    """
+    Escolhe uma categoria segundo a parte da frota ou dos clientes.
+    """
+    return rng.choices(list(TIERS), [TIERS[t][share] for t in TIERS])[0]
+
+
+def seed_fleet(count, history_days, rng):
+    """
+    Insere count veículos, distribuídos pelas categorias; devolve
+    [(id, categoria, diária)].
+    """
+    categorias = seed_categorias()
+    today = date.today()
+    rows = []
+    for _ in range(count):
+        tier = _tier(rng, "fleet")
+        marca = rng.choice(list(MODELOS[tier]))
+        low, high = TIERS[tier]["price"]
+        last_maintenance = today - timedelta(days=rng.randint(0, 170))
+        last_legalization = today - timedelta(days=rng.randint(0, 360))
+        rows.append(
+            {
+                "type": VehicleType.MOTA if marca in MOTAS else VehicleType.CARRO,
+                "brand": marca,
+                "model": rng.choice(MODELOS[tier][marca]),
+                "year": rng.randint(today.year - 8, today.year),
+                "price_per_day": round(rng.uniform(low, high), 2),
+                "status": rng.random() > 0.02,
+                "in_maintenance": rng.random() < 0.03,
+                "last_maintenance_date": last_maintenance,
+                "next_maintenance_date": last_maintenance + timedelta(days=180),
+                "last_legalization_date": last_legalization,
+                "next_legalization_date": last_legalization + timedelta(days=365),
+                "available_from": today - timedelta(days=history_days),
+                "num_uses": rng.randint(0, 49),
+                "max_uses_before_maintenance": 50,
+                "categoria_id": categorias[tier],
+            }
+        )
+
+    first_id = (db.session.query(func.max(Veiculo.id)).scalar() or 0) + 1
+    _insert(Veiculo, rows)
+    db.session.commit()
+    names = {id: nome for nome, id in categorias.items()}
+    return [
+        (id, names[categoria_id], price)
+        for id, categoria_id, price in db.session.query(
+            Veiculo.id, Veiculo.categoria_id, Veiculo.price_per_day
+        ).filter(Veiculo.id >= first_id)
+    ]
+
+
+def seed_customers(count, rng):
+    """
+    Insere count clientes, distribuídos pelas categorias (o email é
+    clienteN@exemplo.pt e a palavra-passe password123); devolve
+    {categoria: [ids]}.
+    """
+    today = date.today()
+    offset = db.session.query(func.max(Cliente.id)).scalar() or 0
+    # Os NIF continuam a partir do maior já registado
+    first_nif = max(
+        200000000, (db.session.query(func.max(Cliente.nif)).scalar() or 0) + 1
+    )
+    rows = []
+    for i in range(offset, offset + count):
+        tier = _tier(rng, "clients")
+        low, high = TIERS[tier]["price"]
+        rows.append(
+            {
+                "nome": rng.choice(NOMES),
+                "apelido": rng.choice(APELIDOS),
+                "email": f"cliente{i}@exemplo.pt",
+                "telefone": f"9{rng.randint(10000000, 69999999)}",
+                "data_nascimento": today - timedelta(days=rng.randint(18, 80) * 365),
+                "morada": f"Rua {rng.randint(1, 300)}, {rng.choice(CIDADES)}",
+                "nif": first_nif + i - offset,
+                "price_per_day": round(rng.uniform(low, high)),
+                "password": "password123",
+                "categoria": tier,
+            }
+        )
+    _insert(Cliente, rows)
+    db.session.commit()
+
+    customers = {tier: [] for tier in TIERS}
+    for id, tier in db.session.query(Cliente.id, Cliente.categoria).filter(
+        Cliente.id > offset
+    ):
+        customers.setdefault(tier, []).append(id)
+    return customers
+
+
+def _reservations_for(
+    vehicle, customers, all_customers, history_days, future_days, rng
+):
+    """
+    Reservas de um veículo, sem sobreposições, do início do histórico até
+    future_days depois de hoje. A ocupação segue a categoria e o mês, e as
+    datas mais distantes têm menos reservas (ainda não foram feitas).
+    """
+    vehicle_id, tier, price = vehicle
+    profile = TIERS[tier]
+    today = date.today()
+    day = today - timedelta(days=history_days)
+    end = today + timedelta(days=future_days)
+
+    rows = []
+    while True:
+        occupancy = min(profile["occupancy"] * SAZONALIDADE[day.month], 0.95)
+        if day > today:
+            occupancy *= max(1 - (day - today).days / max(future_days, 1), 0.05)
+        duration = max(1, round(rng.expovariate(1 / profile["duration"])))
+        # Intervalo médio entre reservas para a ocupação pretendida
+        gap = rng.expovariate(occupancy / (duration * (1 - occupancy)))
+        start = day + timedelta(days=round(gap))
+        # Muitas reservas curtas começam à sexta-feira (fins de semana)
+        if duration <= 3 and rng.random() < 0.25:
+            start += timedelta(days=(4 - start.weekday()) % 7)
+        finish = start + timedelta(days=duration)
+        if finish > end:
+            break
+
+        if rng.random() < CANCEL_RATE:
+            status = "Cancelada"
+        elif finish < today:
+            status = "Concluída"
+        else:
+            status = "Ativa"
+        pool = customers.get(tier) if rng.random() < 0.85 else None
+        pickup = time(rng.randint(8, 18), rng.choice([0, 30]))
+        rows.append(
+            {
+                "customer_id": rng.choice(pool or all_customers),
+                "vehicle_id": vehicle_id,
+                "status": status,
+                "start_date": start,
+                "start_time": pickup,
+                "end_date": finish,
+                "end_time": pickup,
+                "duration": duration,
+                "price": round(duration * price, 2),
+            }
+        )
+        # Uma reserva cancelada não ocupa o veículo
+        day = start if status == "Cancelada" else finish + timedelta(days=1)
+    return rows
+
+
+def seed_database(vehicles, clients, history_days=365, future_days=90, seed=42):
+    """
+    Gera uma frota, uma base de clientes e o histórico de reservas (com as
+    datas distribuídas como descrito em _reservations_for). Com a mesma
+    semente, os dados gerados são os mesmos. Devolve o número de linhas
+    inseridas em cada tabela.
+    """
+    rng = random.Random(seed)
+    fleet = seed_fleet(vehicles, history_days, rng)
+    customers = seed_customers(clients, rng)
+    all_customers = [id for ids in customers.values() for id in ids]
+    if not all_customers:
+        all_customers = [id for (id,) in db.session.query(Cliente.id)]
+
+    reservations = 0
+    rows = []
+    if all_customers:
+        for vehicle in fleet:
+            rows += _reservations_for(
+                vehicle, customers, all_customers, history_days, future_days, rng
+            )
+            if len(rows) >= INSERT_BATCH:
+                reservations += len(rows)
+                _insert(Reservation, rows)
+                rows = []
+        reservations += len(rows)
+        _insert(Reservation, rows)
+        db.session.commit()
+
+    return {"veiculos": len(fleet), "clientes": clients, "reservas": reservations}
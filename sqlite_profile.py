@@ -0,0 +1,28 @@
+from sqlalchemy import event
+
+
+def apply_sqlite_profile(engine, pragmas):
+    """
+    Regista um evento no engine que aplica os PRAGMAs do perfil a cada nova
+    ligação ao SQLite.
+    """
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def current_pragmas(engine, names):
+    """
+    Lê os valores atuais dos PRAGMAs indicados, para diagnóstico.
+    """
+    with engine.connect() as connection:
+        return {
+            name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in names
+        }
@@ -0,0 +1,164 @@
+import time as timer
+from datetime import date, datetime, time, timedelta
+from flask import current_app
+from sqlalchemy import delete, func, insert, literal, select, update
+from models import (
+    db,
+    Veiculo,
+    Reservation,
+    VehicleAlert,
+    VehicleEvent,
+    VehicleEventType,
+    Watermark,
+)
+from occupancy import occupancy_matrix
+from vehicle_search import vehicle_search_index
+
+# Métricas dos varrimentos neste processo: linhas alteradas e duração
+sweep_metrics = {}
+
+
+def record_sweep(name, rows, duration):
+    """
+    Regista as métricas de uma execução de um varrimento.
+    """
+    metrics = sweep_metrics.setdefault(
+        name, {"runs": 0, "total_rows": 0, "last_rows": 0, "last_duration_ms": 0.0}
+    )
+    metrics["runs"] += 1
+    metrics["total_rows"] += rows
+    metrics["last_rows"] = rows
+    metrics["last_duration_ms"] = round(duration * 1000, 2)
+    metrics["last_run"] = datetime.now()
+    current_app.logger.info(
+        "Varrimento %s: %s linha(s) alterada(s) em %.2f ms",
+        name,
+        rows,
+        duration * 1000,
+    )
+
+
+def run_maintenance_sweep(full=False):
+    """
+    Conclui a manutenção dos veículos cuja data de próxima manutenção já passou,
+    com um único UPDATE, e regista a conclusão no histórico de cada veículo
+    com um único INSERT ... SELECT.
+
+    Só são considerados os veículos cuja data passou desde a última execução
+    (marca de água "maintenance"); com full=True a frota inteira é verificada.
+    Devolve o número de veículos atualizados.
+    """
+    today = date.today()
+    watermark = None if full else Watermark.get("maintenance")
+
+    conditions = [
+        Veiculo.in_maintenance == True,  # noqa: E712
+        Veiculo.next_maintenance_date <= today,
+    ]
+    if watermark:
+        conditions.append(Veiculo.next_maintenance_date >= watermark.date())
+
+    # O evento tem a data em que a manutenção terminou, não a do varrimento
+    db.session.execute(
+        insert(VehicleEvent).from_select(
+            ["vehicle_id", "type", "date", "num_uses", "notes", "created_at"],
+            select(
+                Veiculo.id,
+                literal(VehicleEventType.MANUTENCAO_CONCLUIDA.name),
+                Veiculo.next_maintenance_date,
+                func.coalesce(Veiculo.num_uses, 0),
+                literal("Concluída pelo varrimento de manutenção"),
+                literal(datetime.now()),
+            ).where(*conditions),
+        )
+    )
+    result = db.session.execute(
+        update(Veiculo)
+        .where(*conditions)
+        .values(
+            status=True,
+            in_maintenance=False,
+            next_maintenance_date=func.date(Veiculo.last_maintenance_date, "+180 days"),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    Watermark.set("maintenance", datetime.combine(today, time.min))
+    db.session.commit()
+
+    if result.rowcount:
+        occupancy_matrix.invalidate()
+        vehicle_search_index.invalidate()
+
+    return result.rowcount
+
+
+def run_reservation_sweep():
+    """
+    Passa a "Concluída" as reservas ativas cuja data de fim já passou.
+    Devolve o número de reservas atualizadas.
+    """
+    return Reservation.update_completed_reservations()
+
+
+def refresh_vehicle_alerts(vehicle_id=None):
+    """
+    Atualiza a tabela de alertas: veículos fora de manutenção cuja próxima
+    manutenção ou legalização é nos próximos 30 dias (ou já passou).
+
+    Sem vehicle_id a tabela é recalculada por inteiro com INSERT ... SELECT;
+    com vehicle_id só os alertas desse veículo são recalculados.
+    Devolve o número de alertas inseridos.
+    """
+    today = date.today()
+    limit = today + timedelta(days=30)
+    columns = ["vehicle_id", "kind", "due_date", "type", "brand", "model"]
+
+    cleanup = delete(VehicleAlert)
+    if vehicle_id is not None:
+        cleanup = cleanup.where(VehicleAlert.vehicle_id == vehicle_id)
+    db.session.execute(cleanup)
+
+    inserted = 0
+    for kind, due_date in [
+        (VehicleAlert.MAINTENANCE, Veiculo.next_maintenance_date),
+        (VehicleAlert.LEGALIZATION, Veiculo.next_legalization_date),
+    ]:
+        query = select(
+            Veiculo.id,
+            literal(kind),
+            due_date,
+            Veiculo.type,
+            Veiculo.brand,
+            Veiculo.model,
+        ).where(
+            Veiculo.in_maintenance == False,  # noqa: E712
+            due_date <= limit,
+        )
+        if vehicle_id is not None:
+            query = query.where(Veiculo.id == vehicle_id)
+        result = db.session.execute(insert(VehicleAlert).from_select(columns, query))
+        inserted += result.rowcount
+
+    if vehicle_id is None:
+        Watermark.set("alerts", datetime.combine(today, time.min))
+    db.session.commit()
+
+    return inserted
+
+
+def alerts_are_stale():
+    """
+    Verifica se a tabela de alertas não foi atualizada hoje.
+    """
+    refreshed = Watermark.get("alerts")
+    return refreshed is None or refreshed.date() < date.today()
+
+
+def timed_sweep(name, func, **kwargs):
+    """
+    Executa um varrimento e regista as linhas alteradas e a duração.
+    """
+    start = timer.perf_counter()
+    rows = func(**kwargs)
+    record_sweep(name, rows, timer.perf_counter() - start)
+    return rows
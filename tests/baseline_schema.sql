@@ -0,0 +1,82 @@
+-- Esquema da base de dados antes da primeira migração (commit 5ea8567),
+-- criado pelo db.create_all() do arranque da aplicação nessa versão.
+
+CREATE TABLE categorias (
+	id INTEGER NOT NULL,
+	nome VARCHAR(50) NOT NULL,
+	PRIMARY KEY (id),
+	UNIQUE (nome)
+);
+
+CREATE TABLE clientes (
+	id INTEGER NOT NULL,
+	nome VARCHAR(100) NOT NULL,
+	apelido VARCHAR(100) NOT NULL,
+	email VARCHAR(100) NOT NULL,
+	telefone VARCHAR(20) NOT NULL,
+	data_nascimento DATE NOT NULL,
+	morada VARCHAR(200) NOT NULL,
+	nif INTEGER NOT NULL,
+	price_per_day FLOAT NOT NULL,
+	password VARCHAR(100) NOT NULL,
+	categoria VARCHAR(20) NOT NULL,
+	PRIMARY KEY (id)
+);
+
+CREATE UNIQUE INDEX ix_clientes_email ON clientes (email);
+
+CREATE UNIQUE INDEX ix_clientes_nif ON clientes (nif);
+
+CREATE INDEX ix_clientes_nome ON clientes (nome);
+
+CREATE INDEX ix_clientes_telefone ON clientes (telefone);
+
+CREATE INDEX ix_clientes_apelido ON clientes (apelido);
+
+CREATE TABLE veiculos (
+	id INTEGER NOT NULL,
+	type VARCHAR(5) NOT NULL,
+	brand VARCHAR(100) NOT NULL,
+	model VARCHAR(100) NOT NULL,
+	year INTEGER NOT NULL,
+	price_per_day FLOAT NOT NULL,
+	status BOOLEAN,
+	in_maintenance BOOLEAN,
+	last_maintenance_date DATE,
+	next_maintenance_date DATE,
+	maintenance_history VARCHAR(1000),
+	last_legalization_date DATE,
+	next_legalization_date DATE,
+	legalization_history VARCHAR(1000),
+	imagens VARCHAR(1000),
+	available_from DATE,
+	num_uses INTEGER,
+	max_uses_before_maintenance INTEGER,
+	categoria_id INTEGER NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(categoria_id) REFERENCES categorias (id)
+);
+
+CREATE INDEX ix_veiculos_brand ON veiculos (brand);
+
+CREATE INDEX ix_veiculos_model ON veiculos (model);
+
+CREATE TABLE reservation (
+	id INTEGER NOT NULL,
+	fk_reservation_customer INTEGER NOT NULL,
+	fk_reservation_vehicle INTEGER NOT NULL,
+	status VARCHAR(20) NOT NULL,
+	start_date DATE NOT NULL,
+	start_time TIME NOT NULL,
+	end_date DATE NOT NULL,
+	end_time TIME NOT NULL,
+	duration INTEGER NOT NULL,
+	price FLOAT NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(fk_reservation_customer) REFERENCES clientes (id),
+	FOREIGN KEY(fk_reservation_vehicle) REFERENCES veiculos (id)
+);
+
+CREATE INDEX ix_reservation_fk_reservation_vehicle ON reservation (fk_reservation_vehicle);
+
+CREATE INDEX ix_reservation_fk_reservation_customer ON reservation (fk_reservation_customer);
@@ -0,0 +1,100 @@
+import os
+import random
+import tempfile
+
+import pytest
+
+# config.py lê DATABASE_URL quando é importado: os testes usam uma base de
+# dados temporária, nunca a de database/
+TMP_DIR = tempfile.mkdtemp(prefix="tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'test.db')}"
+os.environ["EXPORT_CACHE_DIR"] = os.path.join(TMP_DIR, "exports")
+
+
+@pytest.fixture(scope="session")
+def app():
+    """
+    Aplicação com as tabelas criadas numa base de dados temporária.
+    """
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def reset_memory_state():
+    """
+    Esquece o que está em memória no processo (índices e cache dos
+    clientes), para que nada passe de uma base de dados para a outra.
+    """
+    from availability import index_sync
+    from user_cache import user_cache
+
+    index_sync.reset()
+    user_cache.clear()
+
+
+@pytest.fixture(scope="module")
+def seeded_app():
+    """
+    Aplicação com uma base de dados temporária própria, para os testes que a
+    enchem com o gerador de dados (as linhas não passam para os outros
+    testes, que continuam a usar a de app).
+    """
+    from app import create_app
+    from config import Config
+    from models import db
+
+    path = tempfile.mkstemp(prefix="seeded_", suffix=".db", dir=TMP_DIR)[1]
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(Config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{path}")
+        seeded = create_app()
+    seeded.config["TESTING"] = True
+    with seeded.app_context():
+        db.create_all()
+
+    reset_memory_state()
+    yield seeded
+    reset_memory_state()
+
+
+@pytest.fixture
+def vehicle_id(app):
+    """
+    Um veículo novo, ativo e fora de manutenção, sem reservas.
+    """
+    from models import db, Categoria, Veiculo, VehicleType
+
+    with app.app_context():
+        categoria = Categoria.query.filter_by(nome="Gold").first()
+        if categoria is None:
+            categoria = Categoria(nome="Gold")
+            db.session.add(categoria)
+        veiculo = Veiculo(
+            type=VehicleType.CARRO,
+            brand="BMW",
+            model="X5",
+            year=2022,
+            price_per_day=300,
+            categoria=categoria,
+        )
+        veiculo.initialize_vehicle()
+        db.session.add(veiculo)
+        db.session.commit()
+        return veiculo.id
+
+
+@pytest.fixture
+def customer_id(app):
+    """
+    Um cliente novo (palavra-passe password123).
+    """
+    from seed import seed_customers
+
+    with app.app_context():
+        customers = seed_customers(1, random.Random())
+        return next(ids[0] for ids in customers.values() if ids)
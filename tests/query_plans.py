@@ -0,0 +1,245 @@
+"""
+Verificação dos planos de consulta das consultas emitidas pelas views.
+
+Percorre as páginas com o cliente de testes do Flask (e as tarefas
+periódicas), guarda todas as consultas emitidas e corre EXPLAIN QUERY PLAN
+sobre cada uma. Usado pelos testes (tests/test_query_plans.py) e pela
+verificação numa base de dados grande (benchmarks/check_query_plans.py).
+"""
+
+import re
+from datetime import date, time as dtime, timedelta
+
+# Leituras completas aceites: (endpoint ou tarefa, tabela) -> motivo; com
+# endpoint None, aceites em qualquer endpoint
+ALLOWED_SCANS = {
+    (None, "data_versions"): "tabela de duas linhas (contadores dos índices)",
+    (
+        "index",
+        "veiculos",
+    ): "o catálogo devolve quase toda a frota ativa (só as colunas mostradas, "
+    "sem os veículos ocupados, excluídos na consulta) e a matriz de ocupação "
+    "tem uma linha por veículo",
+    (
+        "index",
+        "vehicle_images",
+    ): "as capas de quase toda a frota ativa numa só consulta",
+    ("occupancy", "veiculos"): "a matriz de ocupação tem uma linha por veículo",
+    ("categorias", "categorias"): "tabela pequena, listada por inteiro",
+    ("admin_panel", "veiculos"): "COUNT(*) do estoque percorre o menor índice",
+    ("admin_panel", "clientes"): "COUNT(*) do estoque percorre o menor índice",
+    (
+        "list_vehicles",
+        "veiculos",
+    ): "lida pela ordem do índice; o LIMIT termina a leitura",
+    ("list_vehicles", "categorias"): "tabela pequena (filtro de categoria)",
+    (
+        "list_clients",
+        "clientes",
+    ): "lida pela ordem do índice; o LIMIT termina a leitura",
+    (
+        "vehicle_events",
+        "vehicle_events",
+    ): "lida pela ordem do índice de datas; o LIMIT termina a leitura",
+    (
+        "job_runs",
+        "job_runs",
+    ): "lida pela ordem do índice de datas; o LIMIT termina a leitura",
+    ("export_csv", "veiculos"): "exportação completa da frota",
+    ("export_excel", "veiculos"): "exportação completa da frota",
+    ("export_clients_csv", "clientes"): "exportação completa dos clientes",
+    ("export_reservations_csv", "reservation"): "exportação completa das reservas",
+    ("export_excel", "clientes"): "exportação completa dos clientes",
+    ("export_excel", "reservation"): "exportação completa das reservas",
+    ("refresh_reports_view", "veiculos"): "o relatório tem uma linha por veículo",
+    ("refresh_reports_view", "categorias"): "tabela pequena (categoria das reservas)",
+    (
+        "refresh_reports_view",
+        "reservation",
+    ): "o relatório lê todas as reservas não canceladas do histórico",
+    (
+        "admin_reports",
+        "category_revenue",
+    ): "tabela pequena: uma linha por categoria e mês",
+    (
+        "admin_reports",
+        "vehicle_utilization",
+    ): "média no índice de cobertura; listas pela ordem do índice com LIMIT",
+    (
+        "vehicle_utilization_report",
+        "vehicle_utilization",
+    ): "lida pela ordem do índice; o LIMIT termina a leitura",
+    (
+        "vehicle_utilization_report",
+        "categorias",
+    ): "tabela pequena (filtro de categoria)",
+}
+
+SCAN_PATTERN = re.compile(r"^SCAN (\w+)")
+FTS_MATCH_PATTERN = re.compile(r"VIRTUAL TABLE INDEX \d+:M")
+
+
+class StatementRecorder:
+    """
+    Guarda as instruções SELECT, UPDATE e DELETE executadas, com os parâmetros
+    e o contexto em que foram emitidas.
+    """
+
+    def __init__(self):
+        self.context = None
+        self.statements = {}
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        from flask import has_request_context, request
+
+        if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            return
+        label = request.endpoint if has_request_context() else self.context
+        self.statements.setdefault((label, statement), parameters)
+
+
+def full_scans(connection, statement, parameters):
+    """
+    Devolve as tabelas lidas por inteiro segundo o EXPLAIN QUERY PLAN.
+    """
+    plan = connection.exec_driver_sql(
+        "EXPLAIN QUERY PLAN " + statement, parameters
+    ).fetchall()
+    tables = []
+    for row in plan:
+        match = SCAN_PATTERN.match(row[-1])
+        if FTS_MATCH_PATTERN.search(row[-1]):
+            # Tabela FTS5 consultada com MATCH: é uma pesquisa no índice invertido
+            continue
+        if match and match.group(1) != "CONSTANT":
+            tables.append((match.group(1), row[-1]))
+    return tables
+
+
+def drive_views(app, recorder):
+    """
+    Percorre as páginas e tarefas da aplicação para recolher as consultas.
+    """
+    from models import db, Veiculo, Reservation
+    from booking import book_vehicle, BookingConflict
+    from occupancy import occupancy_matrix
+    from availability import availability_index
+    from sweeps import (
+        refresh_vehicle_alerts,
+        run_maintenance_sweep,
+        run_reservation_sweep,
+    )
+
+    with app.app_context():
+        vehicle_id = Veiculo.query.filter_by(in_maintenance=False).first().id
+
+    client = app.test_client()
+    inicio = date.today() + timedelta(days=10)
+    datas = f"data_inicio={inicio}&data_entrega={inicio + timedelta(days=3)}"
+    client.get("/")
+    client.get(f"/?categoria=Gold&{datas}")
+    client.get(f"/?flexivel=1&{datas}")
+    client.get(f"/vehicle/{vehicle_id}")
+    client.post(
+        "/client_login",
+        data={"email": "cliente0@exemplo.pt", "password": "password123"},
+    )
+    client.get(f"/?{datas}")
+    client.get(f"/reserve/{vehicle_id}")
+    pedido = {
+        "veiculo_id": vehicle_id,
+        "data_recolha": str(date.today() + timedelta(days=500)),
+        "hora_recolha": "10:00",
+        "duracao": "2",
+        "payment_method": "mbway",
+    }
+    client.post(f"/reserve/{vehicle_id}", data=pedido)
+    client.post("/complete_payment", data=pedido)
+    client.get("/client_reservations")
+    with app.app_context():
+        reservation_id = db.session.query(db.func.max(Reservation.id)).scalar()
+    client.post(f"/cancel_reservation/{reservation_id}")
+
+    with client.session_transaction() as session:
+        session["admin"] = True
+    client.post("/admin/reports/refresh")
+    for path in [
+        "/admin",
+        "/admin/availability",
+        "/admin/list-vehicles",
+        "/admin/list-vehicles?sort=brand",
+        "/admin/list-vehicles?sort=price_per_day&order=desc&status=disponivel",
+        "/admin/list-vehicles?categoria=1&sort=year",
+        f"/admin/view_vehicle/{vehicle_id}",
+        "/admin/categorias",
+        "/list_clients",
+        "/list_clients?sort=apelido",
+        "/list_clients?q=cliente1",
+        "/list_clients?q=apelido9&sort=nome",
+        "/export_csv",
+        "/export_csv/clients",
+        "/export_csv/reservations",
+        "/export_csv/reservations?status=Ativa&de=2020-01-01&ate=2030-12-31",
+        "/export_excel",
+        "/export_excel?folhas=veiculos,reservas,clientes",
+        "/admin/reports",
+        "/admin/reports/vehicles",
+        "/admin/reports/vehicles?categoria=Gold",
+        "/admin/events",
+        f"/admin/events?vehicle_id={vehicle_id}",
+        f"/admin/events?tipo=MANUTENCAO_INICIADA&de={date.today() - timedelta(days=90)}",
+        f"/admin/events?de={date.today() - timedelta(days=90)}&ate={date.today()}",
+        "/admin/jobs",
+        "/admin/jobs?nome=reports",
+    ]:
+        client.get(path).get_data()
+
+    with app.app_context():
+        recorder.context = "occupancy"
+        occupancy_matrix.rebuild()
+        recorder.context = "availability_index"
+        availability_index.rebuild()
+        recorder.context = "maintenance_sweep"
+        run_maintenance_sweep()
+        recorder.context = "reservation_sweep"
+        run_reservation_sweep()
+        recorder.context = "alerts"
+        refresh_vehicle_alerts()
+        recorder.context = "booking"
+        try:
+            book_vehicle(1, vehicle_id, inicio, dtime(10, 0), 2, 100.0)
+        except BookingConflict:
+            pass
+
+
+def plan_failures(app, verbose=False):
+    """
+    Percorre as views e devolve (número de consultas, leituras completas
+    [(estado, endpoint, detalhe, consulta)]): só as que não estão em
+    ALLOWED_SCANS, ou também as permitidas com verbose=True.
+    """
+    from sqlalchemy import event
+    from models import db
+
+    with app.app_context():
+        engine = db.engine
+
+    recorder = StatementRecorder()
+    event.listen(engine, "before_cursor_execute", recorder)
+    try:
+        drive_views(app, recorder)
+    finally:
+        event.remove(engine, "before_cursor_execute", recorder)
+
+    scans = []
+    with engine.connect() as connection:
+        for (label, statement), parameters in recorder.statements.items():
+            for table, detail in full_scans(connection, statement, parameters):
+                allowed = ALLOWED_SCANS.get((label, table)) or ALLOWED_SCANS.get(
+                    (None, table)
+                )
+                if allowed and not verbose:
+                    continue
+                status = f"permitido ({allowed})" if allowed else "FALHA"
+                scans.append((status, label, detail, " ".join(statement.split())))
+    return len(recorder.statements), scans
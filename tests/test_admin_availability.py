@@ -0,0 +1,37 @@
+from availability import availability_index, index_sync
+from data_versions import FLEET, read_versions
+
+
+def test_check_skips_an_index_that_is_not_loaded(app, monkeypatch):
+    monkeypatch.setattr(index_sync, "_checked", None)
+    with app.app_context():
+        index_sync.refresh()
+    availability_index.invalidate()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["admin"] = True
+    response = client.get("/admin/availability", follow_redirects=True)
+    assert "não está carregado" in response.get_data(as_text=True)
+    assert "diferença" not in response.get_data(as_text=True)
+
+
+def test_cli_rebuild_reaches_the_server_processes(app, monkeypatch):
+    """
+    O comando corre noutro processo: em vez de reconstruir o seu próprio
+    índice, incrementa o contador da frota, e os processos do servidor
+    invalidam os índices na verificação seguinte.
+    """
+    monkeypatch.setattr(index_sync, "CHECK_INTERVAL", 0)
+    with app.app_context():
+        index_sync.refresh()
+        availability_index.rebuild()
+        before = read_versions()[FLEET]
+
+    result = app.test_cli_runner().invoke(args=["availability", "rebuild"])
+    assert result.exit_code == 0, result.output
+
+    with app.app_context():
+        assert read_versions()[FLEET] == before + 1
+        assert index_sync.refresh() is None
+    assert not availability_index.loaded
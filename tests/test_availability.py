@@ -0,0 +1,94 @@
+from datetime import date, time, timedelta
+
+import pytest
+
+from availability import (
+    availability_index,
+    available_vehicles_query,
+    register_reservation,
+)
+from booking import BookingConflict, book_vehicle
+from models import Reservation
+from occupancy import occupancy_matrix
+
+
+def is_free(vehicle_id, inicio, entrega):
+    """
+    Disponibilidade do veículo segundo a consulta SQL, o índice em memória e a
+    matriz de ocupação (que têm de coincidir).
+    """
+    sql = vehicle_id in [v.id for v in available_vehicles_query(inicio, entrega)]
+    index = not availability_index.has_conflict(vehicle_id, inicio, entrega)
+    matrix = vehicle_id in occupancy_matrix.search(inicio, entrega, flex_days=0)
+    assert sql == index == matrix
+    return sql
+
+
+@pytest.mark.parametrize(
+    "inicio, entrega, livre",
+    [
+        (13, 15, True),  # recolha no dia de entrega da reserva existente
+        (14, 16, True),
+        (8, 10, True),  # entrega no dia em que a reserva existente começa
+        (8, 11, False),
+        (8, 9, True),
+        (11, 12, False),
+        (9, 14, False),
+    ],
+)
+def test_return_day_is_free_for_a_new_pickup(
+    app, vehicle_id, customer_id, inicio, entrega, livre
+):
+    today = date.today()
+    with app.app_context():
+        availability_index.rebuild()
+        occupancy_matrix.rebuild()
+        Reservation(
+            customer_id=customer_id,
+            vehicle_id=vehicle_id,
+            start_date=today + timedelta(days=10),
+            start_time=time(10, 0),
+            end_date=today + timedelta(days=13),
+            end_time=time(10, 0),
+            duration=3,
+            price=900,
+        ).add_reservations()
+
+        assert (
+            is_free(
+                vehicle_id,
+                today + timedelta(days=inicio),
+                today + timedelta(days=entrega),
+            )
+            == livre
+        )
+
+
+@pytest.mark.parametrize("order", [(0, 1), (1, 0)])
+def test_back_to_back_bookings_in_either_order(app, vehicle_id, customer_id, order):
+    """
+    Duas reservas seguidas (a segunda começa no dia de entrega da primeira)
+    podem coexistir, seja qual for a que é feita primeiro.
+    """
+    today = date.today()
+    periods = [today + timedelta(days=30), today + timedelta(days=33)]
+    with app.app_context():
+        availability_index.rebuild()
+        occupancy_matrix.rebuild()
+        for position in order:
+            assert is_free(
+                vehicle_id, periods[position], periods[position] + timedelta(days=3)
+            )
+            book_vehicle(
+                customer_id, vehicle_id, periods[position], time(10, 0), 3, 900
+            )
+
+        with pytest.raises(BookingConflict):
+            book_vehicle(
+                customer_id,
+                vehicle_id,
+                periods[0] + timedelta(days=1),
+                time(10, 0),
+                3,
+                900,
+            )
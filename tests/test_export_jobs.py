@@ -0,0 +1,44 @@
+import time
+
+from export_jobs import DONE, FAILED, ExportJobQueue
+
+
+def test_any_process_can_follow_an_export(app, vehicle_id):
+    """
+    O progresso e a descarga de uma exportação não dependem do processo
+    que a pediu: outro registo de trabalhos (como o de outro worker) lê o
+    estado a partir dos ficheiros de metadados.
+    """
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["admin"] = True
+
+    response = client.post(
+        "/admin/exports", data={"formato": "csv", "folhas": "veiculos"}
+    )
+    assert response.status_code == 202
+    job_id = response.get_json()["id"]
+
+    other_worker = ExportJobQueue()
+    with app.app_context():
+        for _ in range(100):
+            job = other_worker.get(job_id)
+            if job.status in (DONE, FAILED):
+                break
+            time.sleep(0.05)
+    assert job.status == DONE
+    assert job.progress == 100
+
+    status = client.get(f"/admin/exports/{job_id}").get_json()
+    assert status["status"] == DONE and status["download_url"]
+    download = client.get(status["download_url"])
+    assert download.status_code == 200
+    assert b"BMW" in download.data
+
+
+def test_unknown_export_is_not_found(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["admin"] = True
+    assert client.get("/admin/exports/" + "0" * 32).status_code == 404
+    assert client.get("/admin/exports/..%2Fdatabase").status_code == 404
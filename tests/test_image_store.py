@@ -0,0 +1,67 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from image_store import release, remove_files, save_upload
+from models import db, StoredImage
+
+
+def png_upload():
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "red").save(buffer, "PNG")
+    buffer.seek(0)
+    return FileStorage(stream=buffer, filename="foto.png")
+
+
+@pytest.fixture
+def upload_folder(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, "UPLOAD_FOLDER", str(tmp_path))
+    return tmp_path
+
+
+def test_reused_file_survives_a_concurrent_removal(app, upload_folder):
+    """
+    Um pedido liberta a última referência a uma imagem e, antes de a
+    apagar, outro pedido guarda a mesma imagem: o ficheiro fica.
+    """
+    with app.app_context():
+        path = save_upload(png_upload())
+        orphans = release([path])
+        db.session.commit()
+        assert orphans == [path]
+
+        assert save_upload(png_upload()) == path
+        remove_files(orphans)
+        assert os.path.exists(upload_folder / path)
+        assert db.session.get(StoredImage, path).refcount == 1
+
+        orphans = release([path])
+        db.session.commit()
+        remove_files(orphans)
+        assert not os.path.exists(upload_folder / path)
+
+
+def test_invalid_vehicle_form_stores_no_images(app, upload_folder, monkeypatch):
+    monkeypatch.setitem(app.config, "PROPAGATE_EXCEPTIONS", False)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["admin"] = True
+
+    client.post(
+        "/add_vehicle",
+        data={
+            "vehicle-type": "carro",
+            "brand": "BMW",
+            "model": "X1",
+            "year": "2022",
+            "price_per_day": "120",
+            "last_legalization_date": "2024-05-01",
+            "next_legalization_date": "2024-01-01",
+            "imagens": png_upload(),
+        },
+        content_type="multipart/form-data",
+    )
+    assert [name for _, _, names in os.walk(upload_folder) for name in names] == []
@@ -0,0 +1,49 @@
+import json
+import os
+
+import pytest
+from PIL import Image
+
+import images
+from images import ImagePipeline, MANIFEST, VARIANTS_FOLDER
+
+
+@pytest.fixture
+def pipeline(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, "UPLOAD_FOLDER", str(tmp_path))
+    pipeline = ImagePipeline()
+    yield pipeline
+    if pipeline._executor is not None:
+        pipeline._executor.shutdown()
+
+
+def test_missing_manifest_is_cached(app, tmp_path, pipeline, monkeypatch):
+    """
+    Uma imagem sem variantes não é procurada no disco em cada pedido, só
+    passado MISSING_RECHECK.
+    """
+    with app.app_context():
+        assert pipeline.manifest("foto.png") is None
+
+        destination = tmp_path / VARIANTS_FOLDER / "foto.png"
+        os.makedirs(destination)
+        (destination / MANIFEST).write_text(json.dumps({"variants": {}}))
+        assert pipeline.manifest("foto.png") is None
+
+        monkeypatch.setattr(images, "MISSING_RECHECK", 0)
+        assert pipeline.manifest("foto.png") == {"variants": {}}
+
+
+def test_generated_variants_replace_the_cached_miss(app, tmp_path, pipeline):
+    """
+    Depois de gerar as variantes de uma imagem (num processo do pool), o
+    manifesto fica disponível logo, sem esperar por MISSING_RECHECK.
+    """
+    Image.new("RGB", (800, 600), "blue").save(tmp_path / "foto.jpg")
+    with app.app_context():
+        assert pipeline.manifest("foto.jpg") is None
+
+        manifest = pipeline.submit("foto.jpg").result(timeout=60)
+
+        assert pipeline.manifest("foto.jpg") == manifest
+        assert list(manifest["variants"]) == ["thumb", "card", "full"]
@@ -0,0 +1,95 @@
+import sqlite3
+from datetime import date, datetime, timedelta
+
+import availability
+from availability import available_vehicles, index_sync, is_vehicle_available
+from models import db, Veiculo
+from occupancy import occupancy_matrix
+from vehicle_search import vehicle_search_index
+
+
+def other_worker(app, statement, parameters=()):
+    """
+    Escreve na base de dados numa ligação à parte, como outro processo,
+    sem passar pelos índices em memória deste processo.
+    """
+    with app.app_context():
+        path = db.engine.url.database
+    with sqlite3.connect(path) as connection:
+        cursor = connection.execute(statement, parameters)
+        return cursor.lastrowid
+
+
+def test_indexes_follow_writes_from_other_processes(
+    app, vehicle_id, customer_id, monkeypatch
+):
+    monkeypatch.setattr(index_sync, "CHECK_INTERVAL", 0)
+    inicio = date.today() + timedelta(days=60)
+    entrega = inicio + timedelta(days=2)
+
+    def livre():
+        with app.app_context():
+            veiculo = db.session.get(Veiculo, vehicle_id)
+            return {
+                "lista": veiculo in available_vehicles(inicio, entrega),
+                "reserva": is_vehicle_available(veiculo, inicio, entrega),
+                "flexível": vehicle_id
+                in occupancy_matrix.search(inicio, entrega, flex_days=0),
+                "pesquisa": vehicle_id in vehicle_search_index.matching_ids("bmw"),
+            }
+
+    assert all(livre().values())
+
+    agora = datetime.now().isoformat(" ")
+    reservation_id = other_worker(
+        app,
+        "INSERT INTO reservation (fk_reservation_customer, fk_reservation_vehicle, "
+        "status, start_date, start_time, end_date, end_time, duration, price, "
+        "updated_at) VALUES (?, ?, 'Ativa', ?, '10:00:00.000000', ?, "
+        "'10:00:00.000000', 2, 600, ?)",
+        (customer_id, vehicle_id, inicio.isoformat(), entrega.isoformat(), agora),
+    )
+    estado = livre()
+    assert not estado["lista"] and not estado["reserva"] and not estado["flexível"]
+
+    other_worker(
+        app,
+        "UPDATE reservation SET status = 'Cancelada', updated_at = ? WHERE id = ?",
+        (datetime.now().isoformat(" "), reservation_id),
+    )
+    assert all(livre().values())
+
+    other_worker(
+        app,
+        "UPDATE veiculos SET brand = 'Audi', model = 'Q7' WHERE id = ?",
+        (vehicle_id,),
+    )
+    assert not livre()["pesquisa"]
+
+    other_worker(
+        app, "UPDATE veiculos SET in_maintenance = 1 WHERE id = ?", (vehicle_id,)
+    )
+    assert not any(livre().values())
+
+
+def test_versions_are_read_at_most_once_per_interval(app, monkeypatch):
+    """
+    As sugestões a cada tecla não leem os contadores da base de dados mais
+    do que uma vez por CHECK_INTERVAL.
+    """
+    reads = []
+    monkeypatch.setattr(
+        availability, "read_versions", lambda: reads.append(1) or index_sync._versions
+    )
+    monkeypatch.setattr(index_sync, "_checked", None)
+
+    client = app.test_client()
+    for texto in ["b", "bm", "bmw", "bmw x"]:
+        response = client.get(f"/api/vehicles/typeahead?q={texto}&limit=0")
+        assert response.status_code == 200
+        assert len(response.get_json()["results"]) <= 1
+    assert len(reads) == 1
+
+    monkeypatch.setattr(index_sync, "_checked", index_sync._checked - 2)
+    client.get("/api/vehicles/typeahead?q=bmw")
+    assert len(reads) == 2
@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_SCHEMA = os.path.join(ROOT, "tests", "baseline_schema.sql")
+
+
+def flask(database, *args):
+    """
+    Corre um comando flask --app app sobre a base de dados indicada.
+    """
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}")
+    return subprocess.run(
+        [sys.executable, "-m", "flask", "--app", "app", *args],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_upgrade_from_baseline_matches_models(tmp_path):
+    """
+    Uma base de dados da versão anterior às migrações, com dados, fica com
+    o esquema dos modelos depois de flask db upgrade.
+    """
+    database = tmp_path / "baseline.db"
+    today = date.today()
+    with sqlite3.connect(database) as connection:
+        with open(BASELINE_SCHEMA) as file:
+            connection.executescript(file.read())
+        connection.execute("INSERT INTO categorias (id, nome) VALUES (1, 'Gold')")
+        connection.execute(
+            "INSERT INTO veiculos (id, type, brand, model, year, price_per_day, "
+            "status, in_maintenance, last_maintenance_date, next_maintenance_date, "
+            "maintenance_history, last_legalization_date, next_legalization_date, "
+            "legalization_history, imagens, available_from, num_uses, "
+            "max_uses_before_maintenance, categoria_id) VALUES (1, 'CARRO', "
+            "'BMW', 'X5', 2020, 300, 1, 0, ?, ?, 'Manutenção iniciada 2023-01-10', "
+            "?, ?, '', '', ?, 3, 50, 1)",
+            (
+                today,
+                today + timedelta(days=5),
+                today,
+                today + timedelta(days=200),
+                today,
+            ),
+        )
+
+    upgrade = flask(database, "db", "upgrade")
+    assert upgrade.returncode == 0, upgrade.stderr
+
+    check = flask(database, "db", "check")
+    assert check.returncode == 0, check.stdout + check.stderr
+
+    with sqlite3.connect(database) as connection:
+        alerts = connection.execute("SELECT vehicle_id, kind FROM vehicle_alerts")
+        assert alerts.fetchall() == [(1, "manutencao")]
+        triggers = connection.execute(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' "
+            "AND name LIKE '%_version_%'"
+        )
+        assert triggers.fetchone() == (7,)
+
+
+def test_create_db_matches_models(tmp_path):
+    """
+    Uma base de dados nova criada com flask create-db fica marcada com a
+    última migração e com o esquema dos modelos.
+    """
+    database = tmp_path / "new.db"
+
+    create = flask(database, "create-db")
+    assert create.returncode == 0, create.stderr
+
+    check = flask(database, "db", "check")
+    assert check.returncode == 0, check.stdout + check.stderr
@@ -0,0 +1,49 @@
+from datetime import date, time, timedelta
+
+from booking import book_vehicle
+from models import db, Cliente, Reservation
+from occupancy import occupancy_matrix
+
+
+def test_repeated_cancel_keeps_the_days_of_a_later_booking(
+    app, vehicle_id, customer_id
+):
+    """
+    Cancelar duas vezes a mesma reserva (outro separador ou um POST
+    repetido) não liberta os dias de uma reserva feita entretanto.
+    """
+    inicio = date.today() + timedelta(days=20)
+    entrega = inicio + timedelta(days=3)
+    with app.app_context():
+        occupancy_matrix.rebuild()
+        email = db.session.get(Cliente, customer_id).email
+        first = book_vehicle(customer_id, vehicle_id, inicio, time(10, 0), 3, 900)
+
+    client = app.test_client()
+    client.post("/client_login", data={"email": email, "password": "password123"})
+    client.post(f"/cancel_reservation/{first.id}")
+
+    with app.app_context():
+        second = book_vehicle(customer_id, vehicle_id, inicio, time(10, 0), 3, 900)
+
+    client.post(f"/cancel_reservation/{first.id}")
+
+    with app.app_context():
+        assert db.session.get(Reservation, second.id).status == "Ativa"
+        livres = occupancy_matrix.search(inicio, entrega, flex_days=0)
+        assert vehicle_id not in livres
+
+
+def test_reservation_is_counted_once(app, vehicle_id, customer_id):
+    inicio = date.today() + timedelta(days=40)
+    entrega = inicio + timedelta(days=2)
+    with app.app_context():
+        occupancy_matrix.rebuild()
+        reservation = book_vehicle(customer_id, vehicle_id, inicio, time(10, 0), 2, 600)
+        occupancy_matrix.add(reservation)
+        occupancy_matrix.remove(reservation)
+        assert vehicle_id in occupancy_matrix.search(inicio, entrega, flex_days=0)
+
+        occupancy_matrix.remove(reservation)
+        occupancy_matrix.add(reservation)
+        assert vehicle_id not in occupancy_matrix.search(inicio, entrega, flex_days=0)
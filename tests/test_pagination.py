@@ -0,0 +1,103 @@
+import base64
+import json
+from datetime import date
+
+import pytest
+
+from models import db, Veiculo, VehicleEvent, VehicleUtilization
+from pagination import decode_cursor, encode_cursor, keyset_page
+
+
+def raw_cursor(values):
+    """
+    Um cursor com qualquer conteúdo JSON, como o que um cliente pode enviar.
+    """
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+INVALID_CURSORS = [
+    "não-é-base64",
+    raw_cursor({"brand": "BMW"}),
+    raw_cursor("BMW"),
+    raw_cursor([]),
+    raw_cursor(["BMW"]),
+    raw_cursor(["BMW", 1, 2]),
+    raw_cursor([1, "BMW"]),
+    raw_cursor([["BMW"], 1]),
+    raw_cursor([None, 1]),
+    raw_cursor([True, 1]),
+    raw_cursor(["BMW", 2**64]),
+    raw_cursor(["BMW", 1.5]),
+]
+
+
+@pytest.mark.parametrize("cursor", INVALID_CURSORS)
+def test_invalid_cursor_is_ignored(cursor):
+    assert decode_cursor(cursor, [Veiculo.brand, Veiculo.id]) is None
+
+
+def test_cursor_values_follow_the_column_types():
+    assert decode_cursor(
+        encode_cursor([date(2024, 5, 1), 7]), [VehicleEvent.date, VehicleEvent.id]
+    ) == [date(2024, 5, 1), 7]
+    assert (
+        decode_cursor(
+            raw_cursor(["2024-13-01", 7]), [VehicleEvent.date, VehicleEvent.id]
+        )
+        is None
+    )
+    assert decode_cursor(
+        raw_cursor([50, 3]),
+        [VehicleUtilization.occupancy, VehicleUtilization.vehicle_id],
+    ) == [50, 3]
+    assert (
+        decode_cursor(
+            raw_cursor(["NaN", 3]),
+            [VehicleUtilization.occupancy, VehicleUtilization.vehicle_id],
+        )
+        is None
+    )
+
+
+def test_next_page_follows_the_cursor(app, vehicle_id):
+    with app.app_context():
+        veiculo = db.session.get(Veiculo, vehicle_id)
+        outro = Veiculo(
+            type=veiculo.type,
+            brand="Audi",
+            model="A4",
+            year=2021,
+            price_per_day=200,
+            categoria=veiculo.categoria,
+        )
+        outro.initialize_vehicle()
+        db.session.add(outro)
+        db.session.commit()
+        query = db.session.query(Veiculo)
+        first, cursor = keyset_page(query, Veiculo.brand, Veiculo.id, per_page=1)
+        assert cursor is not None
+        second, _ = keyset_page(
+            query, Veiculo.brand, Veiculo.id, cursor=cursor, per_page=1
+        )
+        assert (second[0].brand, second[0].id) > (first[0].brand, first[0].id)
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/admin/list-vehicles",
+        "/admin/list-vehicles?sort=price_per_day&order=desc",
+        "/list_clients",
+        "/list_clients?sort=apelido",
+        "/admin/events",
+        "/admin/reports/vehicles",
+    ],
+)
+def test_lists_fall_back_to_the_first_page(app, vehicle_id, path):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["admin"] = True
+    separator = "&" if "?" in path else "?"
+    for cursor in INVALID_CURSORS:
+        response = client.get(f"{path}{separator}cursor={cursor}")
+        assert response.status_code == 200, cursor
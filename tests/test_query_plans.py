@@ -0,0 +1,16 @@
+from seed import seed_database
+from tests.query_plans import plan_failures
+
+
+def test_view_queries_use_indexes(seeded_app):
+    """
+    Nenhuma consulta das views e das tarefas periódicas lê uma tabela
+    inteira fora de ALLOWED_SCANS.
+    """
+    with seeded_app.app_context():
+        seed_database(200, 300, history_days=60, future_days=30)
+
+    checked, scans = plan_failures(seeded_app)
+
+    assert checked > 50
+    assert scans == []
@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+
+import pandas as pd
+
+from reports import REPORT_WINDOW_DAYS, category_revenue, vehicle_utilization
+
+
+def reservations(vehicle_id, *periods):
+    """
+    DataFrame como o de load_reservations com as reservas (início, fim).
+    """
+    df = pd.DataFrame(
+        [
+            (vehicle_id, start, end, (end - start).days, 100.0, "Gold")
+            for start, end in periods
+        ],
+        columns=["vehicle_id", "start", "end", "duration", "price", "categoria"],
+    )
+    df["start"] = df["start"].astype("datetime64[s]")
+    df["end"] = df["end"].astype("datetime64[s]")
+    return df
+
+
+def utilization_of(app, vehicle_id, df, today):
+    with app.app_context():
+        result = vehicle_utilization(df, today)
+    return result.set_index("vehicle_id").loc[vehicle_id]
+
+
+def test_back_to_back_bookings_fill_the_window(app, vehicle_id):
+    """
+    Duas reservas seguidas (a segunda começa no dia de entrega da primeira)
+    ocupam a janela exatamente a 100%.
+    """
+    today = date(2024, 6, 30)
+    window_start = today - timedelta(days=REPORT_WINDOW_DAYS - 1)
+    turnover = window_start + timedelta(days=40)
+    df = reservations(
+        vehicle_id,
+        (window_start, turnover),
+        (turnover, today + timedelta(days=1)),
+    )
+
+    row = utilization_of(app, vehicle_id, df, today)
+    assert row["reserved_days"] == REPORT_WINDOW_DAYS
+    assert row["occupancy"] == 1.0
+    assert row["reservations"] == 2
+
+
+def test_reserved_days_match_the_duration(app, vehicle_id):
+    today = date(2024, 6, 30)
+    df = reservations(vehicle_id, (date(2024, 6, 10), date(2024, 6, 13)))
+
+    row = utilization_of(app, vehicle_id, df, today)
+    assert row["reserved_days"] == 3
+    assert category_revenue(df)["reserved_days"].tolist() == [3]
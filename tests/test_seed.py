@@ -0,0 +1,21 @@
+from models import Categoria, Cliente, Veiculo
+from seed import seed_database
+
+
+def test_seed_twice_uses_the_views_categories(seeded_app):
+    """
+    O gerador pode correr sobre uma base de dados já preenchida e regista os
+    veículos nas categorias que add_vehicle e edit_vehicle procuram.
+    """
+    with seeded_app.app_context():
+        seed_database(20, 30, history_days=30, future_days=10, seed=1)
+        counts = seed_database(20, 30, history_days=30, future_days=10, seed=1)
+
+        assert counts["clientes"] == 30
+        assert Cliente.query.count() == 60
+        assert Veiculo.query.count() == 40
+        assert sorted(c.nome for c in Categoria.query) == [
+            "Econômico",
+            "Gold",
+            "Silver",
+        ]
@@ -1,127 +1,193 @@
-from app import app
 from views import *
 from admin_views import *
 
-# Rotas para a aplicação Flask
 
-# Página inicial
-app.add_url_rule("/", view_func=index)
+def register_urls(app):
+    """
+    Regista as rotas da aplicação Flask.
+    """
+    # Página inicial
+    app.add_url_rule("/", view_func=index)
 
-# Página de detalhes do veículo
-app.add_url_rule("/vehicle/<int:id>", view_func=vehicle_details)
+    # Sugestões de marca/modelo para a pesquisa da página inicial
+    app.add_url_rule("/api/vehicles/typeahead", view_func=vehicle_typeahead)
 
-# Página de reserva do veículo
-app.add_url_rule("/reserve/<int:id>", view_func=reserve, methods=["GET", "POST"])
+    # Imagens dos veículos (em cache no browser pelo conteúdo)
+    app.add_url_rule("/images/<path:filename>", view_func=uploaded_image)
 
-# Processar pagamento
-app.add_url_rule("/complete_payment", view_func=complete_payment, methods=["POST"])
+    # Página de detalhes do veículo
+    app.add_url_rule("/vehicle/<int:id>", view_func=vehicle_details)
 
-# Página de confirmação de pagamento
-app.add_url_rule("/order_confirmation", view_func=order_confirmation)
+    # Página de reserva do veículo
+    app.add_url_rule("/reserve/<int:id>", view_func=reserve, methods=["GET", "POST"])
 
-# Página de login do administrador
-app.add_url_rule("/login", view_func=login, methods=["GET", "POST"])
+    # Processar pagamento
+    app.add_url_rule("/complete_payment", view_func=complete_payment, methods=["POST"])
 
-# Painel de administração
-app.add_url_rule("/admin", view_func=admin_panel, methods=["GET", "POST"])
+    # Página de confirmação de pagamento
+    app.add_url_rule("/order_confirmation", view_func=order_confirmation)
 
-# Listagem de veículos no painel de administração
-app.add_url_rule("/admin/list-vehicles", view_func=list_vehicles)
+    # Página de login do administrador
+    app.add_url_rule("/login", view_func=login, methods=["GET", "POST"])
 
-# Visualizar detalhes do veículo pelo admin
-app.add_url_rule("/admin/view_vehicle/<int:id>", view_func=view_vehicle)
+    # Painel de administração
+    app.add_url_rule("/admin", view_func=admin_panel, methods=["GET", "POST"])
 
-# Página de adição de veículos
-app.add_url_rule("/add_vehicle", view_func=add_vehicle, methods=["GET", "POST"])
+    # Verificar ou reconstruir o índice de disponibilidade
+    app.add_url_rule(
+        "/admin/availability", view_func=availability_status, methods=["GET", "POST"]
+    )
 
-# Página de edição de veículos
-app.add_url_rule(
-    "/edit_vehicle/<int:id>", view_func=edit_vehicle, methods=["GET", "POST"]
-)
+    # Executar manualmente o varrimento de manutenção
+    app.add_url_rule(
+        "/admin/sweeps/maintenance", view_func=maintenance_sweep, methods=["POST"]
+    )
 
-# Página de exclusão de veículos
-app.add_url_rule("/delete_vehicle/<int:id>", view_func=delete_vehicle, methods=["POST"])
+    # Executar manualmente o varrimento das reservas concluídas
+    app.add_url_rule(
+        "/admin/sweeps/reservations", view_func=reservation_sweep, methods=["POST"]
+    )
+
+    # Listagem de veículos no painel de administração
+    app.add_url_rule("/admin/list-vehicles", view_func=list_vehicles)
 
-# Página de exclusão de imagem
-app.add_url_rule(
-    "/delete_image/<path:image_path>/<int:vehicle_id>",
-    view_func=delete_image,
-    methods=["GET", "POST"],
-)
+    # Visualizar detalhes do veículo pelo admin
+    app.add_url_rule("/admin/view_vehicle/<int:id>", view_func=view_vehicle)
 
-# Página de login do cliente
-app.add_url_rule("/client_login", view_func=client_login, methods=["GET", "POST"])
-
-# Logout do cliente
-app.add_url_rule("/client_logout", view_func=client_logout)
-
-# Logout do admin
-app.add_url_rule("/logout", view_func=logout)
-
-# Página de registro do cliente
-app.add_url_rule("/register_client", view_func=register_client, methods=["GET", "POST"])
-
-# Página de confirmação de legalização do veículo
-app.add_url_rule(
-    "/legalize_vehicle/<int:id>", view_func=legalize_vehicle, methods=["POST"]
-)
-
-# Página de manutenção do veículo
-app.add_url_rule(
-    "/admin/maintenance_vehicle/<int:id>",
-    view_func=maintenance_vehicle,
-    methods=["GET", "POST"],
-)
-
-# Rota para atualizar o número de utilizações do veículo
-app.add_url_rule(
-    "/register_usage/<int:vehicle_id>", view_func=register_usage_route, methods=["POST"]
-)
-
-# Página de visualização das reservas do cliente
-app.add_url_rule("/client_reservations", view_func=client_reservations)
-
-# Página para cancelar reserva do cliente
-app.add_url_rule(
-    "/cancel_reservation/<int:id>", view_func=cancel_reservation, methods=["POST"]
-)
-
-# Página de edição do cadastro do cliente
-app.add_url_rule("/edit_client", view_func=edit_client, methods=["GET"])
-
-# Página para atualizar o cadastro do cliente no banco de dados
-app.add_url_rule("/update_client", view_func=update_client, methods=["POST"])
-
-# Página de visualização de categorias
-app.add_url_rule("/admin/categorias", view_func=categorias, methods=["GET", "POST"])
-
-# Página de edição de categorias
-app.add_url_rule(
-    "/admin/categorias/edit/<int:id>",
-    view_func=editar_categoria,
-    methods=["GET", "POST"],
-)
-
-# Página de remoção de categorias
-app.add_url_rule(
-    "/admin/categorias/delete/<int:id>",
-    view_func=deletar_categoria,
-    methods=["GET", "POST"],
-)
-
-# Página de listagem de clientes
-app.add_url_rule("/list_clients", view_func=list_clients)
-
-# Página para excluir um cliente
-app.add_url_rule("/delete_client/<int:id>", view_func=delete_client, methods=["POST"])
-
-# Página para editar um cliente existente pelo admin
-app.add_url_rule(
-    "/admin_edit_client/<int:id>", view_func=admin_edit_client, methods=["GET", "POST"]
-)
-
-# Página para exportar listagem de veículos para CSV
-app.add_url_rule("/export_csv", view_func=export_csv, methods=["GET"])
-
-# Página para exportar listagem de veículos para Excel
-app.add_url_rule("/export_excel", view_func=export_excel, methods=["GET"])
+    # Histórico de manutenções e legalizações (de um veículo ou da frota)
+    app.add_url_rule("/admin/events", view_func=vehicle_events)
+
+    # Histórico das execuções das tarefas periódicas e líder do scheduler
+    app.add_url_rule("/admin/jobs", view_func=job_runs)
+
+    # Página de adição de veículos
+    app.add_url_rule("/add_vehicle", view_func=add_vehicle, methods=["GET", "POST"])
+
+    # Página de edição de veículos
+    app.add_url_rule(
+        "/edit_vehicle/<int:id>", view_func=edit_vehicle, methods=["GET", "POST"]
+    )
+
+    # Página de exclusão de veículos
+    app.add_url_rule(
+        "/delete_vehicle/<int:id>", view_func=delete_vehicle, methods=["POST"]
+    )
+
+    # Página de exclusão de imagem
+    app.add_url_rule(
+        "/delete_image/<path:image_path>/<int:vehicle_id>",
+        view_func=delete_image,
+        methods=["GET", "POST"],
+    )
+
+    # Definir a imagem de capa de um veículo
+    app.add_url_rule(
+        "/set_cover_image/<path:image_path>/<int:vehicle_id>",
+        view_func=set_cover_image,
+        methods=["POST"],
+    )
+
+    # Página de login do cliente
+    app.add_url_rule("/client_login", view_func=client_login, methods=["GET", "POST"])
+
+    # Logout do cliente
+    app.add_url_rule("/client_logout", view_func=client_logout)
+
+    # Logout do admin
+    app.add_url_rule("/logout", view_func=logout)
+
+    # Página de registro do cliente
+    app.add_url_rule(
+        "/register_client", view_func=register_client, methods=["GET", "POST"]
+    )
+
+    # Página de confirmação de legalização do veículo
+    app.add_url_rule(
+        "/legalize_vehicle/<int:id>", view_func=legalize_vehicle, methods=["POST"]
+    )
+
+    # Página de manutenção do veículo
+    app.add_url_rule(
+        "/admin/maintenance_vehicle/<int:id>",
+        view_func=maintenance_vehicle,
+        methods=["GET", "POST"],
+    )
+
+    # Rota para atualizar o número de utilizações do veículo
+    app.add_url_rule(
+        "/register_usage/<int:vehicle_id>",
+        view_func=register_usage_route,
+        methods=["POST"],
+    )
+
+    # Página de visualização das reservas do cliente
+    app.add_url_rule("/client_reservations", view_func=client_reservations)
+
+    # Página para cancelar reserva do cliente
+    app.add_url_rule(
+        "/cancel_reservation/<int:id>", view_func=cancel_reservation, methods=["POST"]
+    )
+
+    # Página de edição do cadastro do cliente
+    app.add_url_rule("/edit_client", view_func=edit_client, methods=["GET"])
+
+    # Página para atualizar o cadastro do cliente no banco de dados
+    app.add_url_rule("/update_client", view_func=update_client, methods=["POST"])
+
+    # Página de visualização de categorias
+    app.add_url_rule("/admin/categorias", view_func=categorias, methods=["GET", "POST"])
+
+    # Página de edição de categorias
+    app.add_url_rule(
+        "/admin/categorias/edit/<int:id>",
+        view_func=editar_categoria,
+        methods=["GET", "POST"],
+    )
+
+    # Página de remoção de categorias
+    app.add_url_rule(
+        "/admin/categorias/delete/<int:id>",
+        view_func=deletar_categoria,
+        methods=["GET", "POST"],
+    )
+
+    # Página de listagem de clientes
+    app.add_url_rule("/list_clients", view_func=list_clients)
+
+    # Página para excluir um cliente
+    app.add_url_rule(
+        "/delete_client/<int:id>", view_func=delete_client, methods=["POST"]
+    )
+
+    # Página para editar um cliente existente pelo admin
+    app.add_url_rule(
+        "/admin_edit_client/<int:id>",
+        view_func=admin_edit_client,
+        methods=["GET", "POST"],
+    )
+
+    # Relatórios de receita e utilização da frota
+    app.add_url_rule("/admin/reports", view_func=admin_reports)
+    app.add_url_rule("/admin/reports/vehicles", view_func=vehicle_utilization_report)
+    app.add_url_rule(
+        "/admin/reports/refresh", view_func=refresh_reports_view, methods=["POST"]
+    )
+
+    # Página para exportar listagem de veículos para CSV
+    app.add_url_rule("/export_csv", view_func=export_csv, methods=["GET"])
+
+    # Exportar clientes e reservas para CSV
+    app.add_url_rule(
+        "/export_csv/clients", view_func=export_clients_csv, methods=["GET"]
+    )
+    app.add_url_rule(
+        "/export_csv/reservations", view_func=export_reservations_csv, methods=["GET"]
+    )
+
+    # Página para exportar listagem de veículos para Excel
+    app.add_url_rule("/export_excel", view_func=export_excel, methods=["GET"])
+
+    # Exportações em segundo plano: pedir, acompanhar o progresso e descarregar
+    app.add_url_rule("/admin/exports", view_func=submit_export, methods=["POST"])
+    app.add_url_rule("/admin/exports/<job_id>", view_func=export_status)
+    app.add_url_rule("/admin/exports/<job_id>/download", view_func=export_download)
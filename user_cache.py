@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from flask_login import UserMixin
+from models import db, Cliente
+
+# Colunas do cliente guardadas na cache (a palavra-passe fica de fora)
+CACHED_COLUMNS = [
+    Cliente.id,
+    Cliente.nome,
+    Cliente.apelido,
+    Cliente.email,
+    Cliente.telefone,
+    Cliente.data_nascimento,
+    Cliente.morada,
+    Cliente.nif,
+    Cliente.price_per_day,
+    Cliente.categoria,
+]
+
+
+class CachedUser(UserMixin):
+    """
+    Projeção leve de um cliente para o Flask-Login: só os dados usados nas
+    páginas, sem ligação a uma sessão do SQLAlchemy. Para alterar o cliente
+    é preciso carregar o objeto Cliente.
+    """
+
+    def __init__(self, row):
+        for column in CACHED_COLUMNS:
+            setattr(self, column.key, getattr(row, column.key))
+
+    def get_id(self):
+        return str(self.id)
+
+    def __repr__(self):
+        return f"<CachedUser {self.id} {self.nome} {self.apelido}>"
+
+
+class UserCache:
+    """
+    Cache (local ao processo) dos clientes autenticados, para o Flask-Login
+    não consultar a base de dados em cada pedido.
+
+    Cada entrada expira ao fim de USER_CACHE_TTL segundos e a cache guarda no
+    máximo USER_CACHE_SIZE clientes (os usados há mais tempo saem primeiro).
+    As vistas que alteram ou apagam um cliente chamam invalidate.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # Aumenta a cada invalidação: um cliente lido da base de dados antes
+        # de uma invalidação já não é guardado
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id):
+        """
+        Devolve a projeção do cliente, da cache ou da base de dados
+        (None se o cliente não existir).
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            version = self._version
+
+        row = db.session.query(*CACHED_COLUMNS).filter(Cliente.id == user_id).first()
+        if row is None:
+            return None
+
+        user = CachedUser(row)
+        with self._lock:
+            if version != self._version:
+                return user
+            self._entries[user_id] = (now + current_app.config["USER_CACHE_TTL"], user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > current_app.config["USER_CACHE_SIZE"]:
+                self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id):
+        """
+        Retira um cliente da cache, depois de ser alterado ou apagado.
+        """
+        with self._lock:
+            self._version += 1
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """
+        Esvazia a cache (os contadores mantêm-se).
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Contadores da cache: acertos, falhas, invalidações e entradas.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "hit_rate": round(self.hits / total, 3) if total else None,
+            }
+
+
+user_cache = UserCache()
@@ -0,0 +1,218 @@
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from models import db, Veiculo, Categoria
+from availability import _as_date, availability_index, index_sync
+
+
+def normalize(texto):
+    """
+    Normaliza um texto para pesquisa: minúsculas e sem acentos.
+    """
+    texto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in texto if not unicodedata.combining(c)).casefold()
+
+
+class VehicleSearchIndex:
+    """
+    Índice em memória das marcas e modelos da frota, para a pesquisa
+    enquanto o cliente escreve.
+
+    Guarda uma lista ordenada de termos normalizados (marca, modelo e
+    "marca modelo") e, para cada par marca/modelo, os veículos
+    correspondentes. Uma pesquisa por prefixo é uma pesquisa binária na lista,
+    sem consultar a base de dados. O índice é local ao processo; as
+    alterações dos veículos feitas por outros processos chegam através de
+    index_sync.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._terms = []
+        self._pairs = {}
+        self._vehicles = {}
+        self.loaded = False
+
+    @staticmethod
+    def _terms_for(pair):
+        brand, model = pair
+        return {
+            (normalize(brand), pair),
+            (normalize(model), pair),
+            (normalize(f"{brand} {model}"), pair),
+        }
+
+    def rebuild(self):
+        """
+        Reconstrói o índice a partir dos veículos da base de dados.
+        """
+        rows = (
+            db.session.query(
+                Veiculo.id,
+                Veiculo.brand,
+                Veiculo.model,
+                Veiculo.status,
+                Veiculo.in_maintenance,
+                Veiculo.available_from,
+                Categoria.nome,
+            )
+            .join(Categoria)
+            .order_by(Veiculo.id)
+        )
+
+        with self._lock:
+            self._vehicles = {}
+            self._pairs = {}
+            for vehicle_id, brand, model, *estado in rows:
+                self._vehicles[vehicle_id] = ((brand, model), *estado)
+                self._pairs.setdefault((brand, model), []).append(vehicle_id)
+            terms = set()
+            for pair in self._pairs:
+                terms |= self._terms_for(pair)
+            self._terms = sorted(terms)
+            self.loaded = True
+
+        return len(self._vehicles)
+
+    def invalidate(self):
+        """
+        Marca o índice para ser reconstruído na próxima pesquisa
+        (usado depois de atualizações em lote aos veículos).
+        """
+        with self._lock:
+            self.loaded = False
+
+    def update(self, veiculo):
+        """
+        Atualiza no índice um veículo adicionado ou editado.
+        """
+        with self._lock:
+            if not self.loaded:
+                return
+            self.remove(veiculo.id)
+            pair = (veiculo.brand, veiculo.model)
+            categoria = veiculo.categoria.nome if veiculo.categoria else None
+            self._vehicles[veiculo.id] = (
+                pair,
+                veiculo.status,
+                veiculo.in_maintenance,
+                veiculo.available_from,
+                categoria,
+            )
+            if pair not in self._pairs:
+                self._pairs[pair] = []
+                for term in self._terms_for(pair):
+                    insort(self._terms, term)
+            insort(self._pairs[pair], veiculo.id)
+
+    def remove(self, vehicle_id):
+        """
+        Retira um veículo do índice (removido da frota).
+        """
+        with self._lock:
+            entry = self._vehicles.pop(vehicle_id, None)
+            if entry is None:
+                return
+            pair = entry[0]
+            self._pairs[pair].remove(vehicle_id)
+            if not self._pairs[pair]:
+                del self._pairs[pair]
+                for term in self._terms_for(pair):
+                    del self._terms[bisect_left(self._terms, term)]
+
+    def _matching_pairs(self, prefixo):
+        """
+        Pares marca/modelo com algum termo que começa por prefixo, pela ordem
+        alfabética dos termos.
+        """
+        position = bisect_left(self._terms, (prefixo,))
+        seen = set()
+        while position < len(self._terms):
+            term, pair = self._terms[position]
+            if not term.startswith(prefixo):
+                break
+            if pair not in seen:
+                seen.add(pair)
+                yield pair
+            position += 1
+
+    def _is_candidate(self, vehicle_id, data_inicio, data_entrega, categoria):
+        """
+        Verifica se um veículo está ativo, na categoria pedida e, havendo
+        datas, livre nesse período.
+        """
+        _, status, in_maintenance, available_from, nome_categoria = self._vehicles[
+            vehicle_id
+        ]
+        if not status or in_maintenance:
+            return False
+        if categoria and categoria != "all" and nome_categoria != categoria:
+            return False
+        if data_inicio is None:
+            return True
+        if available_from and available_from > data_inicio:
+            return False
+        return not availability_index.has_conflict(
+            vehicle_id, data_inicio, data_entrega
+        )
+
+    def search(
+        self,
+        texto,
+        limit=10,
+        data_inicio=None,
+        data_entrega=None,
+        categoria="all",
+    ):
+        """
+        Sugestões de marca/modelo que começam pelo texto escrito.
+
+        Só são sugeridos os pares com pelo menos um veículo ativo na categoria
+        pedida e, se forem dadas datas, livre nesse período.
+        """
+        prefixo = normalize(texto).strip()
+        if not prefixo:
+            return []
+        data_inicio = _as_date(data_inicio)
+        data_entrega = _as_date(data_entrega)
+
+        index_sync.refresh()
+        if data_inicio is not None and not availability_index.loaded:
+            availability_index.rebuild()
+
+        with self._lock:
+            if not self.loaded:
+                self.rebuild()
+
+            results = []
+            for pair in self._matching_pairs(prefixo):
+                if any(
+                    self._is_candidate(vehicle_id, data_inicio, data_entrega, categoria)
+                    for vehicle_id in self._pairs[pair]
+                ):
+                    brand, model = pair
+                    results.append(
+                        {"brand": brand, "model": model, "label": f"{brand} {model}"}
+                    )
+                    if len(results) >= limit:
+                        break
+
+        return results
+
+    def matching_ids(self, texto):
+        """
+        Conjunto dos veículos cuja marca ou modelo começa pelo texto escrito.
+        """
+        prefixo = normalize(texto).strip()
+        index_sync.refresh()
+        with self._lock:
+            if not self.loaded:
+                self.rebuild()
+            ids = set()
+            for pair in self._matching_pairs(prefixo):
+                ids.update(self._pairs[pair])
+
+        return ids
+
+
+vehicle_search_index = VehicleSearchIndex()
@@ -1,8 +1,35 @@
 from datetime import datetime, date, timedelta
-from flask import render_template, request, redirect, url_for, session, flash
-from models import db, Veiculo, VehicleType, Cliente, Reservation, Categoria
-from app import app
-from admin_views import check_maintenance_status, register_usage
+from flask import (
+    current_app,
+    render_template,
+    request,
+    redirect,
+    url_for,
+    session,
+    flash,
+    jsonify,
+    send_from_directory,
+)
+from models import (
+    db,
+    Veiculo,
+    VehicleImage,
+    VehicleType,
+    Cliente,
+    Reservation,
+    Categoria,
+)
+from admin_views import register_usage
+from booking import book_vehicle, BookingConflict
+from availability import (
+    available_vehicles,
+    flexible_available_vehicles,
+    is_vehicle_available,
+    release_reservation,
+)
+from vehicle_search import vehicle_search_index
+from image_store import IMMUTABLE_MAX_AGE, is_immutable
+from user_cache import user_cache
 from flask_login import (
     LoginManager,
     login_user,
@@ -12,39 +39,34 @@ from flask_login import (
     current_user,
 )
 
-# Configuração do Flask Login
-login_manager = LoginManager(app)
+# Configuração do Flask Login (ligado à aplicação em create_app)
+login_manager = LoginManager()
 login_manager.login_view = "client_login"
 
 
 @login_manager.user_loader
 def load_user(user_id):
-    return Cliente.query.get(int(user_id))
+    """
+    Carrega o cliente autenticado a partir da cache (sem consultar a base de
+    dados enquanto a entrada for válida).
+    """
+    return user_cache.get(int(user_id))
 
 
 def index():
     """
     Rota da página inicial.
     """
-    check_maintenance_status()
-
     data_inicio = request.args.get("data_inicio")
     data_entrega = request.args.get("data_entrega")
     categoria = request.args.get("categoria", "all")
+    flexivel = request.args.get("flexivel") == "1"
+    pesquisa = request.args.get("pesquisa", "").strip()
 
     if current_user.is_authenticated:
         if categoria == "all":
             categoria = current_user.categoria
 
-    if categoria == "all":
-        veiculos = Veiculo.query.filter_by(status=1).all()
-    else:
-        veiculos = (
-            Veiculo.query.join(Categoria)
-            .filter(Categoria.nome == categoria, Veiculo.status == 1)
-            .all()
-        )
-
     if not data_inicio:
         data_inicio = date.today()
     else:
@@ -63,11 +85,20 @@ def index():
         flash("A data de início deve ser anterior à data de entrega.", "danger")
         return redirect(url_for("index"))
 
-    veiculos = [
-        veiculo
-        for veiculo in veiculos
-        if is_vehicle_available(veiculo, data_inicio, data_entrega)
-    ]
+    # No modo de datas flexíveis, as datas são deslocadas até 3 dias para
+    # cada lado e a pesquisa é feita de uma só vez na matriz de ocupação
+    periodos = {}
+    if flexivel:
+        veiculos, periodos = flexible_available_vehicles(
+            data_inicio, data_entrega, 3, categoria
+        )
+    else:
+        veiculos = available_vehicles(data_inicio, data_entrega, categoria)
+
+    # Pesquisa por marca/modelo, combinada com o filtro de disponibilidade
+    if pesquisa:
+        ids = vehicle_search_index.matching_ids(pesquisa)
+        veiculos = [veiculo for veiculo in veiculos if veiculo.id in ids]
 
     veiculos_carros = [
         veiculo for veiculo in veiculos if veiculo.type == VehicleType.CARRO
@@ -81,45 +112,67 @@ def index():
         veiculos=veiculos,
         veiculos_carros=veiculos_carros,
         veiculos_motas=veiculos_motas,
+        capas=VehicleImage.covers(veiculo.id for veiculo in veiculos),
         current_year=datetime.now().year,
         categoria=categoria,
         data_inicio=data_inicio,
         data_entrega=data_entrega,
+        flexivel=flexivel,
+        periodos=periodos,
+        pesquisa=pesquisa,
     )
 
 
-def is_vehicle_available(veiculo, data_inicio, data_entrega):
+def vehicle_typeahead():
     """
-    Verifica se um veículo está disponível durante um período selecionado.
+    Sugestões de marca/modelo em JSON para a pesquisa enquanto se escreve.
+    Aceita as mesmas datas e categoria da página inicial para sugerir só
+    veículos disponíveis.
     """
-    if veiculo.in_maintenance:
-        return False
-
-    data_inicio_datetime = datetime.combine(data_inicio, datetime.min.time())
-    data_entrega_datetime = datetime.combine(data_entrega, datetime.max.time())
+    texto = request.args.get("q", "")
+    categoria = request.args.get("categoria", "all")
+    limit = max(1, min(request.args.get("limit", 10, type=int), 50))
+
+    data_inicio = data_entrega = None
+    try:
+        if request.args.get("data_inicio") and request.args.get("data_entrega"):
+            data_inicio = datetime.strptime(
+                request.args["data_inicio"], "%Y-%m-%d"
+            ).date()
+            data_entrega = datetime.strptime(
+                request.args["data_entrega"], "%Y-%m-%d"
+            ).date()
+    except ValueError:
+        return jsonify({"error": "Datas inválidas."}), 400
+
+    results = vehicle_search_index.search(
+        texto, limit, data_inicio, data_entrega, categoria
+    )
+    return jsonify({"q": texto, "results": results})
 
-    reservas_conflitantes = Reservation.query.filter(
-        Reservation.vehicle_id == veiculo.id,
-        Reservation.status == "Ativa",
-        Reservation.start_date <= data_entrega_datetime,
-        Reservation.end_date >= data_inicio_datetime,
-    ).all()
 
-    if reservas_conflitantes:
-        return False
+def uploaded_image(filename):
+    """
+    Serve as imagens dos veículos e as suas variantes. As guardadas pelo
+    conteúdo ficam em cache no browser sem revalidação.
+    """
+    if not is_immutable(filename):
+        return send_from_directory(current_app.config["UPLOAD_FOLDER"], filename)
 
-    return True
+    response = send_from_directory(
+        current_app.config["UPLOAD_FOLDER"], filename, max_age=IMMUTABLE_MAX_AGE
+    )
+    response.cache_control.immutable = True
+    return response
 
 
 def vehicle_details(id):
     """
     Rota da página de detalhes do veículo.
     """
-    check_maintenance_status()
     veiculo = Veiculo.query.get_or_404(id)
-    image_paths = veiculo.imagens.split(",")
     images_with_index = [
-        {"index": index, "path": path} for index, path in enumerate(image_paths)
+        {"index": index, "path": path} for index, path in enumerate(veiculo.image_paths)
     ]
 
     return render_template(
@@ -143,6 +196,12 @@ def reserve(id):
         payment_method = request.form.get("payment_method")
         preco_total = duracao * veiculo.price_per_day
 
+        data_inicio = datetime.strptime(data_recolha, "%Y-%m-%d").date()
+        data_entrega = data_inicio + timedelta(days=duracao)
+        if not is_vehicle_available(veiculo, data_inicio, data_entrega):
+            flash("O veículo não está disponível para o período selecionado.", "danger")
+            return render_template("reserve.html", veiculo=veiculo)
+
         return render_template(
             "payment_simulation.html",
             veiculo=veiculo,
@@ -177,6 +236,14 @@ def complete_payment():
     veiculo = Veiculo.query.get(veiculo_id)
     preco_total = duracao * veiculo.price_per_day
 
+    data_inicio = datetime.strptime(data_recolha, "%Y-%m-%d").date()
+    data_entrega = data_inicio + timedelta(days=duracao)
+    if not is_vehicle_available(veiculo, data_inicio, data_entrega):
+        return render_template(
+            "payment_error.html",
+            message="O veículo já não está disponível para o período selecionado.",
+        )
+
     payment_responses = {
         "mbway": {
             "success": True,
@@ -195,18 +262,20 @@ def complete_payment():
     if payment_response:
         if payment_response["success"]:
             customer_id = int(current_user.id)
-            reservation = Reservation(
-                customer_id=customer_id,
-                vehicle_id=veiculo_id,
-                start_date=datetime.strptime(data_recolha, "%Y-%m-%d"),
-                start_time=datetime.strptime(hora_recolha, "%H:%M").time(),
-                end_date=datetime.strptime(data_recolha, "%Y-%m-%d")
-                + timedelta(days=duracao),
-                end_time=datetime.strptime(hora_recolha, "%H:%M").time(),
-                duration=duracao,
-                price=preco_total,
-            )
-            reservation.add_reservations()
+            try:
+                # A verificação de conflitos e a inserção são feitas na mesma
+                # transação, para evitar reservas duplicadas em pagamentos
+                # simultâneos
+                book_vehicle(
+                    customer_id=customer_id,
+                    vehicle_id=veiculo_id,
+                    start_date=data_inicio,
+                    start_time=datetime.strptime(hora_recolha, "%H:%M").time(),
+                    duration=duracao,
+                    price=preco_total,
+                )
+            except BookingConflict as error:
+                return render_template("payment_error.html", message=str(error))
 
             return redirect(url_for("order_confirmation"))
         else:
@@ -334,7 +403,6 @@ def client_reservations():
     """
     Rota para visualizar as reservas do cliente.
     """
-    Reservation.update_completed_reservations()
     customer_id = current_user.id
     future_reservations = (
         Reservation.query.filter(
@@ -358,6 +426,9 @@ def client_reservations():
         "client_reservations.html",
         future_reservations=future_reservations,
         past_reservations=past_reservations,
+        capas=VehicleImage.covers(
+            {r.vehicle_id for r in future_reservations + past_reservations}
+        ),
     )
 
 
@@ -368,8 +439,17 @@ def cancel_reservation(id):
     """
     reservation = Reservation.query.get(id)
     if reservation:
-        reservation.status = "Cancelada"
+        # Só liberta os dias se a reserva ainda estava ativa: cancelar de
+        # novo (noutro separador ou com um POST repetido) não mexe nas
+        # estruturas em memória
+        cancelled = db.session.execute(
+            db.update(Reservation)
+            .where(Reservation.id == id, Reservation.status == "Ativa")
+            .values(status="Cancelada")
+        ).rowcount
         db.session.commit()
+        if cancelled:
+            release_reservation(reservation)
         flash("Reserva cancelada com sucesso!", "success")
     else:
         flash("Reserva não encontrada.", "danger")
@@ -410,19 +490,21 @@ def update_client():
         and new_nif
         and new_price_per_day
     ):
-        current_user.nome = new_nome
-        current_user.apelido = new_apelido
-        current_user.email = new_email
-        current_user.telefone = new_telefone
-        current_user.data_nascimento = datetime.strptime(
+        # O current_user é uma projeção em cache: altera-se o Cliente
+        cliente = db.session.get(Cliente, int(current_user.id))
+        cliente.nome = new_nome
+        cliente.apelido = new_apelido
+        cliente.email = new_email
+        cliente.telefone = new_telefone
+        cliente.data_nascimento = datetime.strptime(
             new_data_nascimento, "%Y-%m-%d"
         ).date()
-        current_user.morada = new_morada
-        current_user.nif = new_nif
-        current_user.price_per_day = new_price_per_day
+        cliente.morada = new_morada
+        cliente.nif = new_nif
+        cliente.price_per_day = new_price_per_day
 
         if new_password:
-            current_user.password = new_password
+            cliente.password = new_password
 
         if new_price_per_day > 250:
             categoria = "Gold"
@@ -430,9 +512,10 @@ def update_client():
             categoria = "Económico"
         else:
             categoria = "Silver"
-        current_user.categoria = categoria
+        cliente.categoria = categoria
 
         db.session.commit()
+        user_cache.invalidate(cliente.id)
         flash("Dados atualizados com sucesso!", "success")
         return redirect(url_for("index"))
     else:
@@ -0,0 +1,6 @@
+from app import create_app
+
+# Ponto de entrada dos workers do servidor WSGI (por exemplo,
+# gunicorn --preload wsgi:app): sem Flask-Migrate nem comandos, e sem o
+# scheduler, que corre à parte (flask scheduler run ou BACKGROUND_SERVICES=1)
+app = create_app(with_cli=False)